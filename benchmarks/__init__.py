@@ -0,0 +1,9 @@
+"""__init__.py
+
+Benchmarks of the scraping hot paths against a local stand-in server.
+
+Run from the repository root with `python -m benchmarks.run`.
+
+This file contains no functions.
+
+"""
@@ -0,0 +1,175 @@
+"""corpus.py
+
+This file builds the pages served by the stand-in server.
+
+The default corpus is generated from the markup of the offline test
+fixtures, so it needs no network and is the same on every machine.
+Pages saved from the live sites can be added from a directory.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _url_key - converts a url to the key the server looks up
+    * movie_names - names of the movies in the synthetic corpus
+    * build_corpus - generates main, review and wikipedia pages
+    * load_pages - adds pages saved from the live sites
+    * save_page - saves one page in the load_pages layout
+
+"""
+
+# base
+import os
+from typing import Dict, List
+
+# this package
+from tomatopy.util import _build_url
+from tomatopy.reviews import _review_page_url
+from tomatopy.wikipedia import _build_wiki_url
+from tomatopy.tests.fixtures import MAIN_PAGE_HTML, review_page_html
+
+#==========
+# constants
+#==========
+
+# year of the synthetic 'year in film' page
+CORPUS_YEAR = 2008
+
+#==================
+# interal functions
+#==================
+
+def _url_key(url: str) -> str:
+    """Convert a url to the key the server looks up
+
+    Parameters
+    ----------
+    url : str
+        url of a page, e.g. 'https://www.rottentomatoes.com/m/x2/'
+
+    Returns
+    -------
+    str
+        '/' + host + path and query, e.g. '/www.rottentomatoes.com/m/x2/'
+    """
+
+    return '/' + url.split('://', 1)[1]
+
+#===============
+# user functions
+#===============
+
+def movie_names(num_movies: int) -> List[str]:
+    """Names of the movies in the synthetic corpus
+
+    Parameters
+    ----------
+    num_movies : int
+        number of movies
+
+    Returns
+    -------
+    list
+        movie names in corpus order
+    """
+
+    return ['Bench Movie ' + str(n) for n in range(1, num_movies + 1)]
+
+def build_corpus(num_movies: int = 20, review_pages: int = 5,
+                 per_page: int = 20) -> Dict[str, bytes]:
+    """Generate main, review and wikipedia pages
+
+    Every movie has a main page and review_pages pages of per_page
+    reviews. The 'year in film' page of CORPUS_YEAR lists all movies.
+
+    Parameters
+    ----------
+    num_movies : int
+        number of movies
+    review_pages : int
+        review pages per movie
+    per_page : int
+        reviews per review page
+
+    Returns
+    -------
+    dict
+        page bodies keyed by _url_key
+    """
+
+    pages = dict()
+    for name in movie_names(num_movies):
+        url = _build_url(name)
+        pages[_url_key(url)] = MAIN_PAGE_HTML.encode('utf-8')
+        first = review_page_html(1, review_pages, per_page).encode('utf-8')
+        pages[_url_key(url + 'reviews')] = first
+        for page_num in range(1, review_pages + 1):
+            html = review_page_html(page_num, review_pages, per_page)
+            pages[_url_key(_review_page_url(url, page_num))] = html.encode('utf-8')
+
+    rows = ''.join('<tr><td><i><a href="/wiki/{slug}" title="{name}">{name}</a></i></td></tr>\n'
+                   .format(slug=name.replace(' ', '_'), name=name)
+                   for name in movie_names(num_movies))
+    wiki = '''<html><body><table class="wikitable">
+{}</table>
+<i><a href="/wiki/Category:{year}" title="Category:{year}">Category</a></i>
+</body></html>
+'''.format(rows, year=CORPUS_YEAR)
+    pages[_url_key(_build_wiki_url(CORPUS_YEAR))] = wiki.encode('utf-8')
+    return pages
+
+def load_pages(directory: str, pages: Dict[str, bytes] = None) -> Dict[str, bytes]:
+    """Add pages saved from the live sites
+
+    Files are looked up by host and path below directory, as written
+    by save_page; query strings are part of the file name.
+
+    Parameters
+    ----------
+    directory : str
+        directory of saved pages
+    pages : dict
+        pages to add to; a new dict when None
+
+    Returns
+    -------
+    dict
+        page bodies keyed by _url_key
+    """
+
+    if pages is None:
+        pages = dict()
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            key = '/' + os.path.relpath(path, directory).replace(os.sep, '/')
+            if key.endswith('/index.html'):
+                key = key[:-len('index.html')]
+            with open(path, 'rb') as f:
+                pages[key] = f.read()
+    return pages
+
+def save_page(directory: str, url: str, body: bytes) -> None:
+    """Save one page in the layout load_pages reads
+
+    Parameters
+    ----------
+    directory : str
+        directory of saved pages
+    url : str
+        url of the page
+    body : bytes
+        body of the page
+
+    Returns
+    -------
+    None
+    """
+
+    key = _url_key(url)
+    if key.endswith('/'):
+        key += 'index.html'
+    path = os.path.join(directory, *key.strip('/').split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
@@ -0,0 +1,357 @@
+"""run.py
+
+This file runs the benchmarks and reports or compares their results.
+
+    python -m benchmarks.run [--movies 20] [--latency 0.02] [--json out.json]
+                             [--baseline old.json] [--tolerance 0.2]
+
+Timed results are the best of --repeat runs. With --baseline the run
+fails when a result is worse than the baseline by more than
+--tolerance.
+
+This file requires no packages. The lxml parser backend is timed when
+`lxml` is installed.
+
+This file contains the following functions:
+
+    * _best_of - best wall time of repeated calls
+    * _isolated - runs a benchmark with clean library state
+    * bench_parse - parse time per page for each parser backend
+    * bench_fetch - pages per second fetched from the server
+    * bench_memory - peak memory allocated per scraped movie
+    * bench_end_to_end - movies per hour through scrape_many
+    * compare - finds results worse than a baseline
+    * main - runs all benchmarks
+
+"""
+
+# base
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+# this package
+import tomatopy as rtp
+from tomatopy import resolve
+from tomatopy.gl import PARSER_BACKENDS
+from tomatopy.util import _build_url, _get_page
+from tomatopy.main_info import _parse_main_page
+from tomatopy.reviews import _get_critic_reviews_from_page, _review_page_url
+from benchmarks.corpus import build_corpus, load_pages, movie_names, _url_key, CORPUS_YEAR
+from benchmarks.server import StandInServer
+
+#==========
+# constants
+#==========
+
+# crawl rate used against the local server; the limiter still runs
+BENCH_CRAWL_RATE = 1e-6
+
+# whether a larger value of a result is better
+HIGHER_IS_BETTER = {
+    'parse_main_us': False,
+    'parse_review_us': False,
+    'fetch_pages_per_sec': True,
+    'fetch_pages_per_sec_threads': True,
+    'memory_peak_kib_per_movie': False,
+    'movies_per_hour': True,
+}
+
+#==================
+# interal functions
+#==================
+
+def _best_of(repeat: int, func: Callable, *args) -> float:
+    """Best wall time of repeated calls
+
+    Parameters
+    ----------
+    repeat : int
+        number of calls
+    func : callable
+        function to time
+
+    Returns
+    -------
+    float
+        seconds of the fastest call
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def _isolated(server: StandInServer, func: Callable, *args):
+    """Run a benchmark with clean library state
+    Forgets resolved movie urls and routes a fresh session to the
+    server, so every benchmark starts cold.
+
+    Parameters
+    ----------
+    server : StandInServer
+        running stand-in server
+    func : callable
+        benchmark to run
+
+    Returns
+    -------
+    object
+        return value of func
+    """
+
+    rates = rtp.get_crawl_rate(), rtp.get_wiki_crawl_rate()
+    resolve._resolved.clear()
+    rtp.close_session()
+    rtp.set_crawl_rate(BENCH_CRAWL_RATE)
+    rtp.set_wiki_crawl_rate(BENCH_CRAWL_RATE)
+    server.install()
+    try:
+        return func(*args)
+    finally:
+        rtp.set_crawl_rate(rates[0])
+        rtp.set_wiki_crawl_rate(rates[1])
+
+#===============
+# user functions
+#===============
+
+def bench_parse(pages: Dict[str, bytes], repeat: int = 5) -> Dict[str, float]:
+    """Parse time per page for each parser backend
+
+    Parameters
+    ----------
+    pages : dict
+        corpus from build_corpus
+    repeat : int
+        timed runs per backend; the best is kept
+
+    Returns
+    -------
+    dict
+        microseconds per main page and per review page keyed by
+        'parse_main_us' and 'parse_review_us', suffixed with the
+        backend for backends other than 'regex'
+    """
+
+    main_html = [pages[_url_key(_build_url(name))].decode('utf-8')
+                 for name in movie_names(1)]
+    review_html = [page.decode('utf-8') for key, page in pages.items() if '?page=' in key]
+
+    results = dict()
+    backend = rtp.get_parser_backend()
+    try:
+        for name in PARSER_BACKENDS:
+            try:
+                rtp.set_parser_backend(name)
+            except Exception:
+                # optional backend that is not installed
+                continue
+            suffix = '' if name == 'regex' else '_' + name
+            seconds = _best_of(repeat, lambda: [_parse_main_page(h) for h in main_html * 50])
+            results['parse_main_us' + suffix] = seconds / (len(main_html) * 50) * 1e6
+            seconds = _best_of(repeat, lambda: [_get_critic_reviews_from_page(h) for h in review_html])
+            results['parse_review_us' + suffix] = seconds / len(review_html) * 1e6
+    finally:
+        rtp.set_parser_backend(backend)
+    return results
+
+def bench_fetch(server: StandInServer, num_movies: int, threads: int = 4) -> Dict[str, float]:
+    """Pages per second fetched from the server, decoded to text
+
+    Parameters
+    ----------
+    server : StandInServer
+        running stand-in server
+    num_movies : int
+        number of corpus movies to fetch the review pages of
+    threads : int
+        threads of the concurrent run
+
+    Returns
+    -------
+    dict
+        'fetch_pages_per_sec' for one thread and
+        'fetch_pages_per_sec_threads' for threads threads
+    """
+
+    urls = list()
+    for name in movie_names(num_movies):
+        url = _build_url(name)
+        page_num = 1
+        while _url_key(_review_page_url(url, page_num)) in server.pages:
+            urls.append(_review_page_url(url, page_num))
+            page_num += 1
+
+    def sequential():
+        for url in urls:
+            _get_page(url)
+
+    def concurrent():
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(_get_page, urls))
+
+    seconds = _isolated(server, _best_of, 1, sequential)
+    seconds_threads = _isolated(server, _best_of, 1, concurrent)
+    return {'fetch_pages_per_sec': len(urls) / seconds,
+            'fetch_pages_per_sec_threads': len(urls) / seconds_threads}
+
+def bench_memory(server: StandInServer, num_movies: int = 3) -> Dict[str, float]:
+    """Peak memory allocated per scraped movie
+
+    Parameters
+    ----------
+    server : StandInServer
+        running stand-in server
+    num_movies : int
+        movies scraped one at a time; the largest peak is kept
+
+    Returns
+    -------
+    dict
+        'memory_peak_kib_per_movie' in KiB
+    """
+
+    def scrape():
+        peak = 0
+        for name in movie_names(num_movies):
+            tracemalloc.start()
+            rtp.scrape_movie_info(name)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return peak
+
+    return {'memory_peak_kib_per_movie': _isolated(server, scrape) / 1024}
+
+def bench_end_to_end(server: StandInServer, workers: int = 4,
+                     parse_workers: int = None) -> Dict[str, float]:
+    """Movies per hour through scrape_many, names from the wiki page
+
+    Parameters
+    ----------
+    server : StandInServer
+        running stand-in server
+    workers : int
+        fetcher threads of scrape_many
+    parse_workers : int
+        parser processes of scrape_many
+
+    Returns
+    -------
+    dict
+        'movies_per_hour'
+    """
+
+    def scrape():
+        start = time.perf_counter()
+        names = rtp.scrape_movie_names(CORPUS_YEAR)
+        done = 0
+        for _, main_info, _ in rtp.scrape_many(names, workers=workers,
+                                               parse_workers=parse_workers):
+            if main_info is not None:
+                done += 1
+        return done / (time.perf_counter() - start) * 3600
+
+    return {'movies_per_hour': _isolated(server, scrape)}
+
+def compare(results: Dict[str, float], baseline: Dict[str, float],
+            tolerance: float) -> List[str]:
+    """Find results worse than a baseline
+
+    Parameters
+    ----------
+    results : dict
+        results of this run
+    baseline : dict
+        results of an earlier run
+    tolerance : float
+        allowed relative change for the worse, e.g. 0.2 for 20%
+
+    Returns
+    -------
+    list
+        one message per regressed result
+    """
+
+    regressions = list()
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        higher_is_better = HIGHER_IS_BETTER.get(key.split('_lxml')[0], False)
+        if higher_is_better:
+            worse = value < base * (1 - tolerance)
+        else:
+            worse = value > base * (1 + tolerance)
+        if worse:
+            regressions.append('{}: {:.1f} (baseline {:.1f})'.format(key, value, base))
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    """Run all benchmarks
+
+    Parameters
+    ----------
+    argv : list
+        command line arguments; sys.argv when None
+
+    Returns
+    -------
+    int
+        exit status; 1 when a result regressed
+    """
+
+    parser = argparse.ArgumentParser(description='tomatopy benchmarks')
+    parser.add_argument('--movies', type=int, default=20, help='movies in the corpus')
+    parser.add_argument('--review-pages', type=int, default=5, help='review pages per movie')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds the server waits per request')
+    parser.add_argument('--workers', type=int, default=4, help='fetcher threads')
+    parser.add_argument('--parse-workers', type=int, default=None, help='parser processes')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs of the parse benchmark')
+    parser.add_argument('--pages', default=None, help='directory of saved pages to add')
+    parser.add_argument('--json', default=None, help='write results to this file')
+    parser.add_argument('--baseline', default=None, help='results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative change for the worse')
+    args = parser.parse_args(argv)
+
+    pages = build_corpus(args.movies, args.review_pages)
+    if args.pages is not None:
+        load_pages(args.pages, pages)
+
+    results = bench_parse(pages, args.repeat)
+    server = StandInServer(pages, args.latency)
+    server.start()
+    try:
+        results.update(bench_fetch(server, min(args.movies, 5), args.workers))
+        results.update(bench_memory(server))
+        results.update(bench_end_to_end(server, args.workers, args.parse_workers))
+    finally:
+        server.stop()
+
+    for key, value in results.items():
+        print('{:<32}{:>14.1f}'.format(key, value))
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print('regression: ' + message)
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""server.py
+
+This file contains a local stand-in for the scraped sites.
+
+The server answers from an in-memory corpus after a configurable
+latency. A transport adapter mounted on the library's session sends
+requests for the real hosts to it, so the library code under test is
+unchanged: urls, rate limiter hosts and the response cache all see the
+real sites.
+
+This file requires no packages.
+
+This file contains no functions.
+
+"""
+
+# base
+import http.server
+import threading
+import time
+from typing import Dict
+
+# requirements
+from requests.adapters import HTTPAdapter
+
+# this package
+from tomatopy.gl import RT_HOST, WIKI_HOST
+from tomatopy.util import lib_cont
+from tomatopy.tests.fixtures import PAGE_404_HTML
+
+#========
+# classes
+#========
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Answers GET and HEAD from the corpus of the server"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _answer(self, with_body: bool) -> None:
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency > 0:
+            time.sleep(server.latency)
+        body = server.pages.get(self.path)
+        status = 200
+        if body is None:
+            body = PAGE_404_HTML.encode('utf-8')
+            status = 404
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._answer(True)
+
+    def do_HEAD(self) -> None:
+        self._answer(False)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+class StandInServer():
+    """
+    Local http server answering requests for RT and Wikipedia pages
+
+    ...
+
+    Attributes
+    ----------
+    pages : dict
+        page bodies keyed by '/' + host + path and query
+    latency : float
+        seconds each request waits before it is answered
+    url : str
+        base url of the server, e.g. 'http://127.0.0.1:8000'
+    requests : int
+        number of requests answered
+
+    Methods
+    -------
+    start
+        Starts serving on a background thread
+    stop
+        Stops serving
+    install
+        Routes the library's session to the server
+    uninstall
+        Routes the library's session back to the real sites
+
+    """
+
+    def __init__(self, pages: Dict[str, bytes], latency: float = 0.0) -> None:
+        """Init server; bind a free local port
+
+        Parameters
+        ----------
+        self : self
+        pages : dict
+            page bodies keyed by '/' + host + path and query
+        latency : float
+            seconds each request waits before it is answered
+
+        Returns
+        -------
+        None
+        """
+
+        self._httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.pages = pages
+        self._httpd.latency = latency
+        self._httpd.requests = 0
+        self._httpd.lock = threading.Lock()
+        self._thread = None
+        host, port = self._httpd.server_address[:2]
+        self.url = 'http://{}:{}'.format(host, port)
+
+    @property
+    def pages(self) -> Dict[str, bytes]:
+        return self._httpd.pages
+
+    @property
+    def latency(self) -> float:
+        return self._httpd.latency
+
+    @latency.setter
+    def latency(self, latency: float) -> None:
+        self._httpd.latency = latency
+
+    @property
+    def requests(self) -> int:
+        return self._httpd.requests
+
+    def start(self) -> None:
+        """Start serving on a background thread"""
+
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving"""
+
+        self.uninstall()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def install(self) -> None:
+        """Route the library's session to the server
+        Call again after set_session_options or close_session, which
+        replace the session.
+        """
+
+        session = lib_cont.get_session()
+        adapter = _StandInAdapter(self.url, pool_maxsize=lib_cont.pool_size)
+        for host in (RT_HOST, WIKI_HOST):
+            session.mount('https://' + host + '/', adapter)
+            session.mount('http://' + host + '/', adapter)
+
+    def uninstall(self) -> None:
+        """Route the library's session back to the real sites"""
+
+        lib_cont.close_session()
+
+class _StandInAdapter(HTTPAdapter):
+    """Transport adapter that sends requests to the stand-in server"""
+
+    def __init__(self, server_url: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.server_url = server_url
+
+    def send(self, request, **kwargs):
+        request.url = self.server_url + '/' + request.url.split('://', 1)[1]
+        return super().send(request, **kwargs)
@@ -14,15 +14,35 @@ This file contains not functions.
 #====================
 
 from .scraper import scrape_movie_info
+from .scraper import scrape_movie_records
+from .scraper import scrape_many
+from .jobs import CrawlJob
+from .reparse import reparse
 from .wikipedia import scrape_movie_names
+from .wikipedia import scrape_movie_names_range
+from .wikipedia import TitleIndex
 
 #=========================
 # Supplemental User Access
 #=========================
 
 from .reviews import get_critic_reviews
+from .reviews import get_critic_review_records
+from .reviews import iter_critic_reviews
+from .reviews import get_new_critic_reviews
+from .state import ReviewStateStore
 from .main_info import get_main_page_info
+from .main_info import get_movie_info
+from .resolve import resolve_movie_url
+from .util import build_urls
 from .util import check_min_delay
+from .records import ReviewTable
+from .records import MovieInfo
+from .records import CriticReview
+from .sinks import JsonlSink
+from .sinks import ParquetSink
+from .sinks import write_results
+from .archive import PageArchive
 
 #====================
 # User Control Access
@@ -30,5 +50,27 @@ from .util import check_min_delay
 
 from .util import set_crawl_rate
 from .util import get_crawl_rate
+from .util import set_wiki_crawl_rate
+from .util import get_wiki_crawl_rate
 from .util import get_verbose_setting
 from .util import set_verbose_mode
+from .util import set_session_options
+from .util import close_session
+from .util import enable_cache
+from .util import disable_cache
+from .util import clear_cache
+from .util import get_cache_info
+from .util import set_parser_backend
+from .util import get_parser_backend
+from .util import enable_slug_cache
+from .util import disable_slug_cache
+from .util import enable_parse_memo
+from .util import disable_parse_memo
+from .util import get_parse_memo_info
+from .util import enable_archive
+from .util import disable_archive
+from .util import enable_metrics
+from .util import disable_metrics
+from .util import get_metrics
+from .util import add_metrics_hook
+from .util import remove_metrics_hook
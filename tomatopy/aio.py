@@ -0,0 +1,281 @@
+"""aio.py
+
+This file contains asyncio versions of the user scraping functions.
+Requests share the per-host rate limiter of the synchronous functions,
+so any number of movies can be in flight in one event loop while the
+crawl rate is still honored.
+
+This file requires that `aiohttp` be installed within the Python
+environment you are running in.
+
+This file contains the following functions:
+
+    * open_session - open an aiohttp session with the library settings
+    * _session_scope - use the given session or a temporary one
+    * _fetch - request url and get the status and page html
+    * _fetch_text - request url and get the page html
+    * get_main_page_info - scrapes info from a movie main page
+    * get_critic_reviews - scrapes info over all critic pages
+    * scrape_movie_info - main movie scraper
+
+"""
+
+# base
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+# requirements
+import aiohttp
+
+# this package
+from .gl import RETRY_STATUSES
+from .ratelimit import _host
+from .util import lib_cont, _decode_entities
+from .resolve import _candidate_urls, _resolve_key, _recall, _remember, _page_found
+from .main_info import _parse_main_page
+from .reviews import _get_num_pages, _review_page_url, _parse_review_pages
+
+logger = logging.getLogger(__name__)
+
+#==================
+# interal functions
+#==================
+
+async def open_session() -> aiohttp.ClientSession:
+    """Open an aiohttp session using the library session options
+    A coroutine, so the session is made in the running event loop.
+    The caller is responsible for closing the session.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    aiohttp.ClientSession
+        session with pooled connections, timeout and User-Agent
+    """
+
+    connector = aiohttp.TCPConnector(limit_per_host=lib_cont.pool_size)
+    timeout = aiohttp.ClientTimeout(total=lib_cont.get_timeout())
+    return aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                 headers={'User-Agent': lib_cont.user_agent})
+
+@asynccontextmanager
+async def _session_scope(session: aiohttp.ClientSession = None):
+    """Use the given session or open a temporary one
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        session to use; a new one is opened and closed when None
+
+    Returns
+    -------
+    aiohttp.ClientSession
+        session to request with
+    """
+
+    if session is not None:
+        yield session
+    else:
+        session = await open_session()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+async def _fetch(session: aiohttp.ClientSession, url: str):
+    """Request url and get the status and the page html
+    Waits for the rate limiter of the url's host before every attempt
+    and retries connection errors and 429/5xx like the sync session.
+    Entities are decoded as by _get_page, for the regex parsers.
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        session to request with
+    url : str
+        The url to scrape
+
+    Returns
+    -------
+    int
+        http status of the response; None when redirected too many
+        times
+    str
+        html content of the page; '' when redirected too many times
+    """
+
+    host = _host(url)
+    for attempt in range(lib_cont.retries + 1):
+        await lib_cont.limiter.wait_async(host)
+        try:
+            async with session.get(url) as r:
+                if r.status in RETRY_STATUSES and attempt < lib_cont.retries:
+                    raise aiohttp.ClientResponseError(r.request_info, r.history,
+                                                      status=r.status)
+                return r.status, _decode_entities(await r.text())
+        except aiohttp.TooManyRedirects:
+            return None, ''
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == lib_cont.retries:
+                raise
+            await asyncio.sleep(lib_cont.backoff * (2 ** attempt))
+
+async def _fetch_text(session: aiohttp.ClientSession, url: str) -> str:
+    """Request url and get the page html; see _fetch
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        session to request with
+    url : str
+        The url to scrape
+
+    Returns
+    -------
+    str
+        html content of the page; '' when redirected too many times
+    """
+
+    return (await _fetch(session, url))[1]
+
+#===============
+# user functions
+#===============
+
+async def get_main_page_info(page: str,
+                             session: aiohttp.ClientSession = None) -> Dict[str, List]:
+    """Scrapes info from a movie main page
+
+    Parameters
+    ----------
+    page : str
+        The url to scrape from RT
+    session : aiohttp.ClientSession
+        session to request with; a temporary one is used when None
+
+    Returns
+    -------
+    dict
+        dict of scraped info with keys:
+        synopsis, rating, genre, studio, director, writer, currency,
+        box_office, runtime
+    """
+
+    logger.debug('scraping main page %s', page, extra={'url': page})
+
+    async with _session_scope(session) as s:
+        html = await _fetch_text(s, page)
+
+    if html == '':
+        # return None when failed soup; None is easy to detect
+        return None
+    else:
+        return _parse_main_page(html)
+
+async def get_critic_reviews(page: str,
+                             session: aiohttp.ClientSession = None) -> Dict[str, List]:
+    """Crawls the set of critic review pages for the given movie.
+    All review pages are requested concurrently; the rate limiter
+    spaces their starts.
+
+    Parameters
+    ----------
+    page : str
+        main page url for movie
+    session : aiohttp.ClientSession
+        session to request with; a temporary one is used when None
+
+    Returns
+    -------
+    dict
+        dict containing scraped review info with the following keys:
+        'reviews', 'rating', 'fresh', 'critic', 'top_critic',
+        'publisher', 'date'
+    """
+
+    async with _session_scope(session) as s:
+        # how many soups? the page that tells is review page 1
+        first_html = await _fetch_text(s, page + "reviews")
+        pages = _get_num_pages(first_html)
+
+        if pages is None:
+            # if pages doesnt match return None; its easy to detect
+            return None
+
+        logger.debug('scraping %s review pages of %s', pages, page,
+                     extra={'url': page, 'pages': int(pages)})
+
+        htmls = await asyncio.gather(*[_fetch_text(s, _review_page_url(page, page_num))
+                                       for page_num in range(2, int(pages) + 1)])
+
+    # accumulate review info in page order
+    c_info = _parse_review_pages([first_html] + htmls)
+
+    logger.debug('done scraping critic reviews of %s', page,
+                 extra={'url': page, 'count': c_info.num_rows})
+
+    return c_info
+
+async def scrape_movie_info(movie_name: str,
+                            session: aiohttp.ClientSession = None) -> [Dict[str, List], Dict[str, List]]:
+    """Get the main info and critic reviews for
+    input movie. Main info and reviews are scraped concurrently.
+
+    Parameters
+    ----------
+    movie_name : string
+        movie name to scrape RT for
+    session : aiohttp.ClientSession
+        session to request with; a temporary one is used when None
+
+    Returns
+    -------
+    dict
+        dict containing main information about
+        the movie
+    dict
+        dict containing the review information
+    """
+
+    async with _session_scope(session) as s:
+        # determine if url can be used
+        key = _resolve_key(movie_name)
+        found, movie_url = _recall(key)
+        # the page downloaded to check a candidate is the main page
+        main_html = None
+        if not found:
+            page_found = False
+            for url in _candidate_urls(movie_name):
+                status, html = await _fetch(s, url)
+                if status is None or not 200 <= status < 300:
+                    html = None
+                page_found = _page_found(status, html)
+                if page_found:
+                    movie_url = url
+                    main_html = html
+                if page_found is not False:
+                    break
+            # a throttled or failed check does not make a miss
+            if page_found is not None:
+                _remember(key, movie_url)
+
+        if movie_url is None:
+            logger.warning('unable to scrape %s: no page found', movie_name,
+                           extra={'movie': movie_name})
+            return None, None
+
+        logger.debug('found %s', movie_name, extra={'movie': movie_name, 'url': movie_url})
+
+        if main_html is None:
+            main_info, critic_reviews = await asyncio.gather(
+                get_main_page_info(movie_url, s), get_critic_reviews(movie_url, s))
+        else:
+            critic_reviews = await get_critic_reviews(movie_url, s)
+            main_info = _parse_main_page(main_html)
+
+    return main_info, critic_reviews
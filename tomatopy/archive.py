@@ -0,0 +1,390 @@
+"""archive.py
+
+This file contains the append-only archive of downloaded pages used by
+_get and reparse.
+
+Pages are written as WARC/1.0 response records, each its own gzip
+member, to segment files named 'pages-00000.warc.gz' and up; a segment
+is closed once it holds max_segment_bytes. The segments can be read by
+any WARC tool. A SQLite index keyed by url and fetch time points at
+the offset and length of every record, so one record is read with a
+single seek and without the index in parser processes.
+
+Records are never rewritten or deleted; fetching a url again appends a
+new record.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _segment_name - name of a segment file
+    * _warc_record - build one gzip compressed WARC response record
+    * _read_record - read the body of one record
+
+"""
+
+# base
+import datetime
+import gzip
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, List, Tuple
+
+#==========
+# constants
+#==========
+
+DEFAULT_ARCHIVE_PATH = os.path.join(os.path.expanduser('~'), '.tomatopy', 'archive')
+DEFAULT_SEGMENT_BYTES = 1024 * 1024 * 1024
+
+# statuses worth keeping; only pages the parsers can read
+ARCHIVED_STATUSES = (200,)
+
+#==================
+# interal functions
+#==================
+
+def _segment_name(number: int) -> str:
+    """Name of a segment file
+
+    Parameters
+    ----------
+    number : int
+        position of the segment in the archive
+
+    Returns
+    -------
+    str
+        file name, e.g. 'pages-00000.warc.gz'
+    """
+
+    return 'pages-{:05d}.warc.gz'.format(number)
+
+def _warc_record(url: str, fetched: float, status: int, content_type: str,
+                 body: bytes) -> bytes:
+    """Build one gzip compressed WARC response record
+
+    Parameters
+    ----------
+    url : str
+        requested url
+    fetched : float
+        time of the download, seconds since the epoch
+    status : int
+        http status of the response
+    content_type : str
+        Content-Type header of the response; '' if missing
+    body : bytes
+        decoded (not content-encoded) body of the response
+
+    Returns
+    -------
+    bytes
+        a complete gzip member
+    """
+
+    http_head = 'HTTP/1.1 {}\r\n'.format(status)
+    if content_type:
+        http_head += 'Content-Type: {}\r\n'.format(content_type)
+    block = (http_head + 'Content-Length: {}\r\n\r\n'.format(len(body))).encode('latin-1') + body
+    date = datetime.datetime.fromtimestamp(fetched, datetime.timezone.utc)
+    head = ('WARC/1.0\r\n'
+            'WARC-Type: response\r\n'
+            'WARC-Record-ID: <urn:uuid:{}>\r\n'
+            'WARC-Date: {}\r\n'
+            'WARC-Target-URI: {}\r\n'
+            'Content-Type: application/http; msgtype=response\r\n'
+            'Content-Length: {}\r\n\r\n').format(uuid.uuid4(), date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                                 url, len(block))
+    return gzip.compress(head.encode('utf-8') + block + b'\r\n\r\n')
+
+def _read_record(segment_path: str, offset: int, length: int) -> bytes:
+    """Read the body of one record
+
+    Parameters
+    ----------
+    segment_path : str
+        location of the segment file
+    offset : int
+        position of the record's gzip member in the segment
+    length : int
+        size of the gzip member
+
+    Returns
+    -------
+    bytes
+        body of the archived response
+    """
+
+    with open(segment_path, 'rb') as f:
+        f.seek(offset)
+        data = zlib.decompress(f.read(length), wbits=31)
+    # skip the WARC header and the http header of the block
+    start = data.index(b'\r\n\r\n') + 4
+    start = data.index(b'\r\n\r\n', start) + 4
+    return data[start:-4]
+
+#========
+# classes
+#========
+
+class PageArchive():
+    """
+    An append-only, compressed archive of downloaded pages
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        directory of the segments and the index
+    max_segment_bytes : int
+        size at which a segment is closed and a new one started
+
+    Methods
+    -------
+    append(url, response)
+        Appends a response; only ARCHIVED_STATUSES are kept
+    records(url, until)
+        Gets the index entries of archived responses
+    latest(until)
+        Gets the newest index entry of every url
+    read(record)
+        Gets the body of an archived response
+    segment_path(segment)
+        Gets the location of a segment file
+    info
+        Gets record, url and segment counts and size
+    close
+        Closes the index and the open segment
+
+    """
+
+    def __init__(self, path: str = DEFAULT_ARCHIVE_PATH,
+                 max_segment_bytes: int = DEFAULT_SEGMENT_BYTES) -> None:
+        """Init archive; create the directory and index if needed
+
+        Parameters
+        ----------
+        self : self
+        path : str
+            directory of the segments and the index
+        max_segment_bytes : int
+            size at which a segment is closed
+
+        Returns
+        -------
+        None
+        """
+
+        if max_segment_bytes <= 0:
+            raise Exception('Argument `max_segment_bytes` must be greater than 0. \
+            The input value was {}'.format(max_segment_bytes))
+        self.path = path
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        self._segment = None
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._conn = sqlite3.connect(os.path.join(path, 'index.sqlite'),
+                                     check_same_thread=False)
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS records (
+                                url TEXT,
+                                fetched REAL,
+                                status INTEGER,
+                                content_type TEXT,
+                                segment TEXT,
+                                offset INTEGER,
+                                length INTEGER)''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS records_url '
+                           'ON records (url, fetched)')
+        self._conn.commit()
+        # appends go to the newest segment
+        row = self._conn.execute('SELECT MAX(segment) FROM records').fetchone()
+        self._segment_number = int(row[0][6:11]) if row[0] is not None else 0
+
+    def append(self, url: str, response) -> None:
+        """Append a response as a new record
+
+        Parameters
+        ----------
+        url : str
+            requested url
+        response : requests.Response
+            response to keep; only ARCHIVED_STATUSES are kept
+
+        Returns
+        -------
+        None
+        """
+
+        if response.status_code not in ARCHIVED_STATUSES:
+            return
+        fetched = time.time()
+        content_type = response.headers.get('Content-Type', '')
+        record = _warc_record(url, fetched, response.status_code, content_type,
+                              response.content)
+        with self._lock:
+            segment = self._open_segment()
+            offset = segment.tell()
+            segment.write(record)
+            segment.flush()
+            self._conn.execute('INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               (url, fetched, response.status_code, content_type,
+                                _segment_name(self._segment_number), offset, len(record)))
+            self._conn.commit()
+
+    def _open_segment(self):
+        """Get the segment appends go to; start a new one when full
+        Must be called with the lock held.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        file
+            segment opened for appending
+        """
+
+        if self._segment is None:
+            self._segment = open(self.segment_path(_segment_name(self._segment_number)), 'ab')
+        if self._segment.tell() >= self.max_segment_bytes:
+            self._segment.close()
+            self._segment_number += 1
+            self._segment = open(self.segment_path(_segment_name(self._segment_number)), 'ab')
+        return self._segment
+
+    def records(self, url: str = None, until: float = None) -> List[Tuple]:
+        """Get the index entries of archived responses
+
+        Parameters
+        ----------
+        url : str
+            only responses of this url; all when None
+        until : float
+            only responses fetched at or before this time, seconds
+            since the epoch; all when None
+
+        Returns
+        -------
+        list
+            list of (url, fetched, status, content_type, segment,
+            offset, length) ordered by url and fetch time
+        """
+
+        query = 'SELECT * FROM records WHERE 1'
+        params = list()
+        if url is not None:
+            query += ' AND url = ?'
+            params.append(url)
+        if until is not None:
+            query += ' AND fetched <= ?'
+            params.append(until)
+        with self._lock:
+            return self._conn.execute(query + ' ORDER BY url, fetched', params).fetchall()
+
+    def latest(self, until: float = None) -> List[Tuple]:
+        """Get the newest index entry of every url
+
+        Parameters
+        ----------
+        until : float
+            newest as of this time, seconds since the epoch; now
+            when None
+
+        Returns
+        -------
+        list
+            entries as from records, ordered by url
+        """
+
+        latest = dict()
+        for record in self.records(until=until):
+            latest[record[0]] = record
+        return list(latest.values())
+
+    def read(self, record: Tuple) -> bytes:
+        """Get the body of an archived response
+
+        Parameters
+        ----------
+        record : tuple
+            index entry as from records
+
+        Returns
+        -------
+        bytes
+            body of the response
+        """
+
+        return _read_record(self.segment_path(record[4]), record[5], record[6])
+
+    def segment_path(self, segment: str) -> str:
+        """Get the location of a segment file
+
+        Parameters
+        ----------
+        segment : str
+            name of the segment, as in the index
+
+        Returns
+        -------
+        str
+            path of the segment file
+        """
+
+        return os.path.join(self.path, segment)
+
+    def info(self) -> Dict:
+        """Get the state of the archive
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict with keys: path, records, urls, segments, bytes
+        """
+
+        with self._lock:
+            records, urls, segments, size = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT segment), '
+                'COALESCE(SUM(length), 0) FROM records').fetchone()
+        return {'path': self.path, 'records': records, 'urls': urls,
+                'segments': segments, 'bytes': size}
+
+    def close(self) -> None:
+        """Close the index and the open segment
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._conn.close()
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM records WHERE url = ? LIMIT 1',
+                                      (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
@@ -0,0 +1,445 @@
+"""cache.py
+
+This file contains the on-disk http response cache used by _make_soup.
+
+Responses are stored zlib-compressed in a SQLite database keyed by url.
+Each url class (main page, review page, wikipedia, other) has its own
+time to live; stale entries are revalidated with their ETag and
+Last-Modified validators. The least recently used entries are evicted
+when the total size of the stored bodies exceeds the size limit.
+
+The parsed result of a stored body can be stored next to it, so a
+page that is still fresh or answers 304 is not parsed again. Parsed
+results are dropped when a new body is stored for their url.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _url_class - classify a url for its time to live
+
+"""
+
+# base
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict
+
+#==========
+# constants
+#==========
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.tomatopy', 'responses.sqlite')
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+# seconds a response is used without revalidation, per url class
+DEFAULT_TTLS = {
+    'main': 7 * 24 * 3600,
+    'reviews': 24 * 3600,
+    'wiki': 30 * 24 * 3600,
+    'other': 24 * 3600,
+}
+
+# statuses worth storing; 404s save repeated url probes
+CACHED_STATUSES = (200, 404)
+
+# seconds between writes of an entry's last access time; reads in
+# between do not write, which makes eviction order this coarse
+ACCESS_INTERVAL = 3600
+
+#==================
+# interal functions
+#==================
+
+def _url_class(url: str) -> str:
+    """Classify a url for its time to live
+
+    Parameters
+    ----------
+    url : str
+        Any absolute url
+
+    Returns
+    -------
+    str
+        one of 'main', 'reviews', 'wiki' or 'other'
+    """
+
+    if 'wikipedia.org/' in url:
+        return 'wiki'
+    if '/m/' in url:
+        if '/reviews' in url:
+            return 'reviews'
+        return 'main'
+    return 'other'
+
+#========
+# classes
+#========
+
+class CachedResponse():
+    """
+    A response read back from the cache; mimics requests.Response
+
+    ...
+
+    Attributes
+    ----------
+    url : str
+        requested url
+    status_code : int
+        http status of the stored response
+    content : bytes
+        body of the stored response
+    headers : dict
+        stored 'Content-Type', 'ETag' and 'Last-Modified' headers
+    from_cache : boolean
+        always True
+    """
+
+    def __init__(self, url: str, status_code: int, content: bytes,
+                 etag: str = None, last_modified: str = None,
+                 content_type: str = None) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = dict()
+        if content_type is not None:
+            self.headers['Content-Type'] = content_type
+        if etag is not None:
+            self.headers['ETag'] = etag
+        if last_modified is not None:
+            self.headers['Last-Modified'] = last_modified
+        self.from_cache = True
+
+class ResponseCache():
+    """
+    A size-bounded, SQLite-backed store of http responses
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        location of the SQLite database
+    max_bytes : int
+        limit on the total size of the stored (compressed) bodies
+    ttls : dict
+        seconds an entry is fresh, keyed by url class
+
+    Methods
+    -------
+    lookup(url)
+        Gets the stored response and whether it is still fresh
+    store(url, response)
+        Stores a response; evicts old entries over max_bytes
+    touch(url)
+        Marks a stored response as revalidated now
+    lookup_parsed(url, kind)
+        Gets the stored parsed result of a stored response
+    store_parsed(url, kind, result)
+        Stores the parsed result of a stored response
+    clear
+        Removes all stored responses
+    info
+        Gets entry count, size and hit/miss counters
+    close
+        Closes the database
+
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 max_bytes: int = DEFAULT_CACHE_BYTES,
+                 ttls: Dict[str, float] = None) -> None:
+        """Init cache; create the database if needed
+
+        Parameters
+        ----------
+        self : self
+        path : str
+            location of the SQLite database
+        max_bytes : int
+            limit on the total size of the stored bodies
+        ttls : dict
+            seconds an entry is fresh per url class; missing
+            classes use DEFAULT_TTLS
+
+        Returns
+        -------
+        None
+        """
+
+        if max_bytes <= 0:
+            raise Exception('Argument `max_bytes` must be greater than 0. \
+            The input value was {}'.format(max_bytes))
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls is not None:
+            self.ttls.update(ttls)
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                url TEXT PRIMARY KEY,
+                                status INTEGER,
+                                body BLOB,
+                                size INTEGER,
+                                content_type TEXT,
+                                etag TEXT,
+                                last_modified TEXT,
+                                fetched REAL,
+                                accessed REAL)''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed '
+                           'ON responses (accessed)')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS parsed (
+                                url TEXT,
+                                kind TEXT,
+                                result TEXT,
+                                PRIMARY KEY (url, kind))''')
+        self._conn.commit()
+        # total size of the stored bodies; kept up to date by store,
+        # clear and _evict instead of summed on every store
+        self._bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) '
+                                         'FROM responses').fetchone()[0]
+
+    def lookup(self, url: str):
+        """Get the stored response for url
+
+        Parameters
+        ----------
+        url : str
+            requested url
+
+        Returns
+        -------
+        CachedResponse
+            stored response; None when url is not stored
+        boolean
+            True when the response is within its time to live
+        """
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT status, body, content_type, etag, last_modified, '
+                                     'fetched, accessed FROM responses WHERE url = ?',
+                                     (url,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, False
+            if now - row[6] > ACCESS_INTERVAL:
+                self._conn.execute('UPDATE responses SET accessed = ? WHERE url = ?',
+                                   (now, url))
+                self._conn.commit()
+        status, body, content_type, etag, last_modified, fetched, _ = row
+        fresh = now - fetched < self.ttls[_url_class(url)]
+        if fresh:
+            with self._lock:
+                self.hits += 1
+        response = CachedResponse(url, status, zlib.decompress(body),
+                                  etag, last_modified, content_type)
+        return response, fresh
+
+    def store(self, url: str, response) -> None:
+        """Store a response; evict least recently used entries
+        while the stored bodies exceed max_bytes
+
+        Parameters
+        ----------
+        url : str
+            requested url
+        response : requests.Response
+            response to store; only CACHED_STATUSES are stored
+
+        Returns
+        -------
+        None
+        """
+
+        if response.status_code not in CACHED_STATUSES:
+            return
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self._lock:
+            # results parsed from the old body no longer apply
+            self._conn.execute('DELETE FROM parsed WHERE url = ?', (url,))
+            row = self._conn.execute('SELECT size FROM responses WHERE url = ?',
+                                     (url,)).fetchone()
+            if row is not None:
+                self._bytes -= row[0]
+            if len(body) > self.max_bytes:
+                # nor does the old body
+                self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._conn.commit()
+                return
+            self._bytes += len(body)
+            self._conn.execute('INSERT OR REPLACE INTO responses VALUES '
+                               '(?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                               (url, response.status_code, body, len(body),
+                                response.headers.get('Content-Type'),
+                                response.headers.get('ETag'),
+                                response.headers.get('Last-Modified'),
+                                now, now))
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark a stored response as revalidated now
+
+        Parameters
+        ----------
+        url : str
+            requested url
+
+        Returns
+        -------
+        None
+        """
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute('UPDATE responses SET fetched = ?, accessed = ? '
+                               'WHERE url = ?', (now, now, url))
+            self._conn.commit()
+            self.revalidated += 1
+
+    def lookup_parsed(self, url: str, kind: str):
+        """Get the stored parsed result of the stored response for url
+
+        Parameters
+        ----------
+        url : str
+            requested url
+        kind : str
+            what was parsed and how, e.g. 'review/regex'
+
+        Returns
+        -------
+        boolean
+            True when a result is stored
+        object
+            the stored result; None when none is stored
+        """
+
+        with self._lock:
+            row = self._conn.execute('SELECT result FROM parsed WHERE url = ? AND kind = ?',
+                                     (url, kind)).fetchone()
+        if row is None:
+            return False, None
+        return True, json.loads(row[0])
+
+    def store_parsed(self, url: str, kind: str, result) -> None:
+        """Store the parsed result of the stored response for url
+        Nothing is stored when url has no stored response.
+
+        Parameters
+        ----------
+        url : str
+            requested url
+        kind : str
+            what was parsed and how, e.g. 'review/regex'
+        result : object
+            JSON serializable parsed result
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO parsed SELECT ?, ?, ? '
+                               'WHERE EXISTS (SELECT 1 FROM responses WHERE url = ?)',
+                               (url, kind, json.dumps(result), url))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove all stored responses
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.execute('DELETE FROM parsed')
+            self._conn.commit()
+            self._bytes = 0
+            self._conn.execute('VACUUM')
+
+    def info(self) -> Dict[str, float]:
+        """Get the state of the cache
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict with keys: path, entries, bytes, max_bytes,
+            hits, misses, revalidated
+        """
+
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            size = self._bytes
+        return {'path': self.path, 'entries': entries, 'bytes': size,
+                'max_bytes': self.max_bytes, 'hits': self.hits,
+                'misses': self.misses, 'revalidated': self.revalidated}
+
+    def close(self) -> None:
+        """Close the database
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries over max_bytes
+        Must be called with the lock held.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        while self._bytes > self.max_bytes:
+            # oldest entries a batch at a time; not the whole table
+            rows = self._conn.execute('SELECT url, size FROM responses '
+                                      'ORDER BY accessed ASC LIMIT 64').fetchall()
+            if len(rows) == 0:
+                self._bytes = 0
+                break
+            for url, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._conn.execute('DELETE FROM parsed WHERE url = ?', (url,))
+                self._bytes -= size
@@ -2,18 +2,59 @@
 
 This file contains constants and classes only.
 
-This file requires no packages.
+This file requires that `requests` be installed within the Python
+environment you are running in.
 
 This file contains to functions.
 
 """
 
+# base
+import logging
+import threading
+
+# requirements
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+# this package
+from .ratelimit import RateLimiter
+from .cache import ResponseCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_BYTES
+from .state import SlugStore, DEFAULT_STATE_PATH
+from .metrics import Metrics
+from .memo import ParseMemo, DEFAULT_MEMO_ENTRIES
+from .archive import PageArchive, DEFAULT_ARCHIVE_PATH, DEFAULT_SEGMENT_BYTES
+from .log import logger, _verbose_handler
+
 #==========
 # constants
 #==========
 
 RT_BASE_URL = 'https://www.rottentomatoes.com/'
+RT_HOST = 'www.rottentomatoes.com'
+WIKI_HOST = 'en.wikipedia.org'
 DEFAULT_CRAWL_RATE = 1
+DEFAULT_WIKI_CRAWL_RATE = 1
+
+# page parser backends; 'lxml' requires lxml
+PARSER_BACKENDS = ('regex', 'lxml')
+DEFAULT_PARSER_BACKEND = 'regex'
+
+# every content encoding urllib3 can decode here: gzip and deflate,
+# plus br with brotli and zstd with zstandard installed
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+# http session defaults
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_USER_AGENT = 'tomatopy (+https://github.com/sjmiller8182/tomatopy)'
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# statuses that show a page does not exist
+MISSING_STATUSES = (404, 410)
 
 #========
 # classes
@@ -29,8 +70,39 @@ class LibGlobalsContainer():
     ----------
     custom_crawl_rate : float
         Crawl rate used by _make_soup
+    wiki_crawl_rate : float
+        Crawl rate used for en.wikipedia.org
+    limiter : RateLimiter
+        Per-host minimum interval between request starts
     verbose : boolean
         Verbose scraping setting
+    pool_size : int
+        Max connections kept alive per host
+    retries : int
+        Retries per request on connection errors and 429/5xx
+    backoff : float
+        Backoff factor between retries in seconds
+    timeout : float
+        Connect/read timeout in seconds per request
+    user_agent : str
+        User-Agent header sent with every request
+    cache : ResponseCache
+        On-disk response cache; None when disabled
+    parser_backend : str
+        Backend used to parse pages; one of PARSER_BACKENDS
+    slug_store : SlugStore
+        On-disk store of resolved movie urls; None when disabled
+    parse_memo : ParseMemo
+        Memo of parsed pages; None when disabled
+    archive : PageArchive
+        Archive every downloaded page is appended to; None when
+        disabled
+    metrics : Metrics
+        Sink of counters and timings; None when disabled
+    metrics_hooks : list
+        Callbacks called with every counter and timing
+    instrumented : boolean
+        True when metrics or a hook is enabled
 
     Methods
     -------
@@ -38,10 +110,54 @@ class LibGlobalsContainer():
         Sets the crawl rate
     get_crawl_rate
         Gets the current crawl rate
+    set_wiki_crawl_rate(rate)
+        Sets the crawl rate for en.wikipedia.org
+    get_wiki_crawl_rate
+        Gets the current crawl rate for en.wikipedia.org
     set_verbose_mode(verbose = False)
         Sets crawling to verbose mode
     get_verbose_setting
         Gets the current verbose setting
+    set_session_options(pool_size, retries, backoff, timeout, user_agent)
+        Sets the http session options; rebuilds the session
+    get_session
+        Gets the shared http session; created on first use
+    get_timeout
+        Gets the current request timeout
+    close_session
+        Closes the shared http session and its pooled connections
+    enable_cache(path, max_bytes, ttls)
+        Enables the on-disk response cache
+    disable_cache
+        Disables the on-disk response cache; keeps its file
+    clear_cache
+        Removes all responses from the cache
+    get_cache_info
+        Gets entry count, size and hit/miss counters of the cache
+    set_parser_backend(backend)
+        Sets the backend used to parse pages
+    get_parser_backend
+        Gets the backend used to parse pages
+    enable_slug_cache(path)
+        Enables the on-disk store of resolved movie urls
+    disable_slug_cache
+        Disables the on-disk store of resolved movie urls
+    enable_parse_memo(max_entries, path)
+        Enables the memo of parsed pages
+    disable_parse_memo
+        Disables the memo of parsed pages
+    enable_archive(path, max_segment_bytes)
+        Enables the archive of downloaded pages
+    disable_archive
+        Disables the archive of downloaded pages
+    enable_metrics
+        Starts recording counters and timings
+    disable_metrics
+        Stops recording counters and timings
+    add_metrics_hook(hook)
+        Registers a callback for every counter and timing
+    remove_metrics_hook(hook)
+        Unregisters a callback
     
     """
     
@@ -59,7 +175,28 @@ class LibGlobalsContainer():
         None
         """
         self.custom_crawl_rate = 0.0
+        self.wiki_crawl_rate = DEFAULT_WIKI_CRAWL_RATE
         self.verbose = False
+        self._verbose_handler = None
+        self._verbose_level = logging.NOTSET
+        self.limiter = RateLimiter(DEFAULT_CRAWL_RATE)
+        self.limiter.set_interval(RT_HOST, DEFAULT_CRAWL_RATE)
+        self.limiter.set_interval(WIKI_HOST, DEFAULT_WIKI_CRAWL_RATE)
+        self.pool_size = DEFAULT_POOL_SIZE
+        self.retries = DEFAULT_RETRIES
+        self.backoff = DEFAULT_BACKOFF
+        self.timeout = DEFAULT_TIMEOUT
+        self.user_agent = DEFAULT_USER_AGENT
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.cache = None
+        self.parser_backend = DEFAULT_PARSER_BACKEND
+        self.slug_store = None
+        self.parse_memo = None
+        self.archive = None
+        self.metrics = None
+        self.metrics_hooks = list()
+        self.instrumented = False
         
     def set_crawl_rate(self, rate: float) -> None:
         """Set the crawl rate
@@ -81,6 +218,9 @@ class LibGlobalsContainer():
             or equal to 0. The input value was {}'.format(rate))
         else:
             self.custom_crawl_rate = rate
+            # hosts without their own budget follow the RT rate
+            self.limiter.default_interval = rate
+            self.limiter.set_interval(RT_HOST, rate)
             
     def get_crawl_rate(self) -> float:
         """Get the rate used to crawl
@@ -100,8 +240,46 @@ class LibGlobalsContainer():
         else:
             return DEFAULT_CRAWL_RATE
             
+    def set_wiki_crawl_rate(self, rate: float) -> None:
+        """Set the crawl rate for en.wikipedia.org
+        Wikipedia requests have their own budget, separate from RT.
+
+        Parameters
+        ----------
+        rate : float
+            Time in seconds between secessive requests
+            This should be considered the minimum time
+
+        Returns
+        -------
+        None
+        """
+
+        if rate <= 0:
+            raise Exception('Argument `rate` must not be less than \
+            or equal to 0. The input value was {}'.format(rate))
+        else:
+            self.wiki_crawl_rate = rate
+            self.limiter.set_interval(WIKI_HOST, rate)
+
+    def get_wiki_crawl_rate(self) -> float:
+        """Get the rate used to crawl en.wikipedia.org
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        float
+            The current wikipedia crawling rate
+        """
+
+        return self.wiki_crawl_rate
+
     def set_verbose_mode(self, verbose: bool = False) -> None:
         """Enable/Disable Verbose Mode
+        Verbose mode writes the debug log of the package to stdout.
 
         Parameters
         ----------
@@ -113,6 +291,16 @@ class LibGlobalsContainer():
         None
         """
 
+        if verbose and self._verbose_handler is None:
+            self._verbose_handler = _verbose_handler()
+            logger.addHandler(self._verbose_handler)
+            # restored when verbose mode ends
+            self._verbose_level = logger.level
+            logger.setLevel(logging.DEBUG)
+        elif not verbose and self._verbose_handler is not None:
+            logger.removeHandler(self._verbose_handler)
+            logger.setLevel(self._verbose_level)
+            self._verbose_handler = None
         self.verbose = verbose
             
     def get_verbose_setting(self) -> bool:
@@ -128,4 +316,413 @@ class LibGlobalsContainer():
             State of self.verbose
         """
 
-        return self.verbose
\ No newline at end of file
+        return self.verbose
+
+    def set_session_options(self, pool_size: int = None, retries: int = None,
+                            backoff: float = None, timeout: float = None,
+                            user_agent: str = None) -> None:
+        """Set the http session options
+        Options left as None are not changed. The current session
+        is closed so the next request picks up the new options.
+
+        Parameters
+        ----------
+        pool_size : int
+            Max connections kept alive per host
+        retries : int
+            Retries per request on connection errors and 429/5xx
+        backoff : float
+            Backoff factor between retries in seconds
+        timeout : float
+            Connect/read timeout in seconds per request
+        user_agent : str
+            User-Agent header sent with every request
+
+        Returns
+        -------
+        None
+        """
+
+        if pool_size is not None:
+            if pool_size < 1:
+                raise Exception('Argument `pool_size` must be at least 1. \
+                The input value was {}'.format(pool_size))
+            self.pool_size = pool_size
+        if retries is not None:
+            if retries < 0:
+                raise Exception('Argument `retries` must not be negative. \
+                The input value was {}'.format(retries))
+            self.retries = retries
+        if backoff is not None:
+            self.backoff = backoff
+        if timeout is not None:
+            if timeout <= 0:
+                raise Exception('Argument `timeout` must be greater than 0. \
+                The input value was {}'.format(timeout))
+            self.timeout = timeout
+        if user_agent is not None:
+            self.user_agent = user_agent
+        self.close_session()
+
+    def get_session(self) -> requests.Session:
+        """Get the shared http session
+        The session is built on first use and reused afterwards so
+        connections are kept alive between requests.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        requests.Session
+            session with pooled, retrying adapters mounted
+        """
+
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._build_session()
+            return self._session
+
+    def get_timeout(self) -> float:
+        """Get the request timeout
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        float
+            Timeout in seconds per request
+        """
+
+        return self.timeout
+
+    def close_session(self) -> None:
+        """Close the shared http session
+        A new session is built on the next request.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _build_session(self) -> requests.Session:
+        """Build a session from the current options
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        requests.Session
+            session with pooled, retrying adapters mounted
+        """
+
+        retry = Retry(total=self.retries,
+                      backoff_factor=self.backoff,
+                      status_forcelist=RETRY_STATUSES,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.pool_size,
+                              pool_maxsize=self.pool_size,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['User-Agent'] = self.user_agent
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        return session
+
+    def enable_cache(self, path: str = DEFAULT_CACHE_PATH,
+                     max_bytes: int = DEFAULT_CACHE_BYTES,
+                     ttls: dict = None) -> None:
+        """Enable the on-disk response cache
+        A cache that is already enabled is closed first.
+
+        Parameters
+        ----------
+        path : str
+            location of the SQLite database
+        max_bytes : int
+            limit on the total size of the stored bodies
+        ttls : dict
+            seconds a response is fresh keyed by url class:
+            'main', 'reviews', 'wiki', 'other'
+
+        Returns
+        -------
+        None
+        """
+
+        self.disable_cache()
+        self.cache = ResponseCache(path, max_bytes, ttls)
+
+    def disable_cache(self) -> None:
+        """Disable the on-disk response cache
+        The database file is kept and can be enabled again.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def clear_cache(self) -> None:
+        """Remove all responses from the cache
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.cache is None:
+            raise Exception('The response cache is not enabled')
+        self.cache.clear()
+
+    def get_cache_info(self) -> dict:
+        """Get the state of the cache
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict with keys: path, entries, bytes, max_bytes,
+            hits, misses, revalidated; None when disabled
+        """
+
+        if self.cache is None:
+            return None
+        return self.cache.info()
+
+    def set_parser_backend(self, backend: str) -> None:
+        """Set the backend used to parse pages
+
+        Parameters
+        ----------
+        backend : str
+            one of PARSER_BACKENDS
+
+        Returns
+        -------
+        None
+        """
+
+        if backend not in PARSER_BACKENDS:
+            raise Exception('Argument `backend` must be one of {}. \
+            The input value was {}'.format(PARSER_BACKENDS, backend))
+        self.parser_backend = backend
+
+    def get_parser_backend(self) -> str:
+        """Get the backend used to parse pages
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str
+            one of PARSER_BACKENDS
+        """
+
+        return self.parser_backend
+
+    def enable_slug_cache(self, path: str = DEFAULT_STATE_PATH) -> None:
+        """Enable the on-disk store of resolved movie urls
+        A store that is already enabled is closed first.
+
+        Parameters
+        ----------
+        path : str
+            location of the SQLite database
+
+        Returns
+        -------
+        None
+        """
+
+        self.disable_slug_cache()
+        self.slug_store = SlugStore(path)
+
+    def disable_slug_cache(self) -> None:
+        """Disable the on-disk store of resolved movie urls
+        The database file is kept and can be enabled again.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.slug_store is not None:
+            self.slug_store.close()
+            self.slug_store = None
+
+    def enable_parse_memo(self, max_entries: int = DEFAULT_MEMO_ENTRIES,
+                          path: str = None) -> None:
+        """Enable the memo of parsed pages
+        A memo that is already enabled is closed first.
+
+        Parameters
+        ----------
+        max_entries : int
+            parsed pages kept in memory
+        path : str
+            location of the SQLite database; None for memory only
+
+        Returns
+        -------
+        None
+        """
+
+        self.disable_parse_memo()
+        self.parse_memo = ParseMemo(max_entries, path)
+
+    def disable_parse_memo(self) -> None:
+        """Disable the memo of parsed pages
+        The database file is kept and can be enabled again.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.parse_memo is not None:
+            self.parse_memo.close()
+            self.parse_memo = None
+
+    def enable_archive(self, path: str = DEFAULT_ARCHIVE_PATH,
+                       max_segment_bytes: int = DEFAULT_SEGMENT_BYTES) -> None:
+        """Enable the archive of downloaded pages
+        An archive that is already enabled is closed first.
+
+        Parameters
+        ----------
+        path : str
+            directory of the segments and the index
+        max_segment_bytes : int
+            size at which a segment is closed
+
+        Returns
+        -------
+        None
+        """
+
+        self.disable_archive()
+        self.archive = PageArchive(path, max_segment_bytes)
+
+    def disable_archive(self) -> None:
+        """Disable the archive of downloaded pages
+        The archive is kept on disk and can be enabled again.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def enable_metrics(self) -> Metrics:
+        """Start recording counters and timings
+        Metrics that are already enabled are kept.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        Metrics
+            the sink the values are recorded in
+        """
+
+        if self.metrics is None:
+            self.metrics = Metrics()
+        self.instrumented = True
+        return self.metrics
+
+    def disable_metrics(self) -> None:
+        """Stop recording counters and timings; hooks stay registered
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.metrics = None
+        self.instrumented = len(self.metrics_hooks) > 0
+
+    def add_metrics_hook(self, hook) -> None:
+        """Register a callback for every counter and timing
+
+        Parameters
+        ----------
+        hook : callable
+            called as hook(kind, name, value, labels) with kind
+            'counter' or 'timing' and labels a dict
+
+        Returns
+        -------
+        None
+        """
+
+        self.metrics_hooks = self.metrics_hooks + [hook]
+        self.instrumented = True
+
+    def remove_metrics_hook(self, hook) -> None:
+        """Unregister a callback added with add_metrics_hook
+
+        Parameters
+        ----------
+        hook : callable
+            the registered callback
+
+        Returns
+        -------
+        None
+        """
+
+        self.metrics_hooks = [h for h in self.metrics_hooks if h is not hook]
+        self.instrumented = self.metrics is not None or len(self.metrics_hooks) > 0
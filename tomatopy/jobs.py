@@ -0,0 +1,448 @@
+"""jobs.py
+
+This file contains resumable crawl jobs.
+
+A job keeps its frontier and results in a SQLite checkpoint: every
+movie and every review page is committed as soon as it is scraped, so
+a job that is killed resumes where it stopped. Failed movies are
+retried with exponential backoff.
+
+This file requires no packages.
+
+This file contains no functions.
+
+"""
+
+# base
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Tuple
+
+# this package
+from .util import _get_response, _page_text, _parse_response
+from .scraper import _fetch_main_page
+from .resolve import _resolve_key, _forget
+from .main_info import _parse_main_page
+from .reviews import _get_num_pages, _review_page_url, _get_critic_reviews_from_page
+from .records import ReviewTable
+from .wikipedia import scrape_movie_names
+
+logger = logging.getLogger(__name__)
+
+#==========
+# constants
+#==========
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+# seconds before the first retry; doubles with every attempt
+DEFAULT_RETRY_BACKOFF = 60.0
+
+#========
+# classes
+#========
+
+class CrawlJob():
+    """
+    A resumable crawl of many movies checkpointed in SQLite
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        location of the checkpoint database
+
+    Methods
+    -------
+    add(movie_names)
+        Adds movies to the frontier
+    add_year(year)
+        Adds the movies of a wikipedia 'year in film' page
+    run(max_attempts, backoff, wait)
+        Scrapes the frontier until it is empty
+    progress
+        Counts movies by status
+    results
+        Yields the scraped movies
+    failures
+        Yields the movies that ran out of attempts
+    retry_failed
+        Puts failed movies back in the frontier
+    close
+        Closes the database
+
+    """
+
+    def __init__(self, path: str) -> None:
+        """Init job; create or open its checkpoint
+
+        Parameters
+        ----------
+        self : self
+        path : str
+            location of the checkpoint database; an existing one
+            is resumed
+
+        Returns
+        -------
+        None
+        """
+
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # pages: NULL until the page count is known; 0 if there are
+        # no review pages
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS movies (
+                                name TEXT PRIMARY KEY,
+                                position INTEGER,
+                                status TEXT,
+                                url TEXT,
+                                main_info TEXT,
+                                pages INTEGER,
+                                attempts INTEGER,
+                                next_attempt REAL,
+                                error TEXT)''')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS review_pages (
+                                name TEXT,
+                                page INTEGER,
+                                columns TEXT,
+                                PRIMARY KEY (name, page))''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS movies_due ON movies (status, next_attempt)')
+        self._conn.commit()
+
+    def add(self, movie_names: Iterable[str]) -> int:
+        """Add movies to the frontier; known movies are skipped
+
+        Parameters
+        ----------
+        movie_names : iterable of str
+            movie names to scrape RT for
+
+        Returns
+        -------
+        int
+            number of movies added
+        """
+
+        with self._lock:
+            position = self._conn.execute('SELECT COALESCE(MAX(position), -1) FROM movies').fetchone()[0]
+            added = 0
+            for name in movie_names:
+                cursor = self._conn.execute('INSERT OR IGNORE INTO movies (name, position, status, attempts, '
+                                            'next_attempt) VALUES (?, ?, ?, 0, 0)',
+                                            (name, position + 1, 'pending'))
+                if cursor.rowcount > 0:
+                    position += 1
+                    added += 1
+            self._conn.commit()
+        return added
+
+    def add_year(self, year: int) -> int:
+        """Add the movies of a wikipedia 'year in film' page
+
+        Parameters
+        ----------
+        year : int
+            year to scrape movie titles from
+
+        Returns
+        -------
+        int
+            number of movies added
+        """
+
+        return self.add(scrape_movie_names(year))
+
+    def run(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+            backoff: float = DEFAULT_RETRY_BACKOFF, wait: bool = True) -> Dict[str, int]:
+        """Scrape the frontier until it is empty
+        Movies are scraped in the order they were added. A movie that
+        fails is retried after backoff * 2 ** (attempts - 1) seconds
+        and marked failed after max_attempts attempts. Stopping at any
+        point loses at most the page being scraped.
+
+        Parameters
+        ----------
+        max_attempts : int
+            attempts per movie before it is marked failed
+        backoff : float
+            seconds before the first retry
+        wait : boolean
+            sleep until retries are due; otherwise return when only
+            movies waiting for a retry are left
+
+        Returns
+        -------
+        dict
+            progress when the run stopped; see progress
+        """
+
+        while True:
+            with self._lock:
+                row = self._conn.execute('SELECT name FROM movies WHERE status = ? AND next_attempt <= ? '
+                                         'ORDER BY position LIMIT 1',
+                                         ('pending', time.time())).fetchone()
+                if row is None:
+                    due = self._conn.execute('SELECT MIN(next_attempt) FROM movies WHERE status = ?',
+                                             ('pending',)).fetchone()[0]
+            if row is None:
+                if due is None or not wait:
+                    break
+                time.sleep(max(0.0, due - time.time()))
+                continue
+
+            name = row[0]
+            try:
+                self._crawl_movie(name)
+            except Exception as e:
+                self._fail(name, e, max_attempts, backoff)
+        return self.progress()
+
+    def _crawl_movie(self, name: str) -> None:
+        """Scrape the pages of a movie that are not checkpointed yet
+
+        Parameters
+        ----------
+        name : str
+            movie name to scrape RT for
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            url, pages = self._conn.execute('SELECT url, pages FROM movies WHERE name = ?',
+                                            (name,)).fetchone()
+            done = {page for (page,) in self._conn.execute('SELECT page FROM review_pages '
+                                                           'WHERE name = ?', (name,))}
+
+        if url is None:
+            url, r, main_html = _fetch_main_page(name)
+            if url is None:
+                raise Exception('no page found for ' + name)
+            if main_html == '':
+                # redirected too many times; retried, not stored
+                raise Exception('unable to download ' + url)
+            main_info = _parse_response(url, r, 'main', _parse_main_page, main_html)
+            self._checkpoint('UPDATE movies SET url = ?, main_info = ? WHERE name = ?',
+                             (url, json.dumps(main_info), name))
+
+        if pages is None:
+            # the page count comes from review page 1
+            first = _get_response(url + "reviews")
+            first_html = _page_text(first)
+            if first_html == '':
+                raise Exception('unable to download ' + url + 'reviews')
+            num_pages = _get_num_pages(first_html)
+            pages = int(num_pages) if num_pages is not None else 0
+            if pages > 0:
+                self._store_page(name, 1, _parse_response(url + "reviews", first, 'review',
+                                                          _get_critic_reviews_from_page,
+                                                          first_html))
+                done.add(1)
+            self._checkpoint('UPDATE movies SET pages = ? WHERE name = ?', (pages, name))
+
+        for page_num in range(1, pages + 1):
+            if page_num not in done:
+                page_url = _review_page_url(url, page_num)
+                r = _get_response(page_url)
+                html = _page_text(r)
+                if html == '':
+                    raise Exception('unable to download ' + page_url)
+                self._store_page(name, page_num, _parse_response(page_url, r, 'review',
+                                                                 _get_critic_reviews_from_page,
+                                                                 html))
+
+        self._checkpoint('UPDATE movies SET status = ?, error = NULL WHERE name = ?', ('done', name))
+        logger.info('done scraping %s', name, extra={'movie': name, 'url': url, 'pages': pages})
+
+    def _store_page(self, name: str, page_num: int, columns) -> None:
+        """Checkpoint one parsed review page
+
+        Parameters
+        ----------
+        name : str
+            movie name
+        page_num : int
+            review page number
+        columns : list
+            list of lists as returned by _get_critic_reviews_from_page
+
+        Returns
+        -------
+        None
+        """
+
+        self._checkpoint('INSERT OR REPLACE INTO review_pages VALUES (?, ?, ?)',
+                         (name, page_num, json.dumps(columns)))
+
+    def _checkpoint(self, sql: str, params: Tuple) -> None:
+        """Run one statement and commit it
+
+        Parameters
+        ----------
+        sql : str
+            statement to run
+        params : tuple
+            parameters of the statement
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _fail(self, name: str, error: Exception, max_attempts: int, backoff: float) -> None:
+        """Record a failed attempt; schedule a retry or mark failed
+
+        Parameters
+        ----------
+        name : str
+            movie name
+        error : Exception
+            why the attempt failed
+        max_attempts : int
+            attempts per movie before it is marked failed
+        backoff : float
+            seconds before the first retry
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            attempts, url = self._conn.execute('SELECT attempts, url FROM movies WHERE name = ?',
+                                               (name,)).fetchone()
+            attempts += 1
+            status = 'failed' if attempts >= max_attempts else 'pending'
+            next_attempt = time.time() + backoff * 2 ** (attempts - 1)
+            self._conn.execute('UPDATE movies SET status = ?, attempts = ?, next_attempt = ?, error = ? '
+                               'WHERE name = ?', (status, attempts, next_attempt, str(error), name))
+            self._conn.commit()
+        if url is None:
+            # resolve the movie again on the retry instead of
+            # recalling that it was not found
+            _forget(_resolve_key(name))
+        logger.warning('unable to scrape %s: %s', name, error,
+                       extra={'movie': name, 'status': status})
+
+    def progress(self) -> Dict[str, int]:
+        """Count movies by status
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            counts keyed by 'pending', 'done' and 'failed'
+        """
+
+        counts = {'pending': 0, 'done': 0, 'failed': 0}
+        with self._lock:
+            for status, n in self._conn.execute('SELECT status, COUNT(*) FROM movies GROUP BY status'):
+                counts[status] = n
+        return counts
+
+    def results(self) -> Iterator[Tuple[str, Dict, ReviewTable]]:
+        """Yield the scraped movies in the order they were added
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        generator
+            yields tuples of (movie name, main info dict, ReviewTable);
+            the table is None if there were no review pages
+        """
+
+        with self._lock:
+            rows = self._conn.execute('SELECT name, main_info, pages FROM movies WHERE status = ? '
+                                      'ORDER BY position', ('done',)).fetchall()
+        for name, main_info, pages in rows:
+            if pages == 0:
+                critic_reviews = None
+            else:
+                critic_reviews = ReviewTable()
+                with self._lock:
+                    page_rows = self._conn.execute('SELECT columns FROM review_pages WHERE name = ? '
+                                                   'ORDER BY page', (name,)).fetchall()
+                for (columns,) in page_rows:
+                    critic_reviews.extend(json.loads(columns))
+            yield name, json.loads(main_info), critic_reviews
+
+    def failures(self) -> Iterator[Tuple[str, int, str]]:
+        """Yield the movies that ran out of attempts
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        generator
+            yields tuples of (movie name, attempts, last error)
+        """
+
+        with self._lock:
+            rows = self._conn.execute('SELECT name, attempts, error FROM movies WHERE status = ? '
+                                      'ORDER BY position', ('failed',)).fetchall()
+        yield from rows
+
+    def retry_failed(self) -> int:
+        """Put failed movies back in the frontier with fresh attempts
+        Pages they already scraped are kept; movies that were not
+        found are resolved again.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            number of movies put back
+        """
+
+        with self._lock:
+            unresolved = [name for (name,) in self._conn.execute('SELECT name FROM movies '
+                                                                 'WHERE status = ? AND url IS NULL',
+                                                                 ('failed',))]
+            cursor = self._conn.execute('UPDATE movies SET status = ?, attempts = 0, next_attempt = 0 '
+                                        'WHERE status = ?', ('pending', 'failed'))
+            self._conn.commit()
+        for name in unresolved:
+            _forget(_resolve_key(name))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the database
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,146 @@
+"""log.py
+
+This file contains the logging setup of the package.
+
+Every module logs to a child of the 'tomatopy' logger with structured
+fields passed as `extra`, e.g. extra={'movie': name, 'url': url}.
+Messages use %-style arguments, so nothing is formatted for levels
+that are disabled. The package logs nothing unless the application
+configures logging or verbose mode is on.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _fields - gets the structured fields set on a log record
+    * _verbose_handler - builds the handler used by verbose mode
+
+"""
+
+# base
+import json
+import logging
+import sys
+from typing import Dict
+
+#==========
+# constants
+#==========
+
+LOGGER_NAME = 'tomatopy'
+
+# structured fields the formatters know; in output order
+FIELDS = ('movie', 'url', 'page', 'pages', 'count', 'status', 'elapsed_ms')
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.addHandler(logging.NullHandler())
+
+#==================
+# interal functions
+#==================
+
+def _fields(record: logging.LogRecord) -> Dict:
+    """Get the structured fields set on a log record
+
+    Parameters
+    ----------
+    record : logging.LogRecord
+        record to read
+
+    Returns
+    -------
+    dict
+        fields of FIELDS set on the record, in FIELDS order
+    """
+
+    return {k: getattr(record, k) for k in FIELDS if hasattr(record, k)}
+
+def _verbose_handler() -> logging.Handler:
+    """Build the handler used by verbose mode
+    Writes key=value formatted records to stdout, where verbose mode
+    has always written.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    logging.Handler
+        handler for the 'tomatopy' logger
+    """
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(KeyValueFormatter('%(levelname)s %(name)s: %(message)s'))
+    return handler
+
+#========
+# classes
+#========
+
+class KeyValueFormatter(logging.Formatter):
+    """
+    Formats a record and appends its structured fields as key=value
+
+    ...
+
+    Methods
+    -------
+    format(record)
+        Formats the record; fields follow the message
+
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record; fields follow the message
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            record to format
+
+        Returns
+        -------
+        str
+            e.g. 'INFO tomatopy.scraper: done movie=X2 elapsed_ms=812'
+        """
+
+        text = super().format(record)
+        fields = _fields(record)
+        if len(fields) == 0:
+            return text
+        return text + ' ' + ' '.join('{}={}'.format(k, v) for k, v in fields.items())
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line for log pipelines
+
+    ...
+
+    Methods
+    -------
+    format(record)
+        Formats the record as JSON with its structured fields
+
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record as JSON with its structured fields
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            record to format
+
+        Returns
+        -------
+        str
+            JSON object with time, level, logger, message and fields
+        """
+
+        doc = {'time': record.created, 'level': record.levelname,
+               'logger': record.name, 'message': record.getMessage()}
+        doc.update(_fields(record))
+        if record.exc_info:
+            doc['exc'] = self.formatException(record.exc_info)
+        return json.dumps(doc, default=str)
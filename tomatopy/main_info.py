@@ -7,18 +7,33 @@ This file requires no packages.
 
 This file contains the following functions:
 
+    * _parse_main_page - parses info from main page html
+      with the selected parser backend
+    * _parse_main_page_regex - regex parser backend for main pages
     * get_main_page_info - scrapes info from a movie main page
+    * get_movie_info - scrapes a typed MovieInfo from a movie main page
 
 """
 
 # base
+import logging
 import re
 from typing import Dict, List
 
 # this package
-from .util import _make_soup
+from .util import _get_parsed_page
 from .util import _build_url
-from .util import get_verbose_setting
+from .util import get_parser_backend
+from .util import _record, _field_timer, _memo_parse
+from .records import MovieInfo
+
+# optional fast parser backend
+try:
+    from .parsers import _parse_main_page_lxml
+except ImportError:
+    _parse_main_page_lxml = None
+
+logger = logging.getLogger(__name__)
 
 # regex patterns
 # run once on import
@@ -33,6 +48,170 @@ boxOff_pat = re.compile(r'Box Office: </div>[\sa-z\<\=\"\-\>]+.?[\d,]+')
 rt_pat = re.compile(r'Runtime: </div>[\sa-zA-Z\d\<\=\"\-\>]+minutes')
 studio_pat = re.compile(r'Studio: </div>[\sa-zA-Z\d\<\=\"\-\>\:\/\.]+a>\s+</div>')   
 
+#==================
+# interal functions
+#==================
+
+def _parse_main_page(info_html: str) -> Dict[str, List]:
+    """Parses info from the html of a movie main page
+    using the backend set by `set_parser_backend`
+
+    Parameters
+    ----------
+    info_html : str
+        html content of a movie main page
+
+    Returns
+    -------
+    dict
+        dict of scraped info with keys:
+        synopsis, rating, genre, studio, director, writer, currency,
+        box_office, runtime
+    """
+    
+    backend = get_parser_backend()
+    parse = _parse_main_page_lxml if backend == 'lxml' else _parse_main_page_regex
+    return _memo_parse('main', backend, info_html, parse)
+
+def _parse_main_page_regex(info_html: str) -> Dict[str, List]:
+    """Parses info from the html of a movie main page with regexes
+
+    Parameters
+    ----------
+    info_html : str
+        html content of a movie main page
+
+    Returns
+    -------
+    dict
+        dict of scraped info with keys:
+        synopsis, rating, genre, studio, director, writer, currency,
+        box_office, runtime
+    """
+    
+    info = dict()
+    timer = _field_timer()
+    
+    ### eat soup ###
+    
+    # get synopsis
+    match = re.findall(movieSyn_pat, info_html)
+    if len(match) > 0:
+        match = match[0].split('>')[-1].strip()
+        info['synopsis'] = match
+    else:
+        info['synopsis'] = None
+    
+    timer.mark('synopsis')
+    
+    # get rating
+    match = re.findall(rating_pat, info_html)
+    if len(match) > 0:
+        match = match[0].split('>')[-1]
+        info['rating'] = match
+    else:
+        info['rating'] = None
+    
+    timer.mark('rating')
+    
+    # get genre
+    match = re.findall(genres_pat, info_html)
+    if len(match) > 0:
+        match = match[0].replace('&amp;','and').split('>')
+        genre = list()
+        for g in match:
+            if '</a' in g:
+                genre.append(g.replace('</a','').rstrip().lstrip())
+        info['genre'] = '|'.join(genre)
+    else:
+        info['genre'] = None
+    
+    timer.mark('genre')
+    
+    # get director
+    match = re.findall(dir_pat, info_html)
+    if len(match) > 0:
+        match = match[0].replace('&amp;','and').split('>')
+        director = list()
+        for d in match:
+            if '</a' in d:
+                director.append(d.replace('</a',''))
+        info['director'] = '|'.join(director)
+    else:
+        info['director'] = None
+    
+    timer.mark('director')
+    
+    # get director
+    match = re.findall(wrt_pat, info_html)
+    if len(match) > 0:
+        match = match[0].replace('&amp;','and').split('>')
+        writer = list()
+        for w in match:
+            if '</a' in w:
+                writer.append(w.replace('</a',''))
+        info['writer'] = '|'.join(writer)
+    else:
+        info['writer'] = None
+    
+    timer.mark('writer')
+    
+    # get dates
+    match = re.findall(date_pat, info_html)
+    if len(match) > 0:
+        match = re.findall(date2_pat, match[0])
+        if len(match) == 2:
+            info['theater_date'] = match[0]
+            info['dvd_date'] = match[1]
+        else:
+            #match failed
+            info['theater_date'] = None
+            info['dvd_date'] = None
+    else:
+        info['theater_date'] = None
+        info['dvd_date'] = None
+    
+    timer.mark('dates')
+    
+    # get box_office
+    match = re.findall(boxOff_pat, info_html)
+    if len(match) > 0:
+        info['currency'] = match[0].split('>')[-1][0]
+        info['box_office'] = match[0].split('>')[-1][1:]
+    else:
+        info['currency'] = None
+        info['box_office'] = None
+    
+    timer.mark('box_office')
+    
+    # get runtime
+    match = re.findall(rt_pat, info_html)
+    if len(match) > 0:
+        info['runtime'] = match[0].split('\n')[-1].strip()
+    else:
+        info['runtime'] = None
+    
+    timer.mark('runtime')
+    
+    # get studio
+    match = re.findall(studio_pat, info_html)
+    if len(match) > 0:
+        match = match[0].split('">')
+        studio = list()
+        for s in match:
+            if '</a>' in s:
+                studio.append(s.replace('</a>','').replace('</div>','').strip())
+        info['studio'] = '|'.join(studio)
+    else:
+        info['studio'] = None
+    
+    timer.mark('studio')
+    
+    # TODO: add cast scraper
+    
+    timer.done(_record, page='main')
+    return info
+
 #===============
 # user functions
 #===============
@@ -53,122 +232,29 @@ def get_main_page_info(page: str) -> Dict[str, List]:
         box_office, runtime
     """
     
-    info = dict()   
+    logger.debug('scraping main page %s', page, extra={'url': page})
     
-    # verbose option
-    if get_verbose_setting():
-        print('scraping main page')
-        print('scraping url: ' + page)
-    
-    # make soup
-    soup = _make_soup(page)
+    # get page; no tree is needed by the regexes. An unchanged page
+    # is not parsed again
+    # return None when failed soup; None is easy to detect
+    return _get_parsed_page(page, 'main',
+                            lambda info_html: _parse_main_page(info_html) if info_html != '' else None)
+
+def get_movie_info(page: str) -> MovieInfo:
+    """Scrapes a typed MovieInfo from a movie main page
+
+    Parameters
+    ----------
+    page : str
+        The url to scrape from RT
+
+    Returns
+    -------
+    MovieInfo
+        typed main page info; None if the page failed
+    """
     
-    if soup == '':
-        # return None when failed soup; None is easy to detect
+    info = get_main_page_info(page)
+    if info is None:
         return None
-        
-    else:
-        # prepare soup
-        # ignore steping through tree due to instability
-        info_html = str(soup)
-        
-        ### eat soup ###
-        
-        # get synopsis
-        match = re.findall(movieSyn_pat, info_html)
-        if len(match) > 0:
-            match = match[0].split('>')[-1].strip()
-            info['synopsis'] = match
-        else:
-            info['synopsis'] = None
-        
-        # get rating
-        match = re.findall(rating_pat, info_html)
-        if len(match) > 0:
-            match = match[0].split('>')[-1]
-            info['rating'] = match
-        else:
-            info['rating'] = None
-        
-        # get genre
-        match = re.findall(genres_pat, info_html)
-        if len(match) > 0:
-            match = match[0].replace('&amp;','and').split('>')
-            genre = list()
-            for g in match:
-                if '</a' in g:
-                    genre.append(g.replace('</a','').rstrip().lstrip())
-            info['genre'] = '|'.join(genre)
-        else:
-            info['genre'] = None
-        
-        # get director
-        match = re.findall(dir_pat, info_html)
-        if len(match) > 0:
-            match = match[0].replace('&amp;','and').split('>')
-            director = list()
-            for d in match:
-                if '</a' in d:
-                    director.append(d.replace('</a',''))
-            info['director'] = '|'.join(director)
-        else:
-            info['director'] = None
-        
-        # get director
-        match = re.findall(wrt_pat, info_html)
-        if len(match) > 0:
-            match = match[0].replace('&amp;','and').split('>')
-            writer = list()
-            for w in match:
-                if '</a' in w:
-                    writer.append(w.replace('</a',''))
-            info['writer'] = '|'.join(writer)
-        else:
-            info['writer'] = None
-        
-        # get dates
-        match = re.findall(date_pat, info_html)
-        if len(match) > 0:
-            match = re.findall(date2_pat, match[0])
-            if len(match) == 2:
-                info['theater_date'] = match[0]
-                info['dvd_date'] = match[1]
-            else:
-                #match failed
-                info['theater_date'] = None
-                info['dvd_date'] = None
-        else:
-            info['theater_date'] = None
-            info['dvd_date'] = None
-        
-        # get box_office
-        match = re.findall(boxOff_pat, info_html)
-        if len(match) > 0:
-            info['currency'] = match[0].split('>')[-1][0]
-            info['box_office'] = match[0].split('>')[-1][1:]
-        else:
-            info['currency'] = None
-            info['box_office'] = None
-        
-        # get runtime
-        match = re.findall(rt_pat, info_html)
-        if len(match) > 0:
-            info['runtime'] = match[0].split('\n')[-1].strip()
-        else:
-            info['runtime'] = None
-        
-        # get studio
-        match = re.findall(studio_pat, info_html)
-        if len(match) > 0:
-            match = match[0].split('">')
-            studio = list()
-            for s in match:
-                if '</a>' in s:
-                    studio.append(s.replace('</a>','').replace('</div>','').strip())
-            info['studio'] = '|'.join(studio)
-        else:
-            info['studio'] = None
-        
-        # TODO: add cast scraper
-        
-        return info
\ No newline at end of file
+    return MovieInfo.from_dict(info)
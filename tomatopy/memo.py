@@ -0,0 +1,340 @@
+"""memo.py
+
+This file contains the memo of parsed pages keyed by a hash of their
+html, so a page body that was parsed before is not parsed again,
+whatever url or archive it came from.
+
+Keys include the parser backend and PARSER_VERSION; bumping the
+version when a parser changes makes every older result unreachable,
+and they are deleted from the on-disk memo when it is opened.
+
+This file requires no packages. Hashing uses `xxhash` when it is
+installed and blake2b otherwise.
+
+This file contains the following functions:
+
+    * _hash - hashes a page body
+    * _copy - copies a parsed result for the caller
+
+"""
+
+# base
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict
+
+# optional faster hash
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+#==========
+# constants
+#==========
+
+# bump when a parser returns anything different for the same page;
+# results parsed by older versions are then parsed again
+PARSER_VERSION = 1
+
+# parsed pages kept in memory
+DEFAULT_MEMO_ENTRIES = 4096
+
+#==================
+# interal functions
+#==================
+
+def _hash(page: str) -> str:
+    """Hash a page body
+
+    Parameters
+    ----------
+    page : str
+        html of the page
+
+    Returns
+    -------
+    str
+        128 bit hex digest
+    """
+
+    data = page.encode('utf-8', 'surrogatepass')
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _copy(result):
+    """Copy a parsed result for the caller
+    Callers may change what they get; the memo keeps its own copy.
+
+    Parameters
+    ----------
+    result : dict or list
+        main info dict or list of review columns
+
+    Returns
+    -------
+    dict or list
+        shallow copy; the strings are shared
+    """
+
+    if isinstance(result, dict):
+        return dict(result)
+    if isinstance(result, list):
+        return [list(column) for column in result]
+    return result
+
+#========
+# classes
+#========
+
+class ParseMemo():
+    """
+    A bounded in-memory LRU of parsed pages, optionally backed by SQLite
+
+    ...
+
+    Attributes
+    ----------
+    max_entries : int
+        parsed pages kept in memory
+    path : str
+        location of the SQLite database; None for memory only
+    hits : int
+        lookups answered by the memo
+    misses : int
+        lookups that needed a parse
+
+    Methods
+    -------
+    key(kind, backend, page)
+        Builds the key of a page
+    get(key)
+        Gets a parsed result
+    put(key, result)
+        Stores a parsed result
+    clear
+        Removes all parsed results
+    info
+        Gets entry count and hit/miss counters
+    close
+        Closes the database
+
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_ENTRIES, path: str = None) -> None:
+        """Init memo; create the database if needed and drop
+        results of other parser versions
+
+        Parameters
+        ----------
+        self : self
+        max_entries : int
+            parsed pages kept in memory
+        path : str
+            location of the SQLite database; None for memory only
+
+        Returns
+        -------
+        None
+        """
+
+        if max_entries <= 0:
+            raise Exception('Argument `max_entries` must be greater than 0. \
+            The input value was {}'.format(max_entries))
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._conn = None
+        self._pid = None
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory != '' and not os.path.isdir(directory):
+                os.makedirs(directory)
+            conn = self._connection()
+            conn.execute('''CREATE TABLE IF NOT EXISTS parsed (
+                              key TEXT PRIMARY KEY,
+                              version INTEGER,
+                              result TEXT)''')
+            conn.execute('DELETE FROM parsed WHERE version != ?', (PARSER_VERSION,))
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the database connection of this process
+        A parser process forked with the memo opens its own.
+        Must be called with the lock held, or from __init__.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        sqlite3.Connection
+            connection to path
+        """
+
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._pid = os.getpid()
+        return self._conn
+
+    def key(self, kind: str, backend: str, page: str) -> str:
+        """Build the key of a page
+
+        Parameters
+        ----------
+        kind : str
+            'main' or 'review'
+        backend : str
+            parser backend that parses the page
+        page : str
+            html of the page
+
+        Returns
+        -------
+        str
+            key of the parsed result
+        """
+
+        return '{}/{}/{}/{}'.format(kind, backend, PARSER_VERSION, _hash(page))
+
+    def get(self, key: str):
+        """Get a parsed result
+
+        Parameters
+        ----------
+        key : str
+            key from `key`
+
+        Returns
+        -------
+        boolean
+            True when the result is memoized
+        dict or list
+            copy of the result; None when not memoized
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, _copy(self._entries[key])
+            row = None
+            if self.path is not None:
+                row = self._connection().execute('SELECT result FROM parsed WHERE key = ?',
+                                                 (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            result = json.loads(row[0])
+            self._remember(key, result)
+        return True, _copy(result)
+
+    def put(self, key: str, result) -> None:
+        """Store a parsed result
+
+        Parameters
+        ----------
+        key : str
+            key from `key`
+        result : dict or list
+            parsed result; the memo keeps a copy
+
+        Returns
+        -------
+        None
+        """
+
+        result = _copy(result)
+        with self._lock:
+            self._remember(key, result)
+            if self.path is not None:
+                conn = self._connection()
+                conn.execute('INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)',
+                             (key, PARSER_VERSION, json.dumps(result)))
+                conn.commit()
+
+    def _remember(self, key: str, result) -> None:
+        """Keep a result in memory; drop the least recently used
+        Must be called with the lock held.
+
+        Parameters
+        ----------
+        key : str
+            key from `key`
+        result : dict or list
+            parsed result
+
+        Returns
+        -------
+        None
+        """
+
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all parsed results, in memory and on disk
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._entries.clear()
+            if self.path is not None:
+                conn = self._connection()
+                conn.execute('DELETE FROM parsed')
+                conn.commit()
+
+    def info(self) -> Dict:
+        """Get the state of the memo
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict with keys: path, entries, max_entries, hits, misses
+        """
+
+        with self._lock:
+            entries = len(self._entries)
+        return {'path': self.path, 'entries': entries, 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        """Close the database
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
@@ -0,0 +1,436 @@
+"""metrics.py
+
+This file contains the counters and timing histograms recorded by the
+instrumented stages: fetch, throttle, cache, parse and per-field
+extraction.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _key - builds the key of a metric from its name and labels
+    * _format_labels - formats labels for the Prometheus text format
+
+"""
+
+# base
+import json
+import threading
+import time
+from typing import Dict, Tuple
+
+#==========
+# constants
+#==========
+
+# upper bounds of the histogram buckets in seconds; the last bucket
+# is unbounded
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+#==================
+# interal functions
+#==================
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple:
+    """Build the key of a metric from its name and labels
+
+    Parameters
+    ----------
+    name : str
+        metric name, e.g. 'fetch.total'
+    labels : dict
+        label values, e.g. {'host': 'www.rottentomatoes.com'}
+
+    Returns
+    -------
+    tuple
+        (name, sorted label items)
+    """
+
+    return (name, tuple(sorted(labels.items())))
+
+def _format_labels(labels: Tuple, extra: str = '') -> str:
+    """Format labels for the Prometheus text format
+
+    Parameters
+    ----------
+    labels : tuple
+        sorted label items
+    extra : str
+        already formatted label appended last, e.g. 'le="0.1"'
+
+    Returns
+    -------
+    str
+        '{k="v",...}'; '' when there are no labels
+    """
+
+    parts = ['{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+             for k, v in labels]
+    if extra != '':
+        parts.append(extra)
+    if len(parts) == 0:
+        return ''
+    return '{' + ','.join(parts) + '}'
+
+#========
+# classes
+#========
+
+class Metrics():
+    """
+    Thread-safe counters and timing histograms
+
+    ...
+
+    Attributes
+    ----------
+    buckets : tuple
+        upper bounds of the histogram buckets in seconds
+    last_batch : dict
+        snapshot of what the last scrape_many batch recorded
+
+    Methods
+    -------
+    inc(name, value, **labels)
+        Adds to a counter
+    observe(name, seconds, **labels)
+        Records a timing in a histogram
+    snapshot
+        Gets the recorded values as plain data
+    merge(snapshot)
+        Adds the values of a snapshot, e.g. from a parser process
+    diff(snapshot, since)
+        Gets what was recorded between two snapshots
+    reset
+        Removes all recorded values
+    to_json
+        Exports the recorded values as JSON
+    to_prometheus
+        Exports the recorded values in the Prometheus text format
+    summary(snapshot)
+        Formats a report of where the time went
+
+    """
+
+    def __init__(self, buckets: Tuple[float] = DEFAULT_BUCKETS) -> None:
+        """Init metrics; nothing recorded
+
+        Parameters
+        ----------
+        self : self
+        buckets : tuple
+            upper bounds of the histogram buckets in seconds
+
+        Returns
+        -------
+        None
+        """
+
+        self.buckets = tuple(buckets)
+        self.last_batch = None
+        self._lock = threading.Lock()
+        # key -> value
+        self._counters = dict()
+        # key -> [bucket counts, sum, count, max]
+        self._histograms = dict()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Add to a counter
+
+        Parameters
+        ----------
+        name : str
+            counter name, e.g. 'requests'
+        value : float
+            amount to add
+        labels : str
+            label values of the counter
+
+        Returns
+        -------
+        None
+        """
+
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record a timing in a histogram
+
+        Parameters
+        ----------
+        name : str
+            histogram name, e.g. 'fetch.total'
+        seconds : float
+            the timing
+        labels : str
+            label values of the histogram
+
+        Returns
+        -------
+        None
+        """
+
+        key = _key(name, labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+                self._histograms[key] = histogram
+            histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            if seconds > histogram[3]:
+                histogram[3] = seconds
+
+    def snapshot(self) -> Dict:
+        """Get the recorded values as plain data
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            'counters': list of {'name', 'labels', 'value'};
+            'histograms': list of {'name', 'labels', 'buckets',
+            'sum', 'count', 'max'}
+        """
+
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in self._counters.items()]
+            histograms = [{'name': name, 'labels': dict(labels), 'buckets': list(h[0]),
+                           'sum': h[1], 'count': h[2], 'max': h[3]}
+                          for (name, labels), h in self._histograms.items()]
+        return {'counters': counters, 'histograms': histograms}
+
+    def merge(self, snapshot: Dict) -> None:
+        """Add the values of a snapshot, e.g. from a parser process
+
+        Parameters
+        ----------
+        snapshot : dict
+            snapshot of a Metrics with the same buckets
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            for c in snapshot['counters']:
+                key = _key(c['name'], c['labels'])
+                self._counters[key] = self._counters.get(key, 0) + c['value']
+            for h in snapshot['histograms']:
+                key = _key(h['name'], h['labels'])
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+                    self._histograms[key] = histogram
+                for i, n in enumerate(h['buckets']):
+                    histogram[0][i] += n
+                histogram[1] += h['sum']
+                histogram[2] += h['count']
+                histogram[3] = max(histogram[3], h['max'])
+
+    @staticmethod
+    def diff(snapshot: Dict, since: Dict) -> Dict:
+        """Get what was recorded between two snapshots
+        Histogram maxima cannot be subtracted; the later one is kept.
+
+        Parameters
+        ----------
+        snapshot : dict
+            the later snapshot
+        since : dict
+            the earlier snapshot
+
+        Returns
+        -------
+        dict
+            snapshot of the values recorded in between
+        """
+
+        old_counters = {_key(c['name'], c['labels']): c['value'] for c in since['counters']}
+        old_histograms = {_key(h['name'], h['labels']): h for h in since['histograms']}
+        counters = list()
+        for c in snapshot['counters']:
+            value = c['value'] - old_counters.get(_key(c['name'], c['labels']), 0)
+            if value != 0:
+                counters.append(dict(c, value=value))
+        histograms = list()
+        for h in snapshot['histograms']:
+            old = old_histograms.get(_key(h['name'], h['labels']))
+            if old is None:
+                histograms.append(dict(h))
+            elif h['count'] > old['count']:
+                histograms.append(dict(h, buckets=[n - o for n, o in zip(h['buckets'], old['buckets'])],
+                                       sum=h['sum'] - old['sum'], count=h['count'] - old['count']))
+        return {'counters': counters, 'histograms': histograms}
+
+    def reset(self) -> None:
+        """Remove all recorded values
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.last_batch = None
+
+    def to_json(self) -> str:
+        """Export the recorded values as JSON; see snapshot
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str
+            JSON document of the snapshot
+        """
+
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix: str = 'tomatopy_') -> str:
+        """Export the recorded values in the Prometheus text format
+        Dots in names become underscores; histograms are in seconds.
+
+        Parameters
+        ----------
+        prefix : str
+            prepended to every metric name
+
+        Returns
+        -------
+        str
+            text exposition of all metrics
+        """
+
+        snapshot = self.snapshot()
+        lines = list()
+        typed = set()
+        for c in sorted(snapshot['counters'], key=lambda c: c['name']):
+            name = prefix + c['name'].replace('.', '_') + '_total'
+            if name not in typed:
+                lines.append('# TYPE {} counter'.format(name))
+                typed.add(name)
+            labels = tuple(sorted(c['labels'].items()))
+            lines.append('{}{} {}'.format(name, _format_labels(labels), c['value']))
+        for h in sorted(snapshot['histograms'], key=lambda h: h['name']):
+            name = prefix + h['name'].replace('.', '_') + '_seconds'
+            if name not in typed:
+                lines.append('# TYPE {} histogram'.format(name))
+                typed.add(name)
+            labels = tuple(sorted(h['labels'].items()))
+            cumulative = 0
+            for bound, n in zip(list(self.buckets) + ['+Inf'], h['buckets']):
+                cumulative += n
+                le = 'le="{}"'.format(bound)
+                lines.append('{}_bucket{} {}'.format(name, _format_labels(labels, le), cumulative))
+            lines.append('{}_sum{} {}'.format(name, _format_labels(labels), h['sum']))
+            lines.append('{}_count{} {}'.format(name, _format_labels(labels), h['count']))
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, snapshot: Dict = None) -> str:
+        """Format a report of where the time went
+        Timings are listed by total time, largest first.
+
+        Parameters
+        ----------
+        snapshot : dict
+            values to report, e.g. last_batch; all recorded
+            values when None
+
+        Returns
+        -------
+        str
+            multi-line report
+        """
+
+        if snapshot is None:
+            snapshot = self.snapshot()
+        lines = ['{:<44}{:>8}{:>11}{:>11}{:>11}'.format('timing', 'count', 'total s',
+                                                     'mean ms', 'max ms')]
+        for h in sorted(snapshot['histograms'], key=lambda h: -h['sum']):
+            label = h['name'] + ''.join(' ' + str(v) for _, v in sorted(h['labels'].items()))
+            mean = h['sum'] / h['count'] * 1000 if h['count'] > 0 else 0.0
+            lines.append('{:<44}{:>8}{:>11.3f}{:>11.3f}{:>11.3f}'.format(
+                label[:43], h['count'], h['sum'], mean, h['max'] * 1000))
+        lines.append('{:<44}{:>8}'.format('counter', 'value'))
+        for c in sorted(snapshot['counters'], key=lambda c: c['name']):
+            label = c['name'] + ''.join(' ' + str(v) for _, v in sorted(c['labels'].items()))
+            lines.append('{:<44}{:>8g}'.format(label[:43], c['value']))
+        return '\n'.join(lines)
+
+class _FieldTimer():
+    """
+    Accumulates per-field extraction time of one page
+
+    Call mark after each field; the time since the previous mark is
+    added to that field. done records one timing per field.
+
+    ...
+
+    Methods
+    -------
+    mark(field)
+        Adds the time since the previous mark to field
+    restart
+        Starts timing again without adding to a field
+    done(record, **labels)
+        Records the accumulated time of every field
+
+    """
+
+    def __init__(self) -> None:
+        self._fields = dict()
+        self._last = time.perf_counter()
+
+    def mark(self, field: str) -> None:
+        now = time.perf_counter()
+        self._fields[field] = self._fields.get(field, 0.0) + now - self._last
+        self._last = now
+
+    def restart(self) -> None:
+        self._last = time.perf_counter()
+
+    def done(self, record, **labels) -> None:
+        for field, seconds in self._fields.items():
+            record('parse.field', seconds, field=field, **labels)
+
+class _NullTimer():
+    """
+    Per-field timer of a page parsed without instrumentation
+
+    Has the methods of _FieldTimer and does nothing, so parsers mark
+    their fields the same way whether or not anything is recorded.
+
+    """
+
+    def mark(self, field: str) -> None:
+        pass
+
+    def restart(self) -> None:
+        pass
+
+    def done(self, record, **labels) -> None:
+        pass
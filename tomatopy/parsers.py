@@ -0,0 +1,218 @@
+"""parsers.py
+
+This file contains the lxml parser backend. Each page is parsed once by
+lxml's C parser and every field is read with an XPath query on the tree,
+instead of one regex scan of the whole document per field.
+
+This file requires that `lxml` be installed within the Python
+environment you are running in.
+
+This file contains the following functions:
+
+    * _text - whitespace-normalized text of an element
+    * _meta_values - maps main page meta labels to their value elements
+    * _parse_main_page_lxml - parses info from main page html
+    * _parse_review_page_lxml - parses reviews from a review page
+
+"""
+
+# base
+import re
+from typing import Dict, List
+
+# requirements
+import lxml.etree
+import lxml.html
+
+# the first token of the rating, e.g. 'PG-13' of 'PG-13 (for violence)'
+rating_pat = re.compile(r'[A-Z\-\d]+')
+score_pat = re.compile(r'Original Score:\s*(\S+)')
+
+# xpath queries
+# compiled once on import
+meta_row_xp = lxml.etree.XPath('//li[contains(@class, "meta-row")]')
+meta_label_xp = lxml.etree.XPath('./div[contains(@class, "meta-label")]')
+meta_value_xp = lxml.etree.XPath('./div[contains(@class, "meta-value")]')
+synopsis_xp = lxml.etree.XPath('//*[@id="movieSynopsis"]')
+links_xp = lxml.etree.XPath('.//a')
+time_xp = lxml.etree.XPath('.//time')
+row_xp = lxml.etree.XPath('//div[contains(concat(" ", normalize-space(@class), " "), " review_table_row ")]')
+review_xp = lxml.etree.XPath('.//div[@class="the_review"]')
+score_xp = lxml.etree.XPath('.//div[contains(@class, "review-link")]')
+icon_xp = lxml.etree.XPath('.//div[contains(@class, "review_icon")]/@class')
+critic_xp = lxml.etree.XPath('.//a[contains(@href, "/critic/")]')
+top_critic_xp = lxml.etree.XPath('.//*[normalize-space(text()) = "Top Critic"]')
+publisher_xp = lxml.etree.XPath('.//em[contains(@class, "subtle")]')
+date_xp = lxml.etree.XPath('.//div[contains(@class, "review-date")]')
+
+#==================
+# interal functions
+#==================
+
+def _text(element) -> str:
+    """Get the whitespace-normalized text of an element
+
+    Parameters
+    ----------
+    element : lxml element
+        element to read
+
+    Returns
+    -------
+    str
+        text of the element and its children
+    """
+
+    return ' '.join(element.text_content().split())
+
+def _meta_values(tree) -> Dict:
+    """Map the meta labels of a main page to their value elements
+
+    Parameters
+    ----------
+    tree : lxml element
+        root of the main page
+
+    Returns
+    -------
+    dict
+        dict of label, e.g. 'Rating', to its meta-value element
+    """
+
+    values = dict()
+    for row in meta_row_xp(tree):
+        label = meta_label_xp(row)
+        value = meta_value_xp(row)
+        if len(label) > 0 and len(value) > 0:
+            values[_text(label[0]).rstrip(':')] = value[0]
+    return values
+
+def _parse_main_page_lxml(info_html: str) -> Dict[str, List]:
+    """Parses info from the html of a movie main page
+
+    Parameters
+    ----------
+    info_html : str
+        html content of a movie main page
+
+    Returns
+    -------
+    dict
+        dict of scraped info with keys:
+        synopsis, rating, genre, studio, director, writer, currency,
+        box_office, runtime
+    """
+
+    tree = lxml.html.fromstring(info_html)
+    meta = _meta_values(tree)
+    info = dict()
+
+    # get synopsis
+    match = synopsis_xp(tree)
+    info['synopsis'] = _text(match[0]) if len(match) > 0 else None
+
+    # get rating
+    match = None
+    if 'Rating' in meta:
+        match = rating_pat.search(_text(meta['Rating']))
+    info['rating'] = match.group(0) if match is not None else None
+
+    # get linked names
+    for key, label in [('genre', 'Genre'), ('director', 'Directed By'),
+                       ('writer', 'Written By')]:
+        if label in meta:
+            names = [_text(a).replace('&', 'and') for a in links_xp(meta[label])]
+            info[key] = '|'.join(names)
+        else:
+            info[key] = None
+
+    # get dates; like the regex backend both or neither
+    theater = time_xp(meta['In Theaters']) if 'In Theaters' in meta else []
+    dvd = time_xp(meta['On Disc/Streaming']) if 'On Disc/Streaming' in meta else []
+    if len(theater) > 0 and len(dvd) > 0:
+        info['theater_date'] = _text(theater[0])
+        info['dvd_date'] = _text(dvd[0])
+    else:
+        info['theater_date'] = None
+        info['dvd_date'] = None
+
+    # get box_office
+    box_office = _text(meta['Box Office']) if 'Box Office' in meta else ''
+    if len(box_office) > 1:
+        info['currency'] = box_office[0]
+        info['box_office'] = box_office[1:]
+    else:
+        info['currency'] = None
+        info['box_office'] = None
+
+    # get runtime
+    info['runtime'] = _text(meta['Runtime']) if 'Runtime' in meta else None
+
+    # get studio
+    if 'Studio' in meta:
+        info['studio'] = '|'.join(_text(a) for a in links_xp(meta['Studio']))
+    else:
+        info['studio'] = None
+
+    return info
+
+def _parse_review_page_lxml(html: str) -> List:
+    """Get the review, rating, critic, if critic is a
+    'top critic', publisher, date from the html of a review page
+
+    Parameters
+    ----------
+    html : str
+        html content of the review page
+
+    Returns
+    -------
+    list
+        list of lists containing the following:
+        reviews, rating, fresh, critic, top_critic,
+        publisher, date
+    """
+
+    reviews = list()
+    rating = list()
+    fresh = list()
+    critic = list()
+    top_critic = list()
+    publisher = list()
+    date = list()
+
+    tree = lxml.html.fromstring(html)
+    for row in row_xp(tree):
+        # rows without a review are skipped like the regex backend
+        match = review_xp(row)
+        if len(match) == 0:
+            continue
+        reviews.append(_text(match[0]).strip('"'))
+
+        match = None
+        for link in score_xp(row):
+            match = score_pat.search(_text(link))
+            if match is not None:
+                break
+        rating.append(match.group(1) if match is not None else None)
+
+        icon = ' '.join(icon_xp(row)).split()
+        if 'fresh' in icon:
+            fresh.append('fresh')
+        elif 'rotten' in icon:
+            fresh.append('rotten')
+        else:
+            fresh.append(None)
+
+        match = critic_xp(row)
+        critic.append(_text(match[0]) if len(match) > 0 else None)
+
+        top_critic.append(1 if len(top_critic_xp(row)) > 0 else 0)
+
+        match = publisher_xp(row)
+        publisher.append(_text(match[0]) if len(match) > 0 else None)
+
+        match = date_xp(row)
+        date.append(_text(match[0]) if len(match) > 0 else None)
+
+    return [reviews, rating, fresh, critic, top_critic, publisher, date]
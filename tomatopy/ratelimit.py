@@ -0,0 +1,206 @@
+"""ratelimit.py
+
+This file contains the per-host rate limiter used for all requests.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _host - get the host (netloc) of a url
+
+"""
+
+# base
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+#==================
+# interal functions
+#==================
+
+def _host(url: str) -> str:
+    """Get the host of a url
+
+    Parameters
+    ----------
+    url : str
+        Any absolute url
+
+    Returns
+    -------
+    str
+        host (netloc) of the url, lower case
+    """
+
+    return urlsplit(url).netloc.lower()
+
+#========
+# classes
+#========
+
+class RateLimiter():
+    """
+    A minimum-interval scheduler with a separate budget per host
+
+    Each request reserves the next free start slot for its host and
+    only waits for the part of the interval that has not already
+    elapsed, so time spent downloading and parsing counts towards
+    the crawl delay. Slots are reserved under a lock and the waiting
+    is done outside of it, so the limiter can be shared by threads
+    and by coroutines in an event loop.
+
+    ...
+
+    Attributes
+    ----------
+    default_interval : float
+        Interval used for hosts without their own interval
+
+    Methods
+    -------
+    set_interval(host, interval)
+        Sets the minimum interval between request starts for host
+    get_interval(host)
+        Gets the minimum interval for host
+    reserve(host)
+        Reserves the next start slot; returns the delay until it
+    wait(host)
+        Reserves a slot and sleeps until it starts
+    wait_async(host)
+        Reserves a slot and awaits until it starts
+    reset
+        Forgets all reserved slots
+
+    """
+
+    def __init__(self, default_interval: float) -> None:
+        """Init limiter with no reserved slots
+
+        Parameters
+        ----------
+        self : self
+        default_interval : float
+            Interval used for hosts without their own interval
+
+        Returns
+        -------
+        None
+        """
+        self.default_interval = default_interval
+        self._intervals = dict()
+        self._next_start = dict()
+        self._lock = threading.Lock()
+
+    def set_interval(self, host: str, interval: float) -> None:
+        """Set the minimum interval between request starts for host
+
+        Parameters
+        ----------
+        host : str
+            Host name e.g. 'www.rottentomatoes.com'
+        interval : float
+            Time in seconds between request starts
+
+        Returns
+        -------
+        None
+        """
+
+        if interval < 0:
+            raise Exception('Argument `interval` must not be negative. \
+            The input value was {}'.format(interval))
+        with self._lock:
+            self._intervals[host.lower()] = interval
+
+    def get_interval(self, host: str) -> float:
+        """Get the minimum interval between request starts for host
+
+        Parameters
+        ----------
+        host : str
+            Host name e.g. 'www.rottentomatoes.com'
+
+        Returns
+        -------
+        float
+            Time in seconds between request starts
+        """
+
+        return self._intervals.get(host.lower(), self.default_interval)
+
+    def reserve(self, host: str) -> float:
+        """Reserve the next start slot for host
+
+        Parameters
+        ----------
+        host : str
+            Host name e.g. 'www.rottentomatoes.com'
+
+        Returns
+        -------
+        float
+            Seconds until the reserved slot starts; 0 if the
+            request may start now
+        """
+
+        host = host.lower()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.get_interval(host)
+        return start - now
+
+    def wait(self, host: str) -> float:
+        """Reserve the next start slot for host and sleep until it
+
+        Parameters
+        ----------
+        host : str
+            Host name e.g. 'www.rottentomatoes.com'
+
+        Returns
+        -------
+        float
+            Seconds spent waiting
+        """
+
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, host: str) -> float:
+        """Reserve the next start slot for host and await until it
+
+        Parameters
+        ----------
+        host : str
+            Host name e.g. 'www.rottentomatoes.com'
+
+        Returns
+        -------
+        float
+            Seconds spent waiting
+        """
+
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def reset(self) -> None:
+        """Forget all reserved slots
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._next_start.clear()
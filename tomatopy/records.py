@@ -0,0 +1,405 @@
+"""records.py
+
+This file contains the containers returned by the scrapers.
+
+This file requires no packages. `to_numpy` requires `numpy` and
+`to_pandas` requires `pandas`.
+
+This file contains the following functions:
+
+    * _split - splits a pipe-joined field into a tuple
+
+"""
+
+# base
+import datetime
+import sys
+from typing import Dict, List, Tuple
+
+# this package
+from .util import _parse_date, _parse_int, _parse_runtime
+
+#==========
+# constants
+#==========
+
+# keys of the review dict; order of the parsed columns
+REVIEW_KEYS = ['reviews', 'rating', 'fresh', 'critic', 'top_critic', 'publisher', 'date']
+
+#==================
+# interal functions
+#==================
+
+def _split(field: str) -> Tuple[str]:
+    """Split a pipe-joined field into a tuple
+
+    Parameters
+    ----------
+    field : str
+        field such as 'Dan Harris|Michael Dougherty'
+
+    Returns
+    -------
+    tuple
+        the parts; empty if field is None or ''
+    """
+
+    if field is None or field == '':
+        return ()
+    return tuple(sys.intern(part) for part in field.split('|'))
+
+#========
+# classes
+#========
+
+class ReviewTable(dict):
+    """
+    Columns of critic reviews, keyed by REVIEW_KEYS
+
+    A dict of lists like the one get_critic_reviews has always
+    returned, so existing code keeps working. Pages are appended
+    in place with `extend`, which costs only the new rows instead
+    of copying every column for every page.
+
+    ...
+
+    Attributes
+    ----------
+    num_rows : int
+        number of reviews in the table
+
+    Methods
+    -------
+    extend(columns)
+        Appends the rows of one parsed page
+    to_records
+        Gets one typed CriticReview per row
+    to_dict
+        Gets a plain dict of the column lists
+    to_numpy
+        Gets a dict of numpy arrays
+    to_pandas
+        Gets a pandas DataFrame
+
+    """
+
+    def __init__(self, columns: Dict[str, List] = None) -> None:
+        """Init table; empty unless columns are given
+
+        Parameters
+        ----------
+        self : self
+        columns : dict
+            dict of lists keyed by REVIEW_KEYS
+
+        Returns
+        -------
+        None
+        """
+        super().__init__()
+        for key in REVIEW_KEYS:
+            self[key] = list(columns[key]) if columns is not None else list()
+
+    @property
+    def num_rows(self) -> int:
+        """Number of reviews in the table"""
+        return len(self['reviews'])
+
+    def extend(self, columns: List[List]) -> None:
+        """Append the rows of one parsed page
+
+        Parameters
+        ----------
+        columns : list
+            list of lists in REVIEW_KEYS order, as returned by
+            _get_critic_reviews_from_page
+
+        Returns
+        -------
+        None
+        """
+
+        for key, column in zip(REVIEW_KEYS, columns):
+            self[key].extend(column)
+
+    def to_records(self) -> List['CriticReview']:
+        """Get one typed CriticReview per row
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list
+            list of CriticReview in table order
+        """
+
+        return [CriticReview.from_row(row) for row in zip(*[self[key] for key in REVIEW_KEYS])]
+
+    def to_dict(self) -> Dict[str, List]:
+        """Get a plain dict of the column lists; the lists are shared
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict of lists keyed by REVIEW_KEYS
+        """
+
+        return dict(self)
+
+    def to_numpy(self) -> Dict:
+        """Get the columns as numpy arrays
+        top_critic becomes an int8 array; the text columns, which
+        may hold None, become object arrays that reference the
+        existing strings.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict of numpy arrays keyed by REVIEW_KEYS
+        """
+
+        import numpy as np
+
+        arrays = dict()
+        for key in REVIEW_KEYS:
+            if key == 'top_critic':
+                arrays[key] = np.array(self[key], dtype=np.int8)
+            else:
+                column = np.empty(len(self[key]), dtype=object)
+                column[:] = self[key]
+                arrays[key] = column
+        return arrays
+
+    def to_pandas(self):
+        """Get the reviews as a pandas DataFrame; one row per review
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        pandas.DataFrame
+            DataFrame with columns REVIEW_KEYS
+        """
+
+        import pandas as pd
+
+        return pd.DataFrame(self.to_numpy(), columns=REVIEW_KEYS, copy=False)
+
+class MovieInfo():
+    """
+    Typed main page info of one movie
+
+    Values are parsed once: runtime in minutes, box office as an
+    integer, dates as datetime.date and genres and people as tuples.
+    Missing values are None; missing tuples are empty. Records
+    compare and hash by value, so do not change one kept in a set.
+
+    ...
+
+    Attributes
+    ----------
+    synopsis : str
+    rating : str
+        MPAA rating, e.g. 'PG-13'
+    genres : tuple
+    directors : tuple
+    writers : tuple
+    theater_date : datetime.date
+    dvd_date : datetime.date
+    currency : str
+        currency symbol of box_office, e.g. '$'
+    box_office : int
+    runtime : int
+        minutes
+    studios : tuple
+
+    Methods
+    -------
+    from_dict(info)
+        Builds the record from a main page info dict
+    to_dict
+        Gets the typed values as a dict
+
+    """
+
+    __slots__ = ('synopsis', 'rating', 'genres', 'directors', 'writers', 'theater_date',
+                 'dvd_date', 'currency', 'box_office', 'runtime', 'studios')
+
+    def __init__(self, synopsis: str = None, rating: str = None, genres: Tuple[str] = (),
+                 directors: Tuple[str] = (), writers: Tuple[str] = (),
+                 theater_date: datetime.date = None, dvd_date: datetime.date = None,
+                 currency: str = None, box_office: int = None, runtime: int = None,
+                 studios: Tuple[str] = ()) -> None:
+        self.synopsis = synopsis
+        self.rating = rating
+        self.genres = genres
+        self.directors = directors
+        self.writers = writers
+        self.theater_date = theater_date
+        self.dvd_date = dvd_date
+        self.currency = currency
+        self.box_office = box_office
+        self.runtime = runtime
+        self.studios = studios
+
+    @classmethod
+    def from_dict(cls, info: Dict[str, str]) -> 'MovieInfo':
+        """Build the record from a main page info dict
+
+        Parameters
+        ----------
+        info : dict
+            dict as returned by get_main_page_info
+
+        Returns
+        -------
+        MovieInfo
+            the typed record
+        """
+
+        return cls(synopsis=info.get('synopsis'),
+                   rating=info.get('rating'),
+                   genres=_split(info.get('genre')),
+                   directors=_split(info.get('director')),
+                   writers=_split(info.get('writer')),
+                   theater_date=_parse_date(info.get('theater_date')),
+                   dvd_date=_parse_date(info.get('dvd_date')),
+                   currency=info.get('currency'),
+                   box_office=_parse_int(info.get('box_office')),
+                   runtime=_parse_runtime(info.get('runtime')),
+                   studios=_split(info.get('studio')))
+
+    def to_dict(self) -> Dict:
+        """Get the typed values as a dict keyed by attribute
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict of the attributes
+        """
+
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MovieInfo):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        return 'MovieInfo(' + ', '.join('{}={!r}'.format(name, getattr(self, name))
+                                        for name in self.__slots__) + ')'
+
+class CriticReview():
+    """
+    Typed critic review
+
+    Critic and publisher names are interned, so a batch holds one
+    copy of each name, and reviews of the same day share one date.
+    Records compare and hash by value, so do not change one kept in a
+    set.
+
+    ...
+
+    Attributes
+    ----------
+    review : str
+    rating : str
+        original score, e.g. '3/4'
+    fresh : bool
+        True if fresh, False if rotten
+    critic : str
+    top_critic : bool
+    publisher : str
+    date : datetime.date
+
+    Methods
+    -------
+    from_row(row)
+        Builds the record from one row of review columns
+    to_dict
+        Gets the typed values as a dict
+
+    """
+
+    __slots__ = ('review', 'rating', 'fresh', 'critic', 'top_critic', 'publisher', 'date')
+
+    def __init__(self, review: str = None, rating: str = None, fresh: bool = None,
+                 critic: str = None, top_critic: bool = None, publisher: str = None,
+                 date: datetime.date = None) -> None:
+        self.review = review
+        self.rating = rating
+        self.fresh = fresh
+        self.critic = critic
+        self.top_critic = top_critic
+        self.publisher = publisher
+        self.date = date
+
+    @classmethod
+    def from_row(cls, row: Tuple) -> 'CriticReview':
+        """Build the record from one row of review columns
+
+        Parameters
+        ----------
+        row : tuple
+            values in REVIEW_KEYS order
+
+        Returns
+        -------
+        CriticReview
+            the typed record
+        """
+
+        review, rating, fresh, critic, top_critic, publisher, date = row
+        return cls(review=review,
+                   rating=rating,
+                   fresh=None if fresh is None else fresh == 'fresh',
+                   critic=None if critic is None else sys.intern(critic),
+                   top_critic=None if top_critic is None else bool(top_critic),
+                   publisher=None if publisher is None else sys.intern(publisher),
+                   date=_parse_date(date))
+
+    def to_dict(self) -> Dict:
+        """Get the typed values as a dict keyed by attribute
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            dict of the attributes
+        """
+
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CriticReview):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        return 'CriticReview(' + ', '.join('{}={!r}'.format(name, getattr(self, name))
+                                           for name in self.__slots__) + ')'
@@ -0,0 +1,252 @@
+"""reparse.py
+
+This file contains the offline re-parse of archived pages.
+
+After a parser fix, `reparse` runs the current parsers over the pages
+of a PageArchive (see `enable_archive`) on a process pool, with no
+network requests. Each parser process reads its pages straight from
+the segment files. The parsed page memo is not used, so every page is
+parsed by the current code.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _page_of - finds the movie and page an archived url belongs to
+    * _archived_movies - groups the newest archived pages by movie
+    * _reparse_movie - parses the archived pages of one movie
+    * reparse - parse every movie of an archive again
+
+"""
+# base
+import logging
+import os
+import re
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, Tuple
+
+# this package
+from .archive import PageArchive, _read_record
+from .scraper import _parse_page, _process_pool
+from .reviews import _get_num_pages
+from .records import ReviewTable
+from .util import get_parser_backend, _decode_content, _decode_entities
+
+logger = logging.getLogger(__name__)
+
+# movie url and the rest of the url
+page_patt = re.compile(r'(https?://[^/]+/m/[^/?#]+/)(.*)')
+review_page_patt = re.compile(r'reviews(?:\?page=(\d+).*)?$')
+
+#==================
+# interal functions
+#==================
+
+def _page_of(url: str) -> Tuple[str, int]:
+    """Find the movie and page an archived url belongs to
+
+    Parameters
+    ----------
+    url : str
+        archived url
+
+    Returns
+    -------
+    str
+        main page url of the movie; None if url is not a movie page
+    int
+        0 for the main page, the page number for a review page;
+        None if url is neither
+    """
+
+    match = page_patt.match(url)
+    if match is None:
+        return None, None
+    movie_url, rest = match.groups()
+    if rest == '':
+        return movie_url, 0
+    match = review_page_patt.match(rest)
+    if match is None:
+        return None, None
+    return movie_url, int(match.group(1) or 1)
+
+def _archived_movies(archive: PageArchive, until: float = None) -> Dict[str, Dict[int, Tuple]]:
+    """Group the newest archived pages by movie
+    Review page 1 is archived under both the reviews url and its
+    '?page=1' url; the newer record of a page is kept, whatever its
+    url.
+
+    Parameters
+    ----------
+    archive : PageArchive
+        archive to read
+    until : float
+        newest pages as of this time, seconds since the epoch
+
+    Returns
+    -------
+    dict
+        main page url -> {page: (segment path, offset, length,
+        content type, fetch time)} with page 0 the main page
+    """
+
+    movies = dict()
+    for url, fetched, _, content_type, segment, offset, length in archive.records(until=until):
+        movie_url, page = _page_of(url)
+        if movie_url is None:
+            continue
+        pages = movies.setdefault(movie_url, dict())
+        if page not in pages or fetched >= pages[page][4]:
+            pages[page] = (archive.segment_path(segment), offset, length, content_type, fetched)
+    return movies
+
+def _reparse_movie(movie_url: str, pages: Dict[int, Tuple], backend: str):
+    """Parse the archived pages of one movie
+    Runs in a parser process of reparse. The newest record of each
+    page is used whatever crawl archived it: a page served by the
+    response cache is not archived again, so its newest record may be
+    older than review page 1. A review page missing from the archive
+    drops the reviews but not the main info.
+
+    Parameters
+    ----------
+    movie_url : str
+        main page url of the movie
+    pages : dict
+        page -> location as from _archived_movies
+    backend : str
+        parser backend to use
+
+    Returns
+    -------
+    str
+        main page url of the movie
+    dict
+        main info dict; None if the main page is not archived
+    ReviewTable
+        reviews of all review pages in page order; None if no review
+        page is archived, page 1 gives no page count or a page is
+        missing
+    str
+        why the reviews were dropped; None if they were not
+    """
+
+    def read(page):
+        segment_path, offset, length, content_type, _ = pages[page]
+        body = _read_record(segment_path, offset, length)
+        return _decode_entities(_decode_content(body, content_type))
+
+    main_info = None
+    if 0 in pages:
+        main_info, _ = _parse_page('main', read(0), backend=backend)
+
+    if not any(page > 0 for page in pages):
+        return movie_url, main_info, None, None
+    if 1 not in pages:
+        return movie_url, main_info, None, 'review page 1 is not archived'
+
+    first_html = read(1)
+    num_pages = _get_num_pages(first_html)
+    if num_pages is None:
+        return movie_url, main_info, None, None
+    missing = [page for page in range(2, int(num_pages) + 1) if page not in pages]
+    if len(missing) > 0:
+        return movie_url, main_info, None, 'review pages {} are not archived'.format(missing)
+
+    reviews = ReviewTable()
+    for page in range(1, int(num_pages) + 1):
+        result, _ = _parse_page('review', first_html if page == 1 else read(page),
+                                backend=backend)
+        reviews.extend(result)
+    return movie_url, main_info, reviews, None
+
+#===============
+# user functions
+#===============
+
+def reparse(archive, workers: int = None,
+            until: float = None) -> Iterator[Tuple[str, Dict[str, List], ReviewTable]]:
+    """Parse every movie of a page archive again with the current
+    parsers, on a process pool and without network requests.
+    The newest archived copy of each page is parsed. Results are
+    yielded as soon as each movie is parsed, so they are not in url
+    order. A movie with a review page missing from the archive is
+    logged and yielded with its main info and None for the reviews;
+    a movie that fails is logged and yielded as (url, None, None).
+    Neither stops the run.
+
+    Parameters
+    ----------
+    archive : PageArchive or str
+        archive, or the directory of one, as written with
+        `enable_archive`
+    workers : int
+        number of parser processes; defaults to the cpu count
+    until : float
+        parse the pages as archived at this time, seconds since the
+        epoch; the newest pages when None
+
+    Returns
+    -------
+    generator
+        yields tuples of (main page url, main info dict, ReviewTable)
+
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise Exception('Argument `workers` must be at least 1. \
+        The input value was {}'.format(workers))
+
+    if isinstance(archive, str):
+        if not os.path.isdir(archive):
+            raise Exception('No page archive at {}'.format(archive))
+        archive = PageArchive(archive)
+        opened = True
+    else:
+        opened = False
+    try:
+        movies = _archived_movies(archive, until)
+    finally:
+        if opened:
+            archive.close()
+
+    logger.info('reparsing %s movies', len(movies), extra={'count': len(movies)})
+    start = time.perf_counter()
+    backend = get_parser_backend()
+    todo = iter(movies.items())
+    # started like the parser processes of scrape_many
+    with _process_pool(workers) as pool:
+        pending = dict()
+
+        def submit_next():
+            for movie_url, pages in todo:
+                pending[pool.submit(_reparse_movie, movie_url, pages, backend)] = movie_url
+                return
+
+        # a few movies per process keeps them busy without queueing
+        # the whole archive
+        for _ in range(4 * workers):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                movie_url = pending.pop(future)
+                submit_next()
+                try:
+                    movie_url, main_info, reviews, error = future.result()
+                except Exception:
+                    logger.warning('unable to reparse %s', movie_url, exc_info=True,
+                                   extra={'url': movie_url})
+                    main_info, reviews = None, None
+                else:
+                    if error is not None:
+                        logger.warning('unable to reparse the reviews of %s: %s', movie_url, error,
+                                       extra={'url': movie_url})
+                yield movie_url, main_info, reviews
+
+    elapsed = time.perf_counter() - start
+    logger.info('done reparsing %s movies', len(movies),
+                extra={'count': len(movies), 'elapsed_ms': round(elapsed * 1000)})
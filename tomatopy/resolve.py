@@ -0,0 +1,389 @@
+"""resolve.py
+
+This file contains the movie name to main page url resolution.
+
+Several candidate urls are built per name and checked in order; a
+HEAD request rules out a missing candidate without downloading it.
+A movie is remembered as
+not found only when every candidate is a definite miss; throttled or
+failed requests leave nothing behind. Resolutions are memoized in
+memory and, when a slug store is enabled, on disk, so later scrapes of
+the same name make no requests at all.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _candidate_urls - builds candidate main page urls for a movie
+    * _resolve_key - builds the store key of a movie name and year
+    * _recall - gets an earlier resolution of a movie
+    * _keep - keeps a resolution in memory
+    * _remember - keeps the resolution of a movie
+    * _forget - drops the resolution of a movie
+    * _page_found - checks a candidate response for a movie page
+    * _download - downloads a candidate url if it is a movie page
+    * _probe - checks if a candidate url is a movie page
+    * _resolve - finds the main page url; optionally downloads it
+    * resolve_movie_url - finds the main page url of a movie
+
+"""
+
+# base
+import collections
+import logging
+import threading
+import time
+from typing import List
+
+# requirements
+from requests import TooManyRedirects
+
+# this package
+from .util import lib_cont, _build_url, _head, _decode, _get_response, _page_text, _is_page_404
+from .state import NEGATIVE_SLUG_TTL
+from .gl import RETRY_STATUSES, MISSING_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# articles dropped for the fallback candidates
+ARTICLES = ('the ', 'a ', 'an ')
+
+# resolutions of this process kept in memory
+MAX_RESOLVED = 65536
+
+# resolutions of this process, least recently used first;
+# movie key -> (url or None, time resolved)
+_resolved = collections.OrderedDict()
+_resolved_lock = threading.Lock()
+
+#==================
+# interal functions
+#==================
+
+def _candidate_urls(movie_name: str, year: int = None) -> List[str]:
+    """Build candidate main page urls for a movie, most likely first
+
+    Parameters
+    ----------
+    movie_name : str
+        movie name to scrape RT for
+    year : int
+        release year; adds '_YEAR' suffixed candidates
+
+    Returns
+    -------
+    list
+        candidate urls without duplicates
+    """
+
+    names = [movie_name]
+    for article in ARTICLES:
+        if movie_name.lower().startswith(article):
+            names.append(movie_name[len(article):])
+            break
+
+    candidates = list()
+    for name in names:
+        for sep in ['_', '-']:
+            candidates.append(_build_url(name, sep=sep))
+    if year is not None:
+        for name in names:
+            candidates.append(_build_url(name + ' ' + str(year), sep='_'))
+
+    # drop duplicates; keep order
+    return list(dict.fromkeys(candidates))
+
+def _resolve_key(movie_name: str, year: int = None) -> str:
+    """Build the store key of a movie name and year
+
+    Parameters
+    ----------
+    movie_name : str
+        movie name to scrape RT for
+    year : int
+        release year or None
+
+    Returns
+    -------
+    str
+        key for the resolution stores
+    """
+
+    key = movie_name.strip().lower()
+    if year is not None:
+        key += '|' + str(year)
+    return key
+
+def _recall(key: str):
+    """Get a resolution made earlier by this process or a stored one
+
+    Parameters
+    ----------
+    key : str
+        store key from _resolve_key
+
+    Returns
+    -------
+    boolean
+        True if the movie was resolved before
+    str
+        main page url; None if the movie was not found
+    """
+
+    with _resolved_lock:
+        entry = _resolved.get(key)
+        if entry is not None:
+            url, resolved = entry
+            # not found is remembered as long as in the slug store
+            if url is not None or time.time() - resolved <= NEGATIVE_SLUG_TTL:
+                _resolved.move_to_end(key)
+                return True, url
+            del _resolved[key]
+    store = lib_cont.slug_store
+    if store is None:
+        return False, None
+    found, url = store.get(key)
+    if found and url is not None:
+        # the store keeps the time of a not found itself
+        _keep(key, url)
+    return found, url
+
+def _keep(key: str, url: str) -> None:
+    """Keep a resolution in memory; drop the least recently used
+
+    Parameters
+    ----------
+    key : str
+        store key from _resolve_key
+    url : str
+        main page url; None if the movie was not found
+
+    Returns
+    -------
+    None
+    """
+
+    with _resolved_lock:
+        _resolved[key] = (url, time.time())
+        _resolved.move_to_end(key)
+        while len(_resolved) > MAX_RESOLVED:
+            _resolved.popitem(last=False)
+
+def _remember(key: str, url: str) -> None:
+    """Keep a resolution in memory and in the slug store if enabled
+
+    Parameters
+    ----------
+    key : str
+        store key from _resolve_key
+    url : str
+        main page url; None if the movie was not found
+
+    Returns
+    -------
+    None
+    """
+
+    _keep(key, url)
+    store = lib_cont.slug_store
+    if store is not None:
+        store.put(key, url)
+
+def _forget(key: str) -> None:
+    """Drop the resolution of a movie from memory and the slug store
+    so the next resolution requests its candidates again
+
+    Parameters
+    ----------
+    key : str
+        store key from _resolve_key
+
+    Returns
+    -------
+    None
+    """
+
+    with _resolved_lock:
+        _resolved.pop(key, None)
+    store = lib_cont.slug_store
+    if store is not None:
+        store.delete(key)
+
+def _page_found(status: int, html: str = None):
+    """Check a candidate response for a movie page
+    Only a missing status or a 2xx carrying the 404 page is a definite
+    miss; any other status, or no response at all, says nothing.
+
+    Parameters
+    ----------
+    status : int
+        http status of the response; None if the request failed
+    html : str
+        html of the response; None if it was not downloaded
+
+    Returns
+    -------
+    boolean
+        True if it is a movie page, False if it is a definite miss;
+        None if it is inconclusive
+    """
+
+    if status in MISSING_STATUSES:
+        return False
+    if status is None or not 200 <= status < 300:
+        return None
+    if html is None:
+        return True
+    if html == '':
+        return None
+    return not _is_page_404(html)
+
+def _download(url: str):
+    """Download a candidate url and check that it is a movie page
+    The session does not raise on error statuses, so they are checked
+    here; see _page_found.
+
+    Parameters
+    ----------
+    url : str
+        candidate main page url
+
+    Returns
+    -------
+    requests.Response or CachedResponse
+        response of the candidate; None when redirected too many times
+    str
+        html of the movie page; None if it is not one
+    boolean
+        True if it is a movie page, False if it is a definite miss;
+        None if it is inconclusive
+    """
+
+    r = _get_response(url)
+    if r is None:
+        return r, None, None
+    if 200 <= r.status_code < 300:
+        html = _page_text(r)
+        found = _page_found(r.status_code, html)
+    else:
+        html = None
+        found = _page_found(r.status_code)
+    return r, html if found else None, found
+
+def _probe(url: str):
+    """Check if a candidate url is a movie page
+    Sends a HEAD request. A missing, throttled or server error status
+    decides without a download; otherwise the page is downloaded and
+    checked for the 404 message, since RT answers some missing movies
+    with a 2xx 404 page.
+
+    Parameters
+    ----------
+    url : str
+        candidate main page url
+
+    Returns
+    -------
+    requests.Response or CachedResponse
+        response of the candidate when it was downloaded; None
+        otherwise
+    str
+        html of the movie page when it was downloaded; None otherwise
+    boolean
+        True if the page exists, False if it is a definite miss; None
+        if it is inconclusive
+    """
+
+    try:
+        r = _head(url)
+    except TooManyRedirects:
+        return None, None, None
+    if getattr(r, 'from_cache', False):
+        found = _page_found(r.status_code, _decode(r))
+        return None, None, found
+    if r.status_code in MISSING_STATUSES or r.status_code in RETRY_STATUSES:
+        return None, None, _page_found(r.status_code)
+    return _download(url)
+
+def _resolve(movie_name: str, year: int = None, get_first: bool = False):
+    """Find the main page url of a movie; see resolve_movie_url
+    With get_first the first candidate is downloaded instead of
+    probed, so a caller that needs the main page anyway gets it
+    without a second request. A probed candidate that exists was
+    downloaded too and is returned the same way.
+    Candidates are checked one at a time and the search stops at the
+    first hit: checking the rest at once would spend a crawl slot on
+    each of them, and throttled checks would only stop the search.
+
+    Parameters
+    ----------
+    movie_name : str
+        movie name to scrape RT for
+    year : int
+        release year or None
+    get_first : boolean
+        download the first candidate instead of probing it
+
+    Returns
+    -------
+    str
+        main page url; None if no candidate exists or a check was
+        inconclusive
+    requests.Response or CachedResponse
+        response of the main page when it was downloaded; None
+        otherwise
+    str
+        html of the main page when it was downloaded; None otherwise
+    """
+
+    key = _resolve_key(movie_name, year)
+    found, url = _recall(key)
+    if found:
+        return url, None, None
+
+    r = None
+    html = None
+    for i, candidate in enumerate(_candidate_urls(movie_name, year)):
+        if i == 0 and get_first:
+            r, html, found = _download(candidate)
+        else:
+            r, html, found = _probe(candidate)
+        if found:
+            url = candidate
+            break
+        r = None
+        if found is None:
+            # throttled or failed; a later candidate may be a worse
+            # match and the miss may not be real, so try again later
+            logger.debug('unable to check %s', candidate,
+                         extra={'movie': movie_name, 'url': candidate})
+            return None, None, None
+
+    _remember(key, url)
+    return url, r, html
+
+#===============
+# user functions
+#===============
+
+def resolve_movie_url(movie_name: str, year: int = None) -> str:
+    """Find the main page url of a movie
+    The candidates are checked one at a time, most likely first,
+    until one exists. The result is remembered, but a movie is only
+    remembered as not found when every candidate was a definite miss.
+
+    Parameters
+    ----------
+    movie_name : str
+        movie name to scrape RT for
+    year : int
+        release year; helps with titles RT suffixes with the year
+
+    Returns
+    -------
+    str
+        main page url; None if no candidate exists or a check was
+        inconclusive
+    """
+
+    return _resolve(movie_name, year)[0]
@@ -7,8 +7,19 @@ This file requires no packages.
 This file contains the following functions:
 
     * _get_critic_reviews_from_page - scrapes info per critic page
+      with the selected parser backend
+    * _get_critic_reviews_from_page_regex - regex parser backend
+    * _search_date - finds the first date in a review row
     * _get_num_pages - finds number of pages to scrape
+    * _review_page_url - builds the url of one review page
+    * _reviews_to_dict - labels accumulated review columns
+    * _parse_review_pages - parses and joins a set of review pages
+    * _iter_review_pages - downloads and parses review pages in order
     * get_critic_reviews - scrapes info over all critic pages 
+    * get_critic_review_records - scrapes typed CriticReviews over all critic pages
+    * iter_critic_reviews - yields reviews as their pages arrive
+    * _iter_critic_reviews - yields critic reviews as pages download
+    * get_new_critic_reviews - scrapes only reviews newer than the last run
 
 """
 
@@ -17,14 +28,29 @@ This file contains the following functions:
 #===================
 
 # base
+import datetime
+import logging
 import re
 import time
-from typing import Dict, List
+from string import ascii_letters
+from typing import Dict, Iterator, List, Union
 
 # this package
-from .util import _make_soup
-from .util import get_verbose_setting
+from .util import _get_response, _page_text, _get_parsed_page, _parse_response
 from .util import _build_url
+from .util import _parse_date
+from .util import get_parser_backend
+from .util import _record, _field_timer, _memo_parse
+from .records import ReviewTable, CriticReview, REVIEW_KEYS
+from .state import ReviewStateStore, _review_fingerprint
+
+# optional fast parser backend
+try:
+    from .parsers import _parse_review_page_lxml
+except ImportError:
+    _parse_review_page_lxml = None
+
+logger = logging.getLogger(__name__)
 
 # regex patterns
 # run once on import
@@ -33,8 +59,11 @@ review_pat = re.compile(r'<div class=\"the_review\">[;a-zA-Z\s,-.\'\/\?\[\]\":\'
 rating_pat = re.compile(r'Original Score:\s([A-Z](\+|-)?|\d(.\d)?(\/\d)?)')
 fresh_pat = re.compile(r'small\s(fresh|rotten)\"')
 critic_pat = re.compile(r'\/\"\>([A-Z][a-zA-Z]+\s[A-Z][a-zA-Z\-]+)|([A-Z][a-zA-Z.]+\s[A-Z].?\s[A-Z][a-zA-Z]+)|([A-Z][a-zA-Z]+\s[A-Z]+\'[A-Z][a-zA-Z]+)')
-publisher_pat = re.compile(r'\"subtle\">[a-zA-Z\s,.\(\)\'\-&;!\/\d+]+</em>')
+publisher_pat = re.compile(r'\"subtle\">([a-zA-Z\s,.\(\)\'\-&;!\/\d+]+)</em>')
 date_pat = re.compile(r'[a-zA-Z]+\s\d+,\s\d+')
+# date_pat starts with a letter, so the regex engine tries it at nearly
+# every position; searching for its digits first is much faster
+date_tail_pat = re.compile(r'(?<=[a-zA-Z]\s)\d+,\s\d+')
 
 #=======================
 # Critic Review Handling
@@ -46,12 +75,35 @@ date_pat = re.compile(r'[a-zA-Z]+\s\d+,\s\d+')
 
 def _get_critic_reviews_from_page(soup) -> List:
     """Get the review, rating, critic, if critic is a 
-    'top critic', publisher, date from a given page (bs4)
+    'top critic', publisher, date from a given page using
+    the backend set by `set_parser_backend`
+
+    Parameters
+    ----------
+    soup : str or bs4 object
+        html content of the review page
+
+    Returns
+    -------
+    list
+        list of lists containing the following:
+        reviews, rating, fresh, critic, top_critic,
+        publisher, date
+        
+    """
+    
+    backend = get_parser_backend()
+    parse = _parse_review_page_lxml if backend == 'lxml' else _get_critic_reviews_from_page_regex
+    return _memo_parse('review', backend, str(soup), parse)
+
+def _get_critic_reviews_from_page_regex(soup) -> List:
+    """Get the review, rating, critic, if critic is a 
+    'top critic', publisher, date from a given page with regexes
 
     Parameters
     ----------
-    soup : bs4 object
-        bs4 html tree from html_parser
+    soup : str or bs4 object
+        html content of the review page
 
     Returns
     -------
@@ -73,22 +125,27 @@ def _get_critic_reviews_from_page(soup) -> List:
     soup = str(soup)
     review_soup = soup.split('="review_table')[1].split('row review_table_row')
     review_soup.pop(0)
+    timer = _field_timer()
     
     # extract info
+    # each field is the first match in the row, found with one search
     for review in review_soup:
         
         # extract review
-        match = re.findall(review_pat, str(review))
-        if len(match) > 0:
-            m = match[0]
+        timer.restart()
+        match = review_pat.search(review)
+        if match is not None:
+            m = match.group(0)
             for iden in ['<div class="the_review"> ','</div>']:
                 m = m.replace(iden,'')
             reviews.append(m.strip('"'))
             
+            timer.mark('review')
+            
             # extract rating
-            match = re.findall(rating_pat, str(review))
-            if len(match) > 0:
-                m = match[0][0]
+            match = rating_pat.search(review)
+            if match is not None:
+                m = match.group(1)
                 if '/1' in m:
                     sp_m = m.split('/')
                     if sp_m[-1] == '1':
@@ -98,52 +155,76 @@ def _get_critic_reviews_from_page(soup) -> List:
             else:
                 rating.append(None)
             
+            timer.mark('rating')
+            
             # extract fresh indicator
-            match = re.findall(fresh_pat, str(review))
-            if len(match) > 0:
-                fresh.append(match[0])
-            else:
-                fresh.append(None)
+            match = fresh_pat.search(review)
+            fresh.append(match.group(1) if match is not None else None)
+            
+            timer.mark('fresh')
             
             # extract ciritic
-            match = re.findall(critic_pat, str(review))
-            if len(match) > 0:
-                critic.append(''.join(match[0]))
+            match = critic_pat.search(review)
+            if match is not None:
+                critic.append(''.join(g for g in match.groups() if g is not None))
             else:
                 critic.append(None)
             
+            timer.mark('critic')
+            
             # check if top critic
-            if '> Top Critic<' in str(review):
+            if '> Top Critic<' in review:
                 top_critic.append(1)
             else:
                 top_critic.append(0)
             
+            timer.mark('top_critic')
+            
             # extract publisher
-            match = re.findall(publisher_pat, str(review))
-            if len(match) > 0:
-                m = match[0]
-                m = m.replace('"subtle">', '')
-                m = m.replace('</em>','')
-                publisher.append(m)
-            else:
-                publisher.append(None)
+            match = publisher_pat.search(review)
+            publisher.append(match.group(1) if match is not None else None)
+            
+            timer.mark('publisher')
             
             # extract date
-            match = re.findall(date_pat, str(review))
-            if len(match) > 0:
-                date.append(match[0].strip('"'))
-            else:
-                date.append(None)
+            date.append(_search_date(review))
+            timer.mark('date')
             
+    timer.done(_record, page='review')
     return [reviews, rating, fresh, critic, top_critic, publisher, date]
 
+def _search_date(review: str) -> str:
+    """Find the first match of date_pat in a review row
+    Finds the digits with date_tail_pat, then extends the match back
+    over the word before them, e.g. 'May' of 'May 2, 2003'.
+
+    Parameters
+    ----------
+    review : str
+        html content of one review row
+
+    Returns
+    -------
+    str
+        first date in the row; None if there is none
+        
+    """
+    
+    match = date_tail_pat.search(review)
+    if match is None:
+        return None
+    start = match.start() - 2
+    while start > 0 and review[start - 1] in ascii_letters:
+        start -= 1
+    return review[start:match.end()]
+
 def _get_num_pages(soup) -> List:
     """Find the number of pages to scrape reviews from
 
     Parameters
     ----------
-    soup : bs4 object
-        bs4 html tree from html_parser
+    soup : str or bs4 object
+        html content of the review page
 
     Returns
     -------
@@ -152,8 +233,7 @@ def _get_num_pages(soup) -> List:
         
     """
     
-    # from soup decend to page level
-    match = re.findall(page_pat,str(list(soup)))
+    match = re.findall(page_pat,str(soup))
     if len(match) > 0:
         match = match[0]
         match = match.split(' of ')[-1]
@@ -161,11 +241,104 @@ def _get_num_pages(soup) -> List:
     else:
         return None
 
+def _review_page_url(page: str, page_num: int) -> str:
+    """Build the url of one critic review page
+
+    Parameters
+    ----------
+    page : str
+        main page url for movie
+    page_num : int
+        review page number; starts at 1
+
+    Returns
+    -------
+    str
+        url of the review page
+        
+    """
+    
+    return page + "reviews?page=" + str(page_num) + "&sort="
+
+def _reviews_to_dict(info: List) -> Dict[str, List]:
+    """Label accumulated review columns with their keys
+
+    Parameters
+    ----------
+    info : list
+        list of lists as returned by _get_critic_reviews_from_page
+
+    Returns
+    -------
+    dict
+        dict containing review info keyed by REVIEW_KEYS
+        
+    """
+    
+    c_info = dict()
+    for k in range(len(REVIEW_KEYS)):
+        c_info[REVIEW_KEYS[k]] = info[k]
+    return c_info
+
+def _parse_review_pages(htmls: List[str]) -> ReviewTable:
+    """Parse a set of review pages and join them in order
+
+    Parameters
+    ----------
+    htmls : list
+        html content of the review pages, in page order
+
+    Returns
+    -------
+    ReviewTable
+        dict containing review info keyed by REVIEW_KEYS
+        
+    """
+    
+    c_info = ReviewTable()
+    for html in htmls:
+        c_info.extend(_get_critic_reviews_from_page(html))
+    return c_info
+
+def _iter_review_pages(page: str, pages: int, first_html: str = None,
+                       first_response=None) -> Iterator[List]:
+    """Download and parse review pages 1..pages, one at a time
+    A page that is unchanged in the response cache is not parsed
+    again.
+
+    Parameters
+    ----------
+    page : str
+        main page url for movie
+    pages : int
+        number of review pages
+    first_html : str
+        html of page 1 when it is already downloaded; the reviews
+        url that gives the page count is the same page as page 1
+    first_response : requests.Response or CachedResponse
+        response of the reviews url that first_html is from
+
+    Returns
+    -------
+    generator
+        yields list of lists per page as returned by
+        _get_critic_reviews_from_page
+        
+    """
+    
+    for page_num in range(1, pages + 1):
+        if page_num == 1 and first_html is not None:
+            yield _parse_response(page + "reviews", first_response, 'review',
+                                  _get_critic_reviews_from_page, first_html)
+        else:
+            yield _get_parsed_page(_review_page_url(page, page_num), 'review',
+                                   _get_critic_reviews_from_page)
+
 #===============
 # user functions
 #===============
     
-def get_critic_reviews(page: str) -> Dict[str, List]:
+def get_critic_reviews(page: str) -> ReviewTable:
     """Crawls the set of critic review pages for the given movie.
     Returns a dict withkeys: reviews, rating, fresh,
     critic, top_critic, publisher, date.
@@ -177,51 +350,218 @@ def get_critic_reviews(page: str) -> Dict[str, List]:
 
     Returns
     -------
-    dict
+    ReviewTable
         dict containing scraped review info with the following keys:
         'reviews', 'rating', 'fresh', 'critic', 'top_critic',
-        'publisher', 'date'
+        'publisher', 'date'; also converts with to_numpy/to_pandas
         
     """
 
     # containers
-    info = [[],[],[],[],[],[],[]]
-        
-    # make soup
-    soup = _make_soup(page + "reviews")
+    c_info = ReviewTable()
+    
+    # get first page
+    first = _get_response(page + "reviews")
+    html = _page_text(first)
     
     # how many soups?
-    pages = _get_num_pages(soup)
+    pages = _get_num_pages(html)
     
     if pages is not None:
-        # verbose option
-        if get_verbose_setting():
-            print('scraping critic reviews')
-            print('scraping url: ' + page + "reviews " + str(pages) + " pages to scrape")
+        logger.debug('scraping %s review pages of %s', pages, page,
+                     extra={'url': page, 'pages': int(pages)})
         
         # eat soup
-        for page_num in range(1,int(pages)+1):
-            soup = _make_soup(page + "reviews?page=" + str(page_num) + "&sort=")
-            c_info = _get_critic_reviews_from_page(soup)
-            
+        for page_info in _iter_review_pages(page, int(pages), html, first):
             # accumulate review info
-            for i in range(len(c_info)):
-                info[i] = info[i] + c_info[i]
+            c_info.extend(page_info)
         
-        c_info = dict()
-        keys = ['reviews', 'rating', 'fresh', 'critic', 'top_critic', 'publisher', 'date']
-        for k in range(len(keys)):
-            c_info[keys[k]] = info[k]
-        
-        # verbose option
-        if get_verbose_setting():
-            print('done scraping critic reviews')
+        logger.debug('done scraping critic reviews of %s', page,
+                     extra={'url': page, 'count': c_info.num_rows})
     else:
         # if pages doesnt match return None; its easy to detect
         c_info = None
         
     return c_info
     
+def get_critic_review_records(page: str) -> List[CriticReview]:
+    """Crawls the set of critic review pages for the given movie
+    and returns one typed record per review.
+
+    Parameters
+    ----------
+    page : str
+        main page url for movie
+
+    Returns
+    -------
+    list
+        list of CriticReview, newest first; None if there are no
+        review pages
+        
+    """
+    
+    c_info = get_critic_reviews(page)
+    if c_info is None:
+        return None
+    return c_info.to_records()
+    
+def iter_critic_reviews(page: str, max_reviews: int = None,
+                        since_date: datetime.date = None,
+                        by_page: bool = False) -> Iterator[Union[Dict, ReviewTable]]:
+    """Yields the critic reviews of the given movie as their pages
+    are downloaded, newest first. Pages after the stop condition
+    are not requested.
+
+    Parameters
+    ----------
+    page : str
+        main page url for movie
+    max_reviews : int
+        stop after this many reviews
+    since_date : datetime.date
+        stop at the first review dated before this date; reviews
+        without a readable date do not stop the iteration
+    by_page : boolean
+        yield one ReviewTable per page instead of one dict per review
+
+    Returns
+    -------
+    generator
+        yields dicts with the keys 'reviews', 'rating', 'fresh',
+        'critic', 'top_critic', 'publisher', 'date' holding one review,
+        or a ReviewTable per page when by_page is True
+        
+    """
+    
+    # checked on the call, not on the first next()
+    if max_reviews is not None and max_reviews < 0:
+        raise Exception('Argument `max_reviews` must be at least 0. \
+        The input value was {}'.format(max_reviews))
+    if max_reviews == 0:
+        return iter(())
+    return _iter_critic_reviews(page, max_reviews, since_date, by_page)
+
+def _iter_critic_reviews(page: str, max_reviews: int, since_date: datetime.date,
+                         by_page: bool) -> Iterator[Union[Dict, ReviewTable]]:
+    """Yield the critic reviews of the given movie; see
+    iter_critic_reviews, which checks the arguments
+
+    Parameters
+    ----------
+    page : str
+        main page url for movie
+    max_reviews : int
+        stop after this many reviews; None for no limit
+    since_date : datetime.date
+        stop at the first review dated before this date
+    by_page : boolean
+        yield one ReviewTable per page instead of one dict per review
+
+    Returns
+    -------
+    generator
+        see iter_critic_reviews
+        
+    """
+    
+    first = _get_response(page + "reviews")
+    html = _page_text(first)
+    pages = _get_num_pages(html)
+    if pages is None:
+        return
+    
+    logger.debug('scraping up to %s review pages of %s', pages, page,
+                 extra={'url': page, 'pages': int(pages)})
+    
+    count = 0
+    for page_info in _iter_review_pages(page, int(pages), html, first):
+        # how many rows of this page to keep
+        take = len(page_info[0])
+        if max_reviews is not None:
+            take = min(take, max_reviews - count)
+        if since_date is not None:
+            for i, date in enumerate(page_info[-1][:take]):
+                date = _parse_date(date)
+                if date is not None and date < since_date:
+                    take = i
+                    break
+        stop = take < len(page_info[0])
+        count += take
+        
+        if by_page:
+            if take > 0:
+                batch = ReviewTable()
+                batch.extend([column[:take] for column in page_info])
+                yield batch
+        else:
+            for row in zip(*[column[:take] for column in page_info]):
+                yield dict(zip(REVIEW_KEYS, row))
+        
+        if stop or (max_reviews is not None and count >= max_reviews):
+            return
+
+def get_new_critic_reviews(page: str, store: ReviewStateStore) -> ReviewTable:
+    """Crawls the critic review pages of the given movie only until
+    reviews seen by an earlier run are reached, and records the newest
+    reviews in store for the next run. The first run for a movie
+    scrapes all reviews.
+
+    Parameters
+    ----------
+    page : str
+        main page url for movie
+    store : ReviewStateStore
+        state of earlier runs
+
+    Returns
+    -------
+    ReviewTable
+        dict containing the new reviews with the same keys as
+        get_critic_reviews; None if the review pages were not found
+        
+    """
+    
+    known, newest = store.get(page)
+    known_set = set(known)
+    newest = datetime.date.fromisoformat(newest) if newest is not None else None
+    
+    first = _get_response(page + "reviews")
+    html = _page_text(first)
+    pages = _get_num_pages(html)
+    if pages is None:
+        # if pages doesnt match return None; its easy to detect
+        return None
+    
+    c_info = ReviewTable()
+    for page_info in _iter_review_pages(page, int(pages), html, first):
+        # keep rows up to the first known or older review
+        take = len(page_info[0])
+        for i in range(take):
+            fingerprint = _review_fingerprint(page_info[6][i], page_info[3][i], page_info[5][i])
+            date = _parse_date(page_info[6][i])
+            if fingerprint in known_set or \
+               (newest is not None and date is not None and date < newest):
+                take = i
+                break
+        c_info.extend([column[:take] for column in page_info])
+        if take < len(page_info[0]):
+            break
+    
+    logger.info('%s new critic reviews for %s', c_info.num_rows, page,
+                extra={'url': page, 'count': c_info.num_rows})
+    
+    # remember the newest reviews for the next run
+    fingerprints = [_review_fingerprint(d, c, p) for d, c, p in
+                    zip(c_info['date'], c_info['critic'], c_info['publisher'])]
+    dates = [d for d in map(_parse_date, c_info['date']) if d is not None]
+    if newest is not None:
+        dates.append(newest)
+    newest = max(dates).isoformat() if len(dates) > 0 else None
+    store.update(page, fingerprints + known, newest)
+    
+    return c_info
+
 #=====================
 # User Review Handling
 #=====================
@@ -6,17 +6,365 @@ This file requires no packages.
 
 This file contains the following functions:
 
+    *  _fetch_main_page - finds and downloads the main page of a movie
+    *  _fetch_review_pages - downloads all review pages of a movie
+    *  _parse_page - parses one downloaded page of a movie
+    *  _fetch_movie_into - downloads the pages of a movie for the parsers
+    *  _process_pool - starts a pool of parser processes
     *  scrape_movie_info - main movie scraper
+    *  scrape_movie_records - main movie scraper returning typed records
+    *  _scrape_many - runs a batch of scrape_many
+    *  scrape_many - scrapes a batch of movies concurrently
 
 """
 # base
-from typing import List, Dict
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Tuple
 
 # this package
-from .util import _is_page_404, _build_url, _make_soup
-from .main_info import get_main_page_info
-from .reviews import get_critic_reviews
-from .util import get_verbose_setting
+from .util import _get_response, _page_text, _decode_content, _decode_entities
+from .util import _parse_response, _lookup_parsed, _store_parsed
+from .resolve import _resolve
+from .util import get_crawl_rate, set_crawl_rate
+from .util import get_parser_backend, set_parser_backend
+from .main_info import _parse_main_page
+from .reviews import _get_num_pages, _review_page_url
+from .reviews import _get_critic_reviews_from_page
+from .records import ReviewTable, MovieInfo, CriticReview
+from .util import lib_cont, _record, _count
+from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+#==================
+# interal functions
+#==================
+
+def _fetch_main_page(movie_name: str) -> Tuple[str, object, str]:
+    """Find and download the main page of a movie
+    The page downloaded to check the most likely url is reused as
+    the main page, so it is requested only once.
+
+    Parameters
+    ----------
+    movie_name : string
+        movie name to scrape RT for
+
+    Returns
+    -------
+    str
+        main page url; None if no page was found
+    requests.Response or CachedResponse
+        response of the main page; None if the request failed
+    str
+        html of the main page; '' if the request failed
+        
+    """
+    
+    movie_url, r, main_html = _resolve(movie_name, get_first=True)
+    if movie_url is None:
+        return None, None, ''
+    if main_html is None:
+        r = _get_response(movie_url)
+        main_html = _page_text(r)
+    return movie_url, r, main_html
+
+def _fetch_review_pages(movie_url: str) -> List[Tuple[str, object, str]]:
+    """Download all review pages of a movie
+    The reviews url that gives the page count is page 1, so it is
+    not requested again.
+
+    Parameters
+    ----------
+    movie_url : str
+        main page url for movie
+
+    Returns
+    -------
+    list
+        (url, response, html) of the review pages in page order;
+        None if the number of review pages could not be found
+        
+    """
+    
+    first_url = movie_url + "reviews"
+    first = _get_response(first_url)
+    first_html = _page_text(first)
+    pages = _get_num_pages(first_html)
+    if pages is None:
+        return None
+    review_pages = [(first_url, first, first_html)]
+    for page_num in range(2, int(pages) + 1):
+        page_url = _review_page_url(movie_url, page_num)
+        r = _get_response(page_url)
+        review_pages.append((page_url, r, _page_text(r)))
+    return review_pages
+
+def _parse_page(kind: str, page, content_type: str = None, backend: str = None,
+                collect: bool = False, memo: Tuple = None):
+    """Parse one downloaded page of a movie
+    Runs in a parser process of scrape_many, so undecoded pages are
+    decoded there too.
+
+    Parameters
+    ----------
+    kind : str
+        'main' or 'review'
+    page : str or bytes
+        html of the page, or its undecoded body
+    content_type : str
+        Content-Type header of an undecoded body
+    backend : str
+        parser backend to use; the current one when None. Parser
+        processes do not share the settings of the parent process.
+    collect : boolean
+        record parse metrics for the parent process to merge
+    memo : tuple
+        (max_entries, path) of the parsed page memo of the parent
+        process; None if it has none
+
+    Returns
+    -------
+    dict or list
+        main info dict, None if the main page is empty; or list of
+        lists as returned by _get_critic_reviews_from_page
+    dict
+        snapshot of the metrics recorded by this call; None unless
+        collect
+        
+    """
+    
+    if backend is not None:
+        set_parser_backend(backend)
+    # fresh metrics per call; the parent merges the snapshot
+    lib_cont.metrics = Metrics() if collect else None
+    lib_cont.metrics_hooks = list()
+    lib_cont.instrumented = collect
+    # same memo settings as the parent; kept between calls
+    if memo is None:
+        lib_cont.parse_memo = None
+    elif lib_cont.parse_memo is None or \
+            (lib_cont.parse_memo.max_entries, lib_cont.parse_memo.path) != memo:
+        lib_cont.enable_parse_memo(*memo)
+    
+    if isinstance(page, bytes):
+        page = _decode_entities(_decode_content(page, content_type))
+    if kind == 'main':
+        result = _parse_main_page(page) if page != '' else None
+    else:
+        result = _get_critic_reviews_from_page(page)
+    return result, lib_cont.metrics.snapshot() if collect else None
+
+def _fetch_movie_into(movie_id: int, movie_name: str, stage) -> None:
+    """Download the pages of a movie and hand each to the parsers
+    Runs in a fetcher thread of scrape_many. Posts exactly one
+    'fetched' or 'failed' event for the movie when done.
+
+    Parameters
+    ----------
+    movie_id : int
+        position of the movie in the batch
+    movie_name : string
+        movie name to scrape RT for
+    stage : _ParseStage
+        parser stage of the batch
+        
+    Returns
+    -------
+    None
+        
+    """
+    
+    try:
+        movie_url, r, main_html = _fetch_main_page(movie_name)
+        if movie_url is None:
+            raise Exception('no page found for ' + movie_name)
+        stage.submit(movie_id, 'main', 0, main_html, url=movie_url, response=r)
+        
+        # the page count comes from review page 1
+        first_url = movie_url + "reviews"
+        first = _get_response(first_url)
+        first_html = _page_text(first)
+        pages = _get_num_pages(first_html)
+        if pages is not None:
+            pages = int(pages)
+            stage.submit(movie_id, 'review', 1, first_html, url=first_url, response=first)
+            for page_num in range(2, pages + 1):
+                page_url = _review_page_url(movie_url, page_num)
+                r = _get_response(page_url)
+                if r is None:
+                    content, content_type = b'', ''
+                else:
+                    content, content_type = r.content, r.headers.get('Content-Type', '')
+                stage.submit(movie_id, 'review', page_num, content, content_type,
+                             url=page_url, response=r)
+        stage.events.put(('fetched', movie_id, pages))
+    except Exception as e:
+        stage.events.put(('failed', movie_id, e))
+
+#========
+# classes
+#========
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """Start a pool of parser processes
+    Where fork is safe every process is forked before this returns,
+    so none inherits a lock held by a fetcher thread started later
+    and the caller's script is not imported again in them. Elsewhere
+    (Windows, macOS) they are spawned, which imports the caller's
+    script again; it then needs an `if __name__ == '__main__':` guard.
+
+    Parameters
+    ----------
+    workers : int
+        number of parser processes
+
+    Returns
+    -------
+    ProcessPoolExecutor
+        pool with its processes running
+    """
+
+    if sys.platform == 'darwin' or 'fork' not in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    # a forking pool starts all of its processes on the first task
+    pool.submit(int).result()
+    return pool
+
+class _ParseStage():
+    """
+    Parser processes of scrape_many fed by its fetcher threads
+
+    Fetchers block in submit while queue_size pages are waiting for
+    or in a parser, so downloads never run far ahead of parsing.
+    Results come back on events, in completion order.
+
+    ...
+
+    Attributes
+    ----------
+    events : queue.Queue
+        (event, movie id, value) tuples for the batch loop
+    backend : str
+        parser backend the processes use
+    memo : tuple
+        (max_entries, path) of the parsed page memo the processes
+        use; None for no memo
+
+    Methods
+    -------
+    submit(movie_id, kind, index, page, content_type, url, response)
+        Queues a page for parsing; blocks while the queue is full
+    close
+        Stops the fetchers waiting in submit and the parsers
+
+    """
+    
+    def __init__(self, parse_workers: int, queue_size: int, backend: str) -> None:
+        """Init stage; start the parser processes
+
+        Parameters
+        ----------
+        self : self
+        parse_workers : int
+            number of parser processes
+        queue_size : int
+            max pages waiting for or in a parser
+        backend : str
+            parser backend the processes use
+
+        Returns
+        -------
+        None
+        """
+        
+        self.events = queue.Queue()
+        self.backend = backend
+        memo = lib_cont.parse_memo
+        self.memo = (memo.max_entries, memo.path) if memo is not None else None
+        self._pool = _process_pool(parse_workers)
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._closed = threading.Event()
+    
+    def submit(self, movie_id: int, kind: str, index: int, page,
+               content_type: str = None, url: str = None, response=None) -> None:
+        """Queue a page for parsing; blocks while the queue is full
+        A 'parsed' event with (kind, index, future) is posted when
+        the parser is done. A page whose response was parsed before
+        is not queued; the event is posted with the earlier result.
+
+        Parameters
+        ----------
+        movie_id : int
+            position of the movie in the batch
+        kind : str
+            'main' or 'review'
+        index : int
+            review page number; 0 for the main page
+        page : str or bytes
+            html of the page, or its undecoded body
+        content_type : str
+            Content-Type header of an undecoded body
+        url : str
+            requested url of the page
+        response : requests.Response or CachedResponse
+            response of the page; None if there is none
+
+        Returns
+        -------
+        None
+        """
+        
+        found, result = _lookup_parsed(url, response, kind)
+        if found:
+            future = Future()
+            future.set_result((result, None))
+            self.events.put(('parsed', movie_id, (kind, index, future)))
+            return
+        
+        while not self._slots.acquire(timeout=0.1):
+            if self._closed.is_set():
+                raise Exception('the batch was closed')
+        try:
+            future = self._pool.submit(_parse_page, kind, page, content_type, self.backend,
+                                       lib_cont.metrics is not None, self.memo)
+        except Exception:
+            self._slots.release()
+            raise
+        
+        def done(future):
+            self._slots.release()
+            if not future.cancelled() and future.exception() is None:
+                _store_parsed(url, response, kind, future.result()[0])
+            self.events.put(('parsed', movie_id, (kind, index, future)))
+        future.add_done_callback(done)
+    
+    def close(self) -> None:
+        """Stop the fetchers waiting in submit and the parsers
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        
+        self._closed.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+#===============
+# user functions
+#===============
 
 def scrape_movie_info(movie_name: str) -> [Dict[str, List], Dict[str, List]]:
     """Get the main info and critic reviews for
@@ -37,28 +385,262 @@ def scrape_movie_info(movie_name: str) -> [Dict[str, List], Dict[str, List]]:
         
     """
     
-    unable_to_scrape = True
+    start = time.perf_counter()
     
-    # determine if url can be used
-    seps = ['_', '-']
-    for _ in seps:
-        movie_url = _build_url(movie_name)
-        soup = _make_soup(movie_url)
-        is_404 = _is_page_404(soup)
-        if not is_404:
-            unable_to_scrape = False
-            break
+    # determine if url can be used; keeps the main page
+    movie_url, main_r, main_html = _fetch_main_page(movie_name)
     
     # scrape page if possible
-    if not unable_to_scrape:
-        # verbose option
-        if get_verbose_setting():
-            print('found ' + movie_name)
-            
-        main_info = get_main_page_info(movie_url)
-        critic_reviews = get_critic_reviews(movie_url)
+    if movie_url is not None:
+        logger.debug('found %s', movie_name, extra={'movie': movie_name, 'url': movie_url})
+        
+        # parse the main page while the review pages download
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            if main_html == '':
+                main_future = None
+            else:
+                main_future = pool.submit(_parse_response, movie_url, main_r, 'main',
+                                          _parse_main_page, main_html)
+            review_pages = _fetch_review_pages(movie_url)
+            main_info = main_future.result() if main_future is not None else None
         
+        if review_pages is None:
+            critic_reviews = None
+        else:
+            # an unchanged page is not parsed again
+            critic_reviews = ReviewTable()
+            for page_url, r, html in review_pages:
+                critic_reviews.extend(_parse_response(page_url, r, 'review',
+                                                      _get_critic_reviews_from_page, html))
+        
+        elapsed = time.perf_counter() - start
+        if lib_cont.instrumented:
+            _record('scrape.movie', elapsed)
+            _count('movies', status='ok')
+        logger.info('done scraping %s', movie_name,
+                    extra={'movie': movie_name, 'url': movie_url,
+                           'elapsed_ms': round(elapsed * 1000)})
         return main_info, critic_reviews
     else:
-        print('unable to scrape ' + movie_name)
-        return None, None
\ No newline at end of file
+        if lib_cont.instrumented:
+            _count('movies', status='failed')
+        logger.warning('unable to scrape %s: no page found', movie_name,
+                       extra={'movie': movie_name})
+        return None, None
+
+def scrape_movie_records(movie_name: str) -> Tuple[MovieInfo, List[CriticReview]]:
+    """Get the main info and critic reviews for
+    input movie as typed records.
+
+    Parameters
+    ----------
+    movie_name : string
+        movie name to scrape RT for
+
+    Returns
+    -------
+    MovieInfo
+        typed main information about the movie; None if
+        scraping failed
+    list
+        list of CriticReview; None if scraping failed or
+        there are no reviews
+        
+    """
+    
+    main_info, critic_reviews = scrape_movie_info(movie_name)
+    if main_info is not None:
+        main_info = MovieInfo.from_dict(main_info)
+    if critic_reviews is not None:
+        critic_reviews = critic_reviews.to_records()
+    return main_info, critic_reviews
+
+def _scrape_many(movie_names: Iterable[str], workers: int, rate: float,
+                 parse_workers: int, queue_size: int) -> Iterator[Tuple[str, Dict[str, List], ReviewTable]]:
+    """Run a batch of scrape_many; the arguments are checked there
+
+    Parameters
+    ----------
+    movie_names : iterable of str
+        movie names to scrape RT for
+    workers : int
+        number of movies downloading at once
+    rate : float
+        crawl rate to use for this batch; None for the current one
+    parse_workers : int
+        number of parser processes
+    queue_size : int
+        max pages waiting for or in a parser
+
+    Returns
+    -------
+    generator
+        yields tuples of (movie name, main info dict, ReviewTable)
+        
+    """
+    
+    old_rate = get_crawl_rate()
+    if rate is not None:
+        set_crawl_rate(rate)
+    
+    metrics = lib_cont.metrics
+    since = metrics.snapshot() if metrics is not None else None
+    start = time.perf_counter()
+    
+    names = enumerate(movie_names)
+    # the parser processes start before any fetcher thread
+    stage = _ParseStage(parse_workers, queue_size, get_parser_backend())
+    fetch_pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        # movie id -> parts of the movie parsed so far
+        movies = dict()
+        fetching = 0
+        
+        def start_next():
+            for movie_id, name in names:
+                movies[movie_id] = {'name': name, 'main': None, 'main_done': False,
+                                    'reviews': dict(), 'pages': None, 'fetched': False,
+                                    'start': time.perf_counter()}
+                fetch_pool.submit(_fetch_movie_into, movie_id, name, stage)
+                return 1
+            return 0
+        
+        for _ in range(workers):
+            fetching += start_next()
+        
+        while fetching > 0 or movies:
+            event, movie_id, value = stage.events.get()
+            if event in ('fetched', 'failed'):
+                fetching -= 1
+                fetching += start_next()
+            
+            movie = movies.get(movie_id)
+            if movie is None:
+                # the movie already failed
+                continue
+            
+            error = None
+            if event == 'failed':
+                error = value
+            elif event == 'fetched':
+                movie['fetched'] = True
+                movie['pages'] = value
+            else:
+                kind, index, future = value
+                if future.cancelled():
+                    error = Exception('parsing was cancelled')
+                elif future.exception() is not None:
+                    error = future.exception()
+                else:
+                    result, snapshot = future.result()
+                    if snapshot is not None and lib_cont.metrics is not None:
+                        lib_cont.metrics.merge(snapshot)
+                    if kind == 'main':
+                        movie['main'] = result
+                        movie['main_done'] = True
+                    else:
+                        movie['reviews'][index] = result
+            
+            if error is not None:
+                del movies[movie_id]
+                if lib_cont.instrumented:
+                    _count('movies', status='failed')
+                logger.warning('unable to scrape %s: %s', movie['name'], error,
+                               extra={'movie': movie['name']})
+                yield movie['name'], None, None
+                continue
+            
+            pages = movie['pages'] or 0
+            if movie['fetched'] and movie['main_done'] and len(movie['reviews']) == pages:
+                del movies[movie_id]
+                if movie['pages'] is None:
+                    critic_reviews = None
+                else:
+                    # reassemble the review pages in page order
+                    critic_reviews = ReviewTable()
+                    for page_num in range(1, pages + 1):
+                        critic_reviews.extend(movie['reviews'][page_num])
+                
+                if lib_cont.instrumented:
+                    _count('movies', status='ok')
+                logger.info('done scraping %s', movie['name'],
+                            extra={'movie': movie['name'],
+                                   'elapsed_ms': round((time.perf_counter() - movie['start']) * 1000)})
+                yield movie['name'], movie['main'], critic_reviews
+    finally:
+        # fetchers still running fail at their next page
+        stage.close()
+        fetch_pool.shutdown(wait=True, cancel_futures=True)
+        if rate is not None:
+            set_crawl_rate(old_rate)
+        if lib_cont.instrumented:
+            _record('scrape.batch', time.perf_counter() - start)
+        if metrics is not None and metrics is lib_cont.metrics:
+            # what this batch recorded
+            metrics.last_batch = Metrics.diff(metrics.snapshot(), since)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('batch summary\n%s', metrics.summary(metrics.last_batch),
+                            extra={'elapsed_ms': round((time.perf_counter() - start) * 1000)})
+
+def scrape_many(movie_names: Iterable[str], workers: int = 4, rate: float = None,
+                parse_workers: int = None,
+                queue_size: int = None) -> Iterator[Tuple[str, Dict[str, List], ReviewTable]]:
+    """Scrape the main info and critic reviews for many movies.
+    Pages are downloaded on a thread pool and each page is parsed on
+    a process pool as soon as it arrives; review pages are put back
+    in page order per movie. Results are yielded as soon as each
+    movie completes, so they are not in input order. A movie that
+    fails is yielded as (name, None, None) and does not stop the
+    batch. With metrics enabled, what the batch recorded is kept in
+    get_metrics().last_batch and logged at the end of the batch.
+    The arguments are checked when scrape_many is called; nothing is
+    requested until the first result is asked for.
+    On Linux the parser processes are forked and the calling script
+    is not run again in them. On Windows and macOS they are spawned,
+    so a script calling scrape_many needs an
+    `if __name__ == '__main__':` guard there.
+
+    Parameters
+    ----------
+    movie_names : iterable of str
+        movie names to scrape RT for; read as the batch progresses
+    workers : int
+        number of movies downloading at once; all workers share
+        the crawl rate
+    rate : float
+        crawl rate to use for this batch; the current crawl rate
+        is used when None. Otherwise the process-wide crawl rate is
+        set to it while the batch runs, so other scrapes running at
+        the same time use it too, and the earlier rate is restored
+        when the batch ends
+    parse_workers : int
+        number of parser processes; defaults to the cpu count
+    queue_size : int
+        max pages waiting for or in a parser; downloads pause when
+        it is reached. Defaults to 4 per parser process.
+
+    Returns
+    -------
+    generator
+        yields tuples of (movie name, main info dict, ReviewTable)
+        
+    """
+    
+    if workers < 1:
+        raise Exception('Argument `workers` must be at least 1. \
+        The input value was {}'.format(workers))
+    if rate is not None and rate <= 0:
+        raise Exception('Argument `rate` must not be less than \
+        or equal to 0. The input value was {}'.format(rate))
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    elif parse_workers < 1:
+        raise Exception('Argument `parse_workers` must be at least 1. \
+        The input value was {}'.format(parse_workers))
+    if queue_size is None:
+        queue_size = 4 * parse_workers
+    elif queue_size < 1:
+        raise Exception('Argument `queue_size` must be at least 1. \
+        The input value was {}'.format(queue_size))
+    
+    return _scrape_many(movie_names, workers, rate, parse_workers, queue_size)
@@ -0,0 +1,375 @@
+"""sinks.py
+
+This file contains writers that stream scraped records to disk.
+
+Records are typed on the way out: dates become dates, top_critic a
+boolean and box_office an integer. Every record carries the movie
+name it was scraped for. A sink writes one kind of record, 'reviews'
+or 'main_info'; `write_results` feeds a pair of sinks from the
+stream of `scrape_many` or `CrawlJob.results`.
+
+This file requires no packages. `ParquetSink` requires `pyarrow`.
+
+This file contains the following functions:
+
+    * _typed_columns - converts scraped records to typed columns
+    * write_results - writes scraped movies to sinks as they arrive
+
+"""
+
+# base
+import json
+from typing import Dict, Iterable, List, Tuple
+
+# this package
+from .records import REVIEW_KEYS
+from .util import _parse_date, _parse_int
+
+#==========
+# constants
+#==========
+
+# columns written for each kind of record with their types
+COLUMNS = {
+    'reviews': (('movie', 'string'), ('reviews', 'string'), ('rating', 'string'),
+                ('fresh', 'string'), ('critic', 'string'), ('top_critic', 'bool'),
+                ('publisher', 'string'), ('date', 'date')),
+    'main_info': (('movie', 'string'), ('synopsis', 'string'), ('rating', 'string'),
+                  ('genre', 'string'), ('director', 'string'), ('writer', 'string'),
+                  ('theater_date', 'date'), ('dvd_date', 'date'), ('currency', 'string'),
+                  ('box_office', 'int'), ('runtime', 'string'), ('studio', 'string')),
+}
+
+# rows per Parquet row group; also the most rows a ParquetSink buffers
+DEFAULT_ROW_GROUP_SIZE = 50000
+
+#==================
+# interal functions
+#==================
+
+def _typed_columns(kind: str, movie_name: str, records: Dict) -> Tuple[Dict[str, List], int]:
+    """Convert scraped records to typed columns
+
+    Parameters
+    ----------
+    kind : str
+        'reviews' or 'main_info'
+    movie_name : str
+        movie name the records were scraped for
+    records : dict
+        dict of lists keyed by REVIEW_KEYS for 'reviews'; main info
+        dict for 'main_info'
+
+    Returns
+    -------
+    dict
+        dict of lists keyed by the column names of COLUMNS[kind]
+    int
+        number of rows
+    """
+
+    if kind == 'main_info':
+        columns = {name: [records.get(name)] for name, _ in COLUMNS[kind][1:]}
+        num_rows = 1
+    else:
+        columns = {key: records[key] for key in REVIEW_KEYS}
+        num_rows = len(columns['reviews'])
+    columns['movie'] = [movie_name] * num_rows
+
+    for name, type_ in COLUMNS[kind]:
+        if type_ == 'date':
+            columns[name] = [_parse_date(v) for v in columns[name]]
+        elif type_ == 'bool':
+            columns[name] = [None if v is None else bool(v) for v in columns[name]]
+        elif type_ == 'int':
+            columns[name] = [_parse_int(v) for v in columns[name]]
+    return columns, num_rows
+
+#===============
+# user functions
+#===============
+
+def write_results(results: Iterable[Tuple], reviews_sink=None, main_info_sink=None) -> int:
+    """Write scraped movies to sinks as they arrive
+    Movies that failed to scrape are skipped.
+
+    Parameters
+    ----------
+    results : iterable
+        tuples of (movie name, main info dict, review dict) as
+        yielded by scrape_many and CrawlJob.results
+    reviews_sink : JsonlSink or ParquetSink
+        sink of kind 'reviews'; reviews are not written when None
+    main_info_sink : JsonlSink or ParquetSink
+        sink of kind 'main_info'; main info is not written when None
+
+    Returns
+    -------
+    int
+        number of movies written
+    """
+
+    written = 0
+    for movie_name, main_info, reviews in results:
+        if main_info is None and reviews is None:
+            continue
+        if main_info_sink is not None and main_info is not None:
+            main_info_sink.write(movie_name, main_info)
+        if reviews_sink is not None and reviews is not None:
+            reviews_sink.write(movie_name, reviews)
+        written += 1
+    return written
+
+#========
+# classes
+#========
+
+class JsonlSink():
+    """
+    Writes records as JSON lines; dates are ISO formatted
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        file written to
+    kind : str
+        'reviews' or 'main_info'
+    num_rows : int
+        number of records written
+
+    Methods
+    -------
+    write(movie_name, records)
+        Writes the records of one movie
+    close
+        Closes the file
+
+    """
+
+    def __init__(self, path: str, kind: str = 'reviews', append: bool = False) -> None:
+        """Init sink; open the file
+
+        Parameters
+        ----------
+        self : self
+        path : str
+            file to write to
+        kind : str
+            'reviews' or 'main_info'
+        append : boolean
+            add to an existing file instead of replacing it
+
+        Returns
+        -------
+        None
+        """
+
+        if kind not in COLUMNS:
+            raise Exception('Sink kind must be one of ' + ', '.join(COLUMNS))
+        self.path = path
+        self.kind = kind
+        self.num_rows = 0
+        self._names = [name for name, _ in COLUMNS[kind]]
+        self._dates = [name for name, type_ in COLUMNS[kind] if type_ == 'date']
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, movie_name: str, records: Dict) -> None:
+        """Write the records of one movie
+
+        Parameters
+        ----------
+        movie_name : str
+            movie name the records were scraped for
+        records : dict
+            dict of lists keyed by REVIEW_KEYS for 'reviews'; main
+            info dict for 'main_info'
+
+        Returns
+        -------
+        None
+        """
+
+        columns, num_rows = _typed_columns(self.kind, movie_name, records)
+        for name in self._dates:
+            columns[name] = [None if v is None else v.isoformat() for v in columns[name]]
+        ordered = [columns[name] for name in self._names]
+        self._file.writelines(json.dumps(dict(zip(self._names, row))) + '\n'
+                              for row in zip(*ordered))
+        self.num_rows += num_rows
+
+    def close(self) -> None:
+        """Close the file
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class ParquetSink():
+    """
+    Writes records to a Parquet file in row groups
+
+    At most row_group_size rows are held in memory; a full buffer is
+    written as one row group.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        file written to
+    kind : str
+        'reviews' or 'main_info'
+    row_group_size : int
+        rows per row group
+    num_rows : int
+        number of records written
+
+    Methods
+    -------
+    write(movie_name, records)
+        Buffers the records of one movie
+    flush
+        Writes the buffered rows as a row group
+    close
+        Writes the last row group and closes the file
+
+    """
+
+    def __init__(self, path: str, kind: str = 'reviews',
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 compression: str = 'zstd') -> None:
+        """Init sink; open the file
+
+        Parameters
+        ----------
+        self : self
+        path : str
+            file to write to
+        kind : str
+            'reviews' or 'main_info'
+        row_group_size : int
+            rows per row group
+        compression : str
+            Parquet compression codec
+
+        Returns
+        -------
+        None
+        """
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception('ParquetSink requires that `pyarrow` be installed')
+        if kind not in COLUMNS:
+            raise Exception('Sink kind must be one of ' + ', '.join(COLUMNS))
+        if row_group_size < 1:
+            raise Exception('Argument `row_group_size` must be at least 1. \
+            The input value was {}'.format(row_group_size))
+
+        types = {'string': pa.string(), 'bool': pa.bool_(), 'date': pa.date32(), 'int': pa.int64()}
+        self.path = path
+        self.kind = kind
+        self.row_group_size = row_group_size
+        self.num_rows = 0
+        self._pa = pa
+        self._schema = pa.schema([(name, types[type_]) for name, type_ in COLUMNS[kind]])
+        self._writer = pq.ParquetWriter(path, self._schema, compression=compression)
+        self._buffer = {name: list() for name in self._schema.names}
+        self._buffered = 0
+
+    def write(self, movie_name: str, records: Dict) -> None:
+        """Buffer the records of one movie; flush full row groups
+
+        Parameters
+        ----------
+        movie_name : str
+            movie name the records were scraped for
+        records : dict
+            dict of lists keyed by REVIEW_KEYS for 'reviews'; main
+            info dict for 'main_info'
+
+        Returns
+        -------
+        None
+        """
+
+        columns, num_rows = _typed_columns(self.kind, movie_name, records)
+        for name, column in columns.items():
+            self._buffer[name].extend(column)
+        self._buffered += num_rows
+        self.num_rows += num_rows
+        while self._buffered >= self.row_group_size:
+            self._flush(self.row_group_size)
+
+    def flush(self) -> None:
+        """Write the buffered rows as a row group
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self._buffered > 0:
+            self._flush(self._buffered)
+
+    def _flush(self, num_rows: int) -> None:
+        """Write the first num_rows buffered rows as a row group
+
+        Parameters
+        ----------
+        num_rows : int
+            rows to write
+
+        Returns
+        -------
+        None
+        """
+
+        table = self._pa.table({name: column[:num_rows] for name, column in self._buffer.items()},
+                               schema=self._schema)
+        self._writer.write_table(table, row_group_size=num_rows)
+        for column in self._buffer.values():
+            del column[:num_rows]
+        self._buffered -= num_rows
+
+    def close(self) -> None:
+        """Write the last row group and close the file
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,344 @@
+"""state.py
+
+This file contains the local stores that let repeated scrapes skip
+work done by earlier runs.
+
+This file requires no packages.
+
+This file contains the following functions:
+
+    * _review_fingerprint - identifies a review by date, critic, publisher
+
+"""
+
+# base
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+#==========
+# constants
+#==========
+
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser('~'), '.tomatopy', 'state.sqlite')
+
+# fingerprints of the newest reviews kept per movie; a few in case
+# the newest known review is removed from RT
+KEEP_FINGERPRINTS = 20
+
+# seconds a failed movie url resolution is remembered
+NEGATIVE_SLUG_TTL = 7 * 24 * 3600
+
+#==================
+# interal functions
+#==================
+
+def _review_fingerprint(date: str, critic: str, publisher: str) -> str:
+    """Identify a review by its date, critic and publisher
+
+    Parameters
+    ----------
+    date : str
+        date of the review as written on RT
+    critic : str
+        name of the critic
+    publisher : str
+        name of the publisher
+
+    Returns
+    -------
+    str
+        fingerprint of the review
+    """
+
+    return '|'.join(v if v is not None else '' for v in (date, critic, publisher))
+
+#========
+# classes
+#========
+
+class ReviewStateStore():
+    """
+    Remembers the newest critic reviews seen per movie url
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        location of the SQLite database
+
+    Methods
+    -------
+    get(url)
+        Gets the known fingerprints and newest date for a movie
+    update(url, fingerprints, newest_date)
+        Records the newest reviews seen for a movie
+    forget(url)
+        Removes the state of a movie
+    close
+        Closes the database
+
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH) -> None:
+        """Init store; create the database if needed
+
+        Parameters
+        ----------
+        self : self
+        path : str
+            location of the SQLite database
+
+        Returns
+        -------
+        None
+        """
+
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS review_state (
+                                url TEXT PRIMARY KEY,
+                                fingerprints TEXT,
+                                newest_date TEXT,
+                                updated REAL)''')
+        self._conn.commit()
+
+    def get(self, url: str):
+        """Get the known newest reviews of a movie
+
+        Parameters
+        ----------
+        url : str
+            main page url for movie
+
+        Returns
+        -------
+        list
+            fingerprints of the newest reviews seen, newest first;
+            empty if the movie was never scraped
+        str
+            ISO date of the newest review seen; None if unknown
+        """
+
+        with self._lock:
+            row = self._conn.execute('SELECT fingerprints, newest_date FROM review_state '
+                                     'WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return list(), None
+        return json.loads(row[0]), row[1]
+
+    def update(self, url: str, fingerprints: List[str], newest_date: str) -> None:
+        """Record the newest reviews seen for a movie
+
+        Parameters
+        ----------
+        url : str
+            main page url for movie
+        fingerprints : list
+            fingerprints of the newest reviews, newest first; only
+            the first KEEP_FINGERPRINTS are kept
+        newest_date : str
+            ISO date of the newest review
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO review_state VALUES (?, ?, ?, ?)',
+                               (url, json.dumps(fingerprints[:KEEP_FINGERPRINTS]),
+                                newest_date, time.time()))
+            self._conn.commit()
+
+    def forget(self, url: str) -> None:
+        """Remove the state of a movie; its next scrape is complete
+
+        Parameters
+        ----------
+        url : str
+            main page url for movie
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute('DELETE FROM review_state WHERE url = ?', (url,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.close()
+
+class SlugStore():
+    """
+    Remembers the RT main page url resolved for each movie name
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        location of the SQLite database
+    negative_ttl : float
+        seconds a failed resolution is remembered
+
+    Methods
+    -------
+    get(key)
+        Gets the stored resolution of a movie
+    put(key, url)
+        Stores the resolution of a movie; None for not found
+    delete(key)
+        Removes the stored resolution of a movie
+    clear
+        Removes all stored resolutions
+    close
+        Closes the database
+
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH,
+                 negative_ttl: float = NEGATIVE_SLUG_TTL) -> None:
+        """Init store; create the database if needed
+
+        Parameters
+        ----------
+        self : self
+        path : str
+            location of the SQLite database
+        negative_ttl : float
+            seconds a failed resolution is remembered
+
+        Returns
+        -------
+        None
+        """
+
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS slugs (
+                                key TEXT PRIMARY KEY,
+                                url TEXT,
+                                resolved REAL)''')
+        self._conn.commit()
+
+    def get(self, key: str):
+        """Get the stored resolution of a movie
+
+        Parameters
+        ----------
+        key : str
+            movie name, with the year if one was given
+
+        Returns
+        -------
+        boolean
+            True if a usable resolution is stored
+        str
+            main page url; None if the movie was not found
+        """
+
+        with self._lock:
+            row = self._conn.execute('SELECT url, resolved FROM slugs WHERE key = ?',
+                                     (key,)).fetchone()
+        if row is None:
+            return False, None
+        url, resolved = row
+        if url is None and time.time() - resolved > self.negative_ttl:
+            return False, None
+        return True, url
+
+    def put(self, key: str, url: str) -> None:
+        """Store the resolution of a movie
+
+        Parameters
+        ----------
+        key : str
+            movie name, with the year if one was given
+        url : str
+            main page url; None if the movie was not found
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO slugs VALUES (?, ?, ?)',
+                               (key, url, time.time()))
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove the stored resolution of a movie
+
+        Parameters
+        ----------
+        key : str
+            movie name, with the year if one was given
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute('DELETE FROM slugs WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove all stored resolutions
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.execute('DELETE FROM slugs')
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+"""fixtures.py
+
+Synthetic pages in the markup the parsers expect, for offline tests.
+
+"""
+
+MAIN_PAGE_HTML = '''<html><head><title>X2: X-Men United - Rotten Tomatoes</title></head>
+<body>
+<div id="movieSynopsis" class="synopsis" style="clear:both">
+    When a failed assassination attempt on the President's life is linked to a mutant, the government cracks down.
+</div>
+<ul class="content-meta info">
+<li class="meta-row clearfix"><div class="meta-label subtle">Rating: </div>
+    <div class="meta-value">PG-13 (for sci-fi action violence)</div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">Genre: </div>
+    <div class="meta-value">
+        <a href="/browse/opening/?genres=1">Action &amp; Adventure</a>,
+        <a href="/browse/opening/?genres=14">Science Fiction &amp; Fantasy</a>
+    </div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">Directed By: </div><div class="meta-value">
+<a href="/celebrity/bryan_singer">Bryan Singer</a>
+</div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">Written By: </div><div class="meta-value">
+<a href="/celebrity/dan_harris">Dan Harris</a>, <a href="/celebrity/michael_dougherty">Michael Dougherty</a>
+</div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">In Theaters: </div><div class="meta-value">
+<time datetime="2003-05-02T17:00:00-07:00">May 2, 2003</time>
+<span style="text-transform:capitalize">wide</span>
+</div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">On Disc/Streaming: </div><div class="meta-value">
+<time datetime="2003-11-25T08:00:00-08:00">Nov 25, 2003</time>
+</div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">Box Office: </div><div class="meta-value">$214,813,155</div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">Runtime: </div><div class="meta-value">
+<time datetime="P134M">
+134 minutes
+</time></div></li>
+<li class="meta-row clearfix"><div class="meta-label subtle">Studio: </div><div class="meta-value">
+<a href="http://www.foxmovies.com/" target="movie-studio">20th Century Fox</a>
+</div></li>
+</ul>
+</body></html>
+'''
+
+MAIN_PAGE_INFO = {
+    'synopsis': "When a failed assassination attempt on the President's life is linked to a mutant, the government cracks down.",
+    'rating': 'PG-13',
+    'genre': 'Action and Adventure|Science Fiction and Fantasy',
+    'director': 'Bryan Singer',
+    'writer': 'Dan Harris|Michael Dougherty',
+    'theater_date': 'May 2, 2003',
+    'dvd_date': 'Nov 25, 2003',
+    'currency': '$',
+    'box_office': '214,813,155',
+    'runtime': '134 minutes',
+    'studio': '20th Century Fox',
+}
+
+PAGE_404_HTML = '<html><body><h1>404 - Not Found</h1></body></html>'
+
+CRITICS = [('Roger Ebert', 'Chicago Sun-Times', True),
+           ('Peter Travers', 'Rolling Stone', False),
+           ('Manohla Dargis', 'New York Times', True),
+           ('Kenneth Turan', 'Los Angeles Times', False)]
+SCORES = ['3/4', 'B+', '7/10', None]
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+def review_fields(page_num: int, row: int, per_page: int = 20) -> dict:
+    """Fields of one synthetic review; numbered newest first"""
+
+    n = (page_num - 1) * per_page + row
+    name, publisher, top = CRITICS[n % len(CRITICS)]
+    return {
+        'review': 'A smart, fast sequel; take {}.'.format(''.join(chr(97 + int(d)) for d in str(n))),
+        'rating': SCORES[n % len(SCORES)],
+        'fresh': 'fresh' if n % 3 else 'rotten',
+        'critic': name,
+        'top_critic': 1 if top else 0,
+        'publisher': publisher,
+        'date': '{} {}, {}'.format(MONTHS[(1000 - n) // 28 % 12], (1000 - n) % 28 + 1,
+                                   2003 + (1000 - n) // 336),
+    }
+
+def review_row_html(fields: dict) -> str:
+    """Markup of one review row"""
+
+    top = '<span class="small subtle"> Top Critic</span>' if fields['top_critic'] else ''
+    score = ''
+    if fields['rating'] is not None:
+        score = ' | Original Score: ' + fields['rating']
+    return '''<div class="row review_table_row">
+    <div class="col-xs-8 critic_names">
+        <a class="unstyled bold articleLink" href="/critic/{slug}/">{critic}</a>
+        {top}<br/>
+        <em class="subtle">{publisher}</em>
+    </div>
+    <div class="col-xs-16 review_container">
+        <div class="review_icon icon small {fresh}"></div>
+        <div class="review_area">
+            <div class="review-date subtle small">{date}</div>
+            <div class="review_desc">
+                <div class="the_review"> {review}</div>
+                <div class="small subtle review-link">Full Review{score}</div>
+            </div>
+        </div>
+    </div>
+</div>
+'''.format(slug=fields['critic'].lower().replace(' ', '-'), top=top, score=score, **fields)
+
+def review_page_html(page_num: int, num_pages: int, per_page: int = 20) -> str:
+    """Markup of one page of critic reviews"""
+
+    rows = ''.join(review_row_html(review_fields(page_num, r, per_page))
+                   for r in range(per_page))
+    return '''<html><head><title>X2: X-Men United - Reviews</title></head><body>
+<span class="pageInfo">Page {} of {}</span>
+<div class="review_table content">
+{}</div>
+</body></html>
+'''.format(page_num, num_pages, rows)
+
+def expected_reviews(num_pages: int, per_page: int = 20) -> dict:
+    """Review dict the parsers should produce for num_pages pages"""
+
+    keys = ['reviews', 'rating', 'fresh', 'critic', 'top_critic', 'publisher', 'date']
+    out = {k: list() for k in keys}
+    for p in range(1, num_pages + 1):
+        for r in range(per_page):
+            f = review_fields(p, r, per_page)
+            for k, fk in zip(keys, ['review', 'rating', 'fresh', 'critic',
+                                    'top_critic', 'publisher', 'date']):
+                out[k].append(f[fk])
+    return out
+
+RT_MOVIE_URL = 'https://www.rottentomatoes.com/m/x2_xmen_united/'
+# answered with the 404 page but a 200 status
+SOFT_404_URL = 'https://www.rottentomatoes.com/m/soft_404/'
+
+class FakeResponse():
+    """Stand-in for requests.Response"""
+
+    def __init__(self, url: str, text: str, status_code: int = 200) -> None:
+        self.url = url
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+
+def fake_get(url: str, num_pages: int = 3) -> FakeResponse:
+    """Answer a request for the X2 pages from the fixtures; 404 otherwise
+    SOFT_404_URL gets the 404 page with a 200 status."""
+
+    if url == RT_MOVIE_URL:
+        return FakeResponse(url, MAIN_PAGE_HTML)
+    if url == RT_MOVIE_URL + 'reviews':
+        return FakeResponse(url, review_page_html(1, num_pages))
+    if url.startswith(RT_MOVIE_URL + 'reviews?page='):
+        page_num = int(url.split('page=')[1].split('&')[0])
+        return FakeResponse(url, review_page_html(page_num, num_pages))
+    if url == SOFT_404_URL:
+        return FakeResponse(url, PAGE_404_HTML)
+    return FakeResponse(url, PAGE_404_HTML, 404)
+
+def fake_head(url: str) -> FakeResponse:
+    """Answer a HEAD request with the status fake_get would give"""
+
+    return FakeResponse(url, '', fake_get(url).status_code)
+
+def wiki_page_html(titles: list, year: int) -> str:
+    """Markup of a wikipedia 'year in film' page listing titles"""
+
+    rows = ''.join('<tr><td><i><a href="/wiki/{}" title="{}">{}</a></i></td></tr>\n'
+                   .format(title.replace(' ', '_').replace("'", '%27'), title, title.split(' (')[0])
+                   for title in titles)
+    return '''<html><body><table class="wikitable">
+{}</table>
+<i><a href="/wiki/Category:{year}" title="Category:{year}">Category</a></i>
+</body></html>
+'''.format(rows, year=year)
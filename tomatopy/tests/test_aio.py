@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+
+try:
+    from aiohttp import web
+    from tomatopy import aio
+except ImportError:
+    aio = None
+
+from tomatopy import resolve
+from tomatopy.util import set_crawl_rate
+from tomatopy.gl import DEFAULT_CRAWL_RATE
+from tomatopy.tests.fixtures import MAIN_PAGE_HTML, MAIN_PAGE_INFO, review_page_html, expected_reviews
+
+NUM_PAGES = 3
+
+@unittest.skipIf(aio is None, 'aiohttp is not installed')
+class TestAio(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # serve the fixtures from a local stand-in for RT
+        # pages carry character references like RT's do
+        self.requests = list()
+
+        async def main_page(request):
+            self.requests.append(request.path_qs)
+            return web.Response(text=MAIN_PAGE_HTML.replace("President's", 'President&#39;s'),
+                                content_type='text/html')
+
+        async def reviews_page(request):
+            self.requests.append(request.path_qs)
+            page_num = int(request.query.get('page', 1))
+            html = review_page_html(page_num, NUM_PAGES).replace('smart, fast', 'smart&#44; fast')
+            return web.Response(text=html, content_type='text/html')
+
+        app = web.Application()
+        app.router.add_get('/m/x2_xmen_united/', main_page)
+        app.router.add_get('/m/x2_xmen_united/reviews', reviews_page)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = 'http://127.0.0.1:{}/m/x2_xmen_united/'.format(port)
+        set_crawl_rate(0.001)
+        resolve._resolved.clear()
+
+    async def asyncTearDown(self):
+        set_crawl_rate(DEFAULT_CRAWL_RATE)
+        resolve._resolved.clear()
+        await self.runner.cleanup()
+
+    async def test_get_main_page_info(self):
+        self.assertEqual(await aio.get_main_page_info(self.url), MAIN_PAGE_INFO)
+
+    async def test_get_critic_reviews(self):
+        # pages are fetched concurrently but reassembled in page order
+        async with await aio.open_session() as session:
+            reviews = await aio.get_critic_reviews(self.url, session)
+        self.assertEqual(reviews, expected_reviews(NUM_PAGES))
+        # review page 1 gives the page count and is not requested again
+        self.assertEqual(len(self.requests), NUM_PAGES)
+
+    async def test_scrape_movie_info(self):
+        base = self.url[:-len('x2_xmen_united/')]
+        with mock.patch('tomatopy.aio._candidate_urls', return_value=[base + 'x2/', self.url]):
+            main_info, reviews = await aio.scrape_movie_info('X2: X-Men United')
+        self.assertEqual(main_info, MAIN_PAGE_INFO)
+        self.assertEqual(reviews, expected_reviews(NUM_PAGES))
+        # the main page that matched the candidate is not requested again
+        self.assertEqual(self.requests.count('/m/x2_xmen_united/'), 1)
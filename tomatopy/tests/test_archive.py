@@ -0,0 +1,137 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from tomatopy.archive import PageArchive
+from tomatopy.reparse import reparse, _page_of
+from tomatopy.util import enable_archive, disable_archive, enable_cache, disable_cache, lib_cont
+from tomatopy.main_info import get_main_page_info
+from tomatopy.reviews import get_critic_reviews
+from tomatopy.tests.fixtures import (FakeResponse, fake_get, MAIN_PAGE_HTML, MAIN_PAGE_INFO,
+                                     RT_MOVIE_URL, expected_reviews, review_page_html)
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'archive')
+
+    def tearDown(self):
+        disable_archive()
+        disable_cache()
+        self.dir.cleanup()
+
+    def crawl(self):
+        session = mock.Mock()
+        session.get.side_effect = lambda url, **kwargs: fake_get(url)
+        with mock.patch.object(lib_cont, 'get_session', return_value=session), \
+             mock.patch('tomatopy.util._throttle'):
+            get_main_page_info(RT_MOVIE_URL)
+            get_critic_reviews(RT_MOVIE_URL)
+        return session
+
+    def append(self, archive, fetched, page, html):
+        url = RT_MOVIE_URL + page
+        with mock.patch('tomatopy.archive.time.time', return_value=fetched):
+            archive.append(url, FakeResponse(url, html))
+
+    def test_append_read(self):
+        archive = PageArchive(self.path, max_segment_bytes=1)
+        for i in range(2):
+            archive.append(RT_MOVIE_URL, FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML + str(i)))
+        # pages that did not load are not kept
+        archive.append(RT_MOVIE_URL + 'x', FakeResponse(RT_MOVIE_URL + 'x', '', 404))
+        records = archive.records(RT_MOVIE_URL)
+        self.assertEqual(len(records), 2)
+        self.assertEqual(archive.read(records[0]), (MAIN_PAGE_HTML + '0').encode('utf-8'))
+        self.assertEqual(archive.latest(), [records[1]])
+        self.assertEqual(archive.latest(until=records[0][1]), [records[0]])
+        self.assertEqual(archive.info()['segments'], 2)
+        archive.close()
+        # segments are plain WARC files
+        with gzip.open(os.path.join(self.path, 'pages-00000.warc.gz'), 'rb') as f:
+            warc = f.read()
+        self.assertTrue(warc.startswith(b'WARC/1.0\r\nWARC-Type: response\r\n'))
+        self.assertIn(b'WARC-Target-URI: ' + RT_MOVIE_URL.encode('utf-8'), warc)
+
+    def test_reparse(self):
+        enable_archive(self.path)
+        self.crawl()
+        disable_archive()
+        archive = PageArchive(self.path)
+        self.assertEqual(len(archive), 4)
+        archive.close()
+
+        # no requests are made
+        with mock.patch('tomatopy.util._get', side_effect=Exception('no network')):
+            results = list(reparse(self.path, workers=2))
+        self.assertEqual(len(results), 1)
+        movie_url, main_info, reviews = results[0]
+        self.assertEqual(movie_url, RT_MOVIE_URL)
+        self.assertEqual(main_info, MAIN_PAGE_INFO)
+        self.assertEqual(reviews, expected_reviews(3))
+
+    def test_cached_pages_archived_once(self):
+        enable_cache(os.path.join(self.dir.name, 'responses.sqlite'))
+        self.crawl()
+        # pages cached before the archive was enabled are archived
+        enable_archive(self.path)
+        session = self.crawl()
+        self.assertEqual(session.get.call_count, 0)
+        self.crawl()
+        self.assertEqual(len(lib_cont.archive), 4)
+
+    def test_page_of(self):
+        self.assertEqual(_page_of(RT_MOVIE_URL), (RT_MOVIE_URL, 0))
+        self.assertEqual(_page_of(RT_MOVIE_URL + 'reviews'), (RT_MOVIE_URL, 1))
+        self.assertEqual(_page_of(RT_MOVIE_URL + 'reviews?page=3&sort='), (RT_MOVIE_URL, 3))
+        self.assertEqual(_page_of('https://en.wikipedia.org/wiki/2008_in_film'), (None, None))
+
+    def test_reparse_one_crawl(self):
+        archive = PageArchive(self.path)
+        self.append(archive, 100, '', MAIN_PAGE_HTML)
+        self.append(archive, 100, 'reviews', review_page_html(1, 3))
+        for page_num in (2, 3):
+            self.append(archive, 101, 'reviews?page={}&sort='.format(page_num),
+                        review_page_html(page_num, 3))
+        # a later crawl found a fourth page and stopped after page 2
+        self.append(archive, 200, 'reviews', review_page_html(1, 4))
+        self.append(archive, 201, 'reviews?page=2&sort=', review_page_html(2, 4))
+        archive.close()
+
+        # page 4 is missing; the reviews are dropped, the main info kept
+        with self.assertLogs('tomatopy.reparse', level='WARNING') as logs:
+            results = list(reparse(self.path, workers=1))
+        self.assertEqual(results, [(RT_MOVIE_URL, MAIN_PAGE_INFO, None)])
+        self.assertIn('[4]', '\n'.join(logs.output))
+
+        # the first crawl alone is complete
+        results = list(reparse(self.path, workers=1, until=150))
+        self.assertEqual(results, [(RT_MOVIE_URL, MAIN_PAGE_INFO, expected_reviews(3))])
+
+    def test_reparse_after_cached_crawl(self):
+        enable_cache(os.path.join(self.dir.name, 'responses.sqlite'))
+        enable_archive(self.path)
+        self.crawl()
+        # a later crawl downloads page 1 again; the other pages come
+        # from the cache and are not archived again
+        self.crawl()
+        self.append(lib_cont.archive, time.time() + 60, 'reviews', review_page_html(1, 3))
+        disable_archive()
+        results = list(reparse(self.path, workers=1))
+        self.assertEqual(results, [(RT_MOVIE_URL, MAIN_PAGE_INFO, expected_reviews(3))])
+
+    def test_reparse_newer_page_one(self):
+        # page 1 under either url; the newer record is parsed
+        archive = PageArchive(self.path)
+        self.append(archive, 100, 'reviews?page=1&sort=', review_page_html(2, 3))
+        self.append(archive, 200, 'reviews', review_page_html(1, 3))
+        for page_num in (2, 3):
+            self.append(archive, 201, 'reviews?page={}&sort='.format(page_num),
+                        review_page_html(page_num, 3))
+        archive.close()
+        results = list(reparse(self.path, workers=1))
+        self.assertEqual(results, [(RT_MOVIE_URL, None, expected_reviews(3))])
@@ -0,0 +1,41 @@
+import unittest
+
+from tomatopy import resolve
+from tomatopy.scraper import scrape_movie_info
+from tomatopy.util import get_crawl_rate, set_crawl_rate, close_session
+from tomatopy.tests.fixtures import MAIN_PAGE_INFO, expected_reviews
+from benchmarks.corpus import build_corpus
+from benchmarks.server import StandInServer
+from benchmarks.run import compare
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_stand_in_server(self):
+        # the library scrapes the corpus through the stand-in server
+        server = StandInServer(build_corpus(num_movies=2, review_pages=3))
+        server.start()
+        rate = get_crawl_rate()
+        try:
+            resolve._resolved.clear()
+            close_session()
+            set_crawl_rate(0.001)
+            server.install()
+            main_info, reviews = scrape_movie_info('Bench Movie 2')
+        finally:
+            set_crawl_rate(rate)
+            server.stop()
+            resolve._resolved.clear()
+        self.assertEqual(main_info, MAIN_PAGE_INFO)
+        self.assertEqual(reviews, expected_reviews(3))
+        # main page and 3 review pages
+        self.assertEqual(server.requests, 4)
+
+    def test_compare(self):
+        baseline = {'movies_per_hour': 1000.0, 'parse_review_us': 100.0,
+                    'parse_review_us_lxml': 100.0}
+        results = {'movies_per_hour': 700.0, 'parse_review_us': 110.0,
+                   'parse_review_us_lxml': 130.0}
+        regressions = compare(results, baseline, 0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('movies_per_hour'))
+        self.assertTrue(regressions[1].startswith('parse_review_us_lxml'))
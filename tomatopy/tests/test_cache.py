@@ -0,0 +1,165 @@
+import os
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+from tomatopy import resolve
+from tomatopy.cache import ResponseCache, _url_class
+from tomatopy.gl import ACCEPT_ENCODING
+from tomatopy.util import _get, _decode, enable_cache, disable_cache, clear_cache, get_cache_info, lib_cont
+from tomatopy.util import add_metrics_hook, remove_metrics_hook
+from tomatopy.main_info import get_main_page_info, _parse_main_page, _parse_main_page_regex
+from tomatopy.reviews import get_critic_reviews, _get_critic_reviews_from_page_regex
+from tomatopy.scraper import scrape_movie_info, scrape_many
+from tomatopy.tests.fixtures import (FakeResponse, fake_get, MAIN_PAGE_HTML, MAIN_PAGE_INFO,
+                                     RT_MOVIE_URL, expected_reviews)
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'cache', 'responses.sqlite')
+
+    def tearDown(self):
+        disable_cache()
+        self.dir.cleanup()
+
+    def test_url_class(self):
+        self.assertEqual(_url_class(RT_MOVIE_URL), 'main')
+        self.assertEqual(_url_class(RT_MOVIE_URL + 'reviews?page=2&sort='), 'reviews')
+        self.assertEqual(_url_class('https://en.wikipedia.org/wiki/2008_in_film'), 'wiki')
+        self.assertEqual(_url_class('https://www.rottentomatoes.com/robots.txt'), 'other')
+
+    def test_store_lookup(self):
+        cache = ResponseCache(self.path)
+        self.assertEqual(cache.lookup(RT_MOVIE_URL), (None, False))
+        cache.store(RT_MOVIE_URL, FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML))
+        response, fresh = cache.lookup(RT_MOVIE_URL)
+        self.assertTrue(fresh)
+        self.assertEqual(_decode(response), MAIN_PAGE_HTML)
+        # server errors are not stored
+        cache.store(RT_MOVIE_URL + 'x', FakeResponse(RT_MOVIE_URL + 'x', 'oops', 500))
+        self.assertEqual(cache.info()['entries'], 1)
+        cache.close()
+
+    def test_eviction(self):
+        # least recently used entries go first once over max_bytes
+        size = len(zlib.compress(MAIN_PAGE_HTML.encode('utf-8')))
+        cache = ResponseCache(self.path, max_bytes=2 * size)
+        for i in range(3):
+            url = RT_MOVIE_URL + str(i)
+            cache.store(url, FakeResponse(url, MAIN_PAGE_HTML))
+        self.assertEqual(cache.info()['entries'], 2)
+        self.assertIsNone(cache.lookup(RT_MOVIE_URL + '0')[0])
+        cache.close()
+
+    def test_byte_total(self):
+        cache = ResponseCache(self.path)
+        cache.store(RT_MOVIE_URL, FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML))
+        # a replaced body is not counted twice
+        cache.store(RT_MOVIE_URL, FakeResponse(RT_MOVIE_URL, 'short'))
+        self.assertEqual(cache.info()['bytes'], len(zlib.compress(b'short')))
+        cache.close()
+        # a reopened cache starts from the stored total
+        cache = ResponseCache(self.path)
+        self.assertEqual(cache.info()['bytes'], len(zlib.compress(b'short')))
+        cache.close()
+
+    def test_access_time_throttled(self):
+        cache = ResponseCache(self.path)
+        cache.store(RT_MOVIE_URL, FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML))
+        with mock.patch.object(cache, '_conn', wraps=cache._conn) as conn:
+            cache.lookup(RT_MOVIE_URL)
+            self.assertEqual(conn.commit.call_count, 0)
+            with mock.patch('tomatopy.cache.ACCESS_INTERVAL', -1):
+                cache.lookup(RT_MOVIE_URL)
+            self.assertEqual(conn.commit.call_count, 1)
+        cache.close()
+
+    def test_get_through_cache(self):
+        enable_cache(self.path)
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML)
+        with mock.patch.object(lib_cont, 'get_session', return_value=session), \
+             mock.patch('tomatopy.util._throttle'):
+            _get(RT_MOVIE_URL)
+            # a fresh response is served without a request
+            self.assertEqual(_decode(_get(RT_MOVIE_URL)), MAIN_PAGE_HTML)
+            self.assertEqual(session.get.call_count, 1)
+            self.assertEqual(get_cache_info()['hits'], 1)
+        clear_cache()
+        self.assertEqual(get_cache_info()['entries'], 0)
+
+    def test_revalidate(self):
+        # stale responses are revalidated with their validators
+        enable_cache(self.path, ttls={'main': 0})
+        first = FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML)
+        first.headers['ETag'] = '"abc"'
+        session = mock.Mock()
+        session.get.side_effect = [first, FakeResponse(RT_MOVIE_URL, '', 304)]
+        with mock.patch.object(lib_cont, 'get_session', return_value=session), \
+             mock.patch('tomatopy.util._throttle'):
+            _get(RT_MOVIE_URL)
+            response = _get(RT_MOVIE_URL)
+        self.assertEqual(_decode(response), MAIN_PAGE_HTML)
+        self.assertEqual(session.get.call_args[1]['headers'], {'If-None-Match': '"abc"'})
+        self.assertEqual(get_cache_info()['revalidated'], 1)
+
+    def test_parse_skipped_on_304(self):
+        # a page that answers 304 is not parsed again
+        enable_cache(self.path, ttls={'main': 0})
+        first = FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML)
+        first.headers['ETag'] = '"abc"'
+        changed = FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML.replace('Bryan Singer', 'Someone Else'))
+        session = mock.Mock()
+        session.get.side_effect = [first, FakeResponse(RT_MOVIE_URL, '', 304), changed]
+        with mock.patch.object(lib_cont, 'get_session', return_value=session), \
+             mock.patch('tomatopy.util._throttle'), \
+             mock.patch('tomatopy.main_info._parse_main_page', wraps=_parse_main_page) as parse:
+            self.assertEqual(get_main_page_info(RT_MOVIE_URL), MAIN_PAGE_INFO)
+            self.assertEqual(get_main_page_info(RT_MOVIE_URL), MAIN_PAGE_INFO)
+            self.assertEqual(parse.call_count, 1)
+            # a new body drops the stored result
+            self.assertEqual(get_main_page_info(RT_MOVIE_URL)['director'], 'Someone Else')
+            self.assertEqual(parse.call_count, 2)
+
+    def test_cached_scrape_not_parsed(self):
+        # pages fresh in the cache are not parsed again on any path
+        enable_cache(self.path)
+        resolve._resolved.clear()
+        self.addCleanup(resolve._resolved.clear)
+        session = mock.Mock()
+        session.get.side_effect = lambda url, **kwargs: fake_get(url)
+        events = list()
+        hook = lambda kind, name, value, labels: events.append((name, labels))
+        with mock.patch.object(lib_cont, 'get_session', return_value=session), \
+             mock.patch('tomatopy.util._throttle'):
+            scrape_movie_info('X2: X-Men United')
+            with mock.patch('tomatopy.main_info._parse_main_page_regex',
+                            wraps=_parse_main_page_regex) as parse_main, \
+                 mock.patch('tomatopy.reviews._get_critic_reviews_from_page_regex',
+                            wraps=_get_critic_reviews_from_page_regex) as parse_reviews:
+                main_info, reviews = scrape_movie_info('X2: X-Men United')
+                self.assertEqual(get_critic_reviews(RT_MOVIE_URL), expected_reviews(3))
+                self.assertEqual(parse_main.call_count, 0)
+                self.assertEqual(parse_reviews.call_count, 0)
+            self.assertEqual(main_info, MAIN_PAGE_INFO)
+            self.assertEqual(reviews, expected_reviews(3))
+
+            # nothing is sent to the parser processes
+            add_metrics_hook(hook)
+            try:
+                results = list(scrape_many(['X2: X-Men United'], workers=1, parse_workers=1))
+            finally:
+                remove_metrics_hook(hook)
+        self.assertEqual(results, [('X2: X-Men United', MAIN_PAGE_INFO, expected_reviews(3))])
+        self.assertEqual(len([e for e in events if e[0] == 'parse.skipped']), 4)
+        self.assertEqual(session.get.call_count, 4)
+
+    def test_accept_encoding(self):
+        # the session advertises every encoding it can decode
+        session = lib_cont._build_session()
+        self.assertEqual(session.headers['Accept-Encoding'], ACCEPT_ENCODING)
+        self.assertIn('gzip', ACCEPT_ENCODING)
+        session.close()
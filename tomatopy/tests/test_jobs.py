@@ -0,0 +1,184 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from requests import TooManyRedirects
+
+from tomatopy import resolve
+from tomatopy.jobs import CrawlJob
+from tomatopy.util import get_crawl_rate, set_crawl_rate, enable_cache, disable_cache, lib_cont
+from tomatopy.main_info import _parse_main_page_regex
+from tomatopy.reviews import _get_critic_reviews_from_page_regex
+from tomatopy.tests.fixtures import fake_get, fake_head, MAIN_PAGE_INFO, RT_MOVIE_URL, expected_reviews
+
+class TestCrawlJob(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'job.sqlite')
+        self.rate = get_crawl_rate()
+        set_crawl_rate(0.001)
+        resolve._resolved.clear()
+
+    def tearDown(self):
+        set_crawl_rate(self.rate)
+        shutil.rmtree(self.dir)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_run(self, *_):
+        job = CrawlJob(self.path)
+        self.assertEqual(job.add(['X2: X-Men United', 'Not A Movie']), 2)
+        # known movies are not added twice
+        self.assertEqual(job.add(['X2: X-Men United']), 0)
+
+        progress = job.run(max_attempts=2, backoff=0)
+        self.assertEqual(progress, {'pending': 0, 'done': 1, 'failed': 1})
+
+        results = list(job.results())
+        self.assertEqual(len(results), 1)
+        name, main_info, reviews = results[0]
+        self.assertEqual(name, 'X2: X-Men United')
+        self.assertEqual(main_info, MAIN_PAGE_INFO)
+        self.assertEqual(reviews, expected_reviews(3))
+
+        failures = list(job.failures())
+        self.assertEqual([(n, a) for n, a, _ in failures], [('Not A Movie', 2)])
+        self.assertEqual(job.retry_failed(), 1)
+        self.assertEqual(job.progress()['pending'], 1)
+        job.close()
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    def test_resume_after_kill(self, _):
+        calls = list()
+
+        def killed_on_page_3(url):
+            if url.startswith(RT_MOVIE_URL + 'reviews?page=3'):
+                raise KeyboardInterrupt()
+            calls.append(url)
+            return fake_get(url)
+
+        job = CrawlJob(self.path)
+        job.add(['X2: X-Men United'])
+        with mock.patch('tomatopy.util._get', side_effect=killed_on_page_3):
+            with self.assertRaises(KeyboardInterrupt):
+                job.run()
+        job.close()
+        self.assertEqual(len(calls), 3)
+
+        # a new job on the same checkpoint fetches only the missing page
+        calls.clear()
+        job = CrawlJob(self.path)
+        with mock.patch('tomatopy.util._get', side_effect=lambda url: calls.append(url) or fake_get(url)):
+            self.assertEqual(job.run()['done'], 1)
+        self.assertEqual(calls, [RT_MOVIE_URL + 'reviews?page=3&sort='])
+        self.assertEqual(next(job.results())[2], expected_reviews(3))
+        job.close()
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_backoff(self, *_):
+        job = CrawlJob(self.path)
+        job.add(['Not A Movie'])
+        # the retry is not due yet, so the run returns without it
+        progress = job.run(max_attempts=3, backoff=3600, wait=False)
+        self.assertEqual(progress, {'pending': 1, 'done': 0, 'failed': 0})
+        job.close()
+
+    def test_retry_resolves_again(self):
+        storm = [True]
+        calls = list()
+
+        def get(url):
+            calls.append(url)
+            if storm[0]:
+                raise TooManyRedirects()
+            return fake_get(url)
+
+        def head(url):
+            if storm[0]:
+                raise TooManyRedirects()
+            return fake_head(url)
+
+        fail = CrawlJob._fail
+
+        def fail_and_recover(job, *args):
+            storm[0] = False
+            fail(job, *args)
+
+        job = CrawlJob(self.path)
+        job.add(['X2: X-Men United'])
+        with mock.patch('tomatopy.util._get', side_effect=get), \
+             mock.patch('tomatopy.resolve._head', side_effect=head):
+            # a backoff retry in the same run requests the pages again
+            with mock.patch.object(CrawlJob, '_fail', autospec=True, side_effect=fail_and_recover):
+                self.assertEqual(job.run(max_attempts=2, backoff=0)['done'], 1)
+            self.assertEqual(next(job.results())[2], expected_reviews(3))
+
+        job.close()
+
+        # so does a failed movie put back with retry_failed
+        resolve._resolved.clear()
+        job = CrawlJob(os.path.join(self.dir, 'retry.sqlite'))
+        job.add(['X2: X-Men United'])
+        with mock.patch('tomatopy.util._get', side_effect=get), \
+             mock.patch('tomatopy.resolve._head', side_effect=head):
+            storm[0] = True
+            self.assertEqual(job.run(max_attempts=1)['failed'], 1)
+            storm[0] = False
+            calls.clear()
+            self.assertEqual(job.retry_failed(), 1)
+            self.assertEqual(job.run(max_attempts=1)['done'], 1)
+            self.assertGreater(len(calls), 0)
+        job.close()
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    def test_redirects_retried(self, _):
+        def storm_on(prefix):
+            def get(url):
+                if url.startswith(prefix):
+                    raise TooManyRedirects()
+                return fake_get(url)
+            return get
+
+        # neither an empty main page nor empty review pages are stored
+        for prefix in (RT_MOVIE_URL, RT_MOVIE_URL + 'reviews'):
+            resolve._resolved.clear()
+            job = CrawlJob(os.path.join(self.dir, str(len(prefix)) + '.sqlite'))
+            job.add(['X2: X-Men United'])
+            with mock.patch('tomatopy.util._get', side_effect=storm_on(prefix)):
+                self.assertEqual(job.run(max_attempts=1)['failed'], 1)
+            self.assertEqual(list(job.results()), [])
+            job.retry_failed()
+            with mock.patch('tomatopy.util._get', side_effect=fake_get):
+                self.assertEqual(job.run()['done'], 1)
+            _, main_info, reviews = next(job.results())
+            self.assertEqual(main_info, MAIN_PAGE_INFO)
+            self.assertEqual(reviews, expected_reviews(3))
+            job.close()
+
+    @mock.patch('tomatopy.util._throttle')
+    def test_cached_pages_not_parsed(self, _):
+        # a second job over pages fresh in the cache parses nothing
+        enable_cache(os.path.join(self.dir, 'responses.sqlite'))
+        self.addCleanup(disable_cache)
+        session = mock.Mock()
+        session.get.side_effect = lambda url, **kwargs: fake_get(url)
+        with mock.patch.object(lib_cont, 'get_session', return_value=session):
+            for i in range(2):
+                resolve._resolved.clear()
+                job = CrawlJob(os.path.join(self.dir, '{}.sqlite'.format(i)))
+                job.add(['X2: X-Men United'])
+                with mock.patch('tomatopy.main_info._parse_main_page_regex',
+                                wraps=_parse_main_page_regex) as parse_main, \
+                     mock.patch('tomatopy.reviews._get_critic_reviews_from_page_regex',
+                                wraps=_get_critic_reviews_from_page_regex) as parse_reviews:
+                    self.assertEqual(job.run(max_attempts=1)['done'], 1)
+                self.assertEqual((parse_main.call_count, parse_reviews.call_count),
+                                 (1, 3) if i == 0 else (0, 0))
+                _, main_info, reviews = next(job.results())
+                self.assertEqual(main_info, MAIN_PAGE_INFO)
+                self.assertEqual(reviews, expected_reviews(3))
+                job.close()
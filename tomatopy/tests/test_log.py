@@ -0,0 +1,63 @@
+import io
+import json
+import logging
+import unittest
+from unittest import mock
+
+from tomatopy import resolve
+from tomatopy.log import JsonFormatter, logger
+from tomatopy.scraper import scrape_movie_info
+from tomatopy.util import set_verbose_mode
+from tomatopy.tests.fixtures import fake_get, fake_head
+
+class TestLog(unittest.TestCase):
+
+    def setUp(self):
+        resolve._resolved.clear()
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_failure_is_logged_not_printed(self, *_):
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out, \
+             self.assertLogs('tomatopy', level='WARNING') as logs:
+            self.assertEqual(scrape_movie_info('Not A Movie'), (None, None))
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(logs.records[0].movie, 'Not A Movie')
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_verbose_mode(self, *_):
+        # verbose mode writes key=value records to stdout
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            set_verbose_mode(True)
+            try:
+                scrape_movie_info('X2: X-Men United')
+            finally:
+                set_verbose_mode(False)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(any(l.startswith('INFO tomatopy.scraper: done scraping X2: X-Men United movie=X2: X-Men United')
+                            for l in lines))
+        self.assertIn('DEBUG tomatopy.scraper: found X2: X-Men United movie=X2: X-Men United '
+                      'url=https://www.rottentomatoes.com/m/x2_xmen_united/', lines)
+        self.assertTrue(any('elapsed_ms=' in l for l in lines))
+        self.assertEqual(logger.level, logging.NOTSET)
+
+    def test_verbose_mode_keeps_level(self):
+        # the level the application set is restored
+        logger.setLevel(logging.INFO)
+        try:
+            set_verbose_mode(True)
+            self.assertEqual(logger.level, logging.DEBUG)
+            set_verbose_mode(False)
+            self.assertEqual(logger.level, logging.INFO)
+        finally:
+            logger.setLevel(logging.NOTSET)
+
+    def test_json_formatter(self):
+        record = logging.LogRecord('tomatopy.scraper', logging.INFO, __file__, 1,
+                                   'done scraping %s', ('X2',), None)
+        record.movie = 'X2'
+        record.elapsed_ms = 812
+        doc = json.loads(JsonFormatter().format(record))
+        self.assertEqual(doc['message'], 'done scraping X2')
+        self.assertEqual((doc['movie'], doc['elapsed_ms']), ('X2', 812))
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tomatopy import memo
+from tomatopy.memo import ParseMemo
+from tomatopy.main_info import _parse_main_page, _parse_main_page_regex
+from tomatopy.reviews import _get_critic_reviews_from_page, _get_critic_reviews_from_page_regex
+from tomatopy.util import enable_parse_memo, disable_parse_memo, get_parse_memo_info
+from tomatopy.tests.fixtures import MAIN_PAGE_HTML, MAIN_PAGE_INFO, review_page_html
+
+class TestParseMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'memo', 'parsed.sqlite')
+
+    def tearDown(self):
+        disable_parse_memo()
+        self.dir.cleanup()
+
+    def test_parse_once(self):
+        enable_parse_memo()
+        html = review_page_html(1, 1)
+        with mock.patch('tomatopy.reviews._get_critic_reviews_from_page_regex',
+                        wraps=_get_critic_reviews_from_page_regex) as parse:
+            first = _get_critic_reviews_from_page(html)
+            # callers get their own copy
+            first[0].clear()
+            second = _get_critic_reviews_from_page(html)
+            self.assertEqual(parse.call_count, 1)
+        self.assertEqual(len(second[0]), 20)
+        self.assertEqual(get_parse_memo_info()['hits'], 1)
+
+        # a different page is parsed
+        self.assertEqual(_parse_main_page(MAIN_PAGE_HTML), MAIN_PAGE_INFO)
+        self.assertEqual(get_parse_memo_info()['misses'], 2)
+
+    def test_on_disk(self):
+        enable_parse_memo(path=self.path)
+        _parse_main_page(MAIN_PAGE_HTML)
+        # a new process with the same file does not parse again
+        enable_parse_memo(path=self.path)
+        with mock.patch('tomatopy.main_info._parse_main_page_regex',
+                        wraps=_parse_main_page_regex) as parse:
+            self.assertEqual(_parse_main_page(MAIN_PAGE_HTML), MAIN_PAGE_INFO)
+            self.assertEqual(parse.call_count, 0)
+
+    def test_parser_version(self):
+        parse_memo = ParseMemo(path=self.path)
+        key = parse_memo.key('main', 'regex', MAIN_PAGE_HTML)
+        parse_memo.put(key, MAIN_PAGE_INFO)
+        parse_memo.close()
+        # results of an older parser version are dropped
+        with mock.patch.object(memo, 'PARSER_VERSION', memo.PARSER_VERSION + 1):
+            parse_memo = ParseMemo(path=self.path)
+            self.assertNotEqual(parse_memo.key('main', 'regex', MAIN_PAGE_HTML), key)
+            self.assertEqual(parse_memo.get(key), (False, None))
+            parse_memo.close()
+
+    def test_lru(self):
+        parse_memo = ParseMemo(max_entries=2)
+        for i in range(3):
+            parse_memo.put(str(i), {'i': i})
+        self.assertEqual(parse_memo.get('0'), (False, None))
+        self.assertEqual(parse_memo.get('2'), (True, {'i': 2}))
+        self.assertEqual(parse_memo.info()['entries'], 2)
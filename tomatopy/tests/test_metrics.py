@@ -0,0 +1,87 @@
+import unittest
+from unittest import mock
+
+from tomatopy import resolve
+from tomatopy.metrics import Metrics, DEFAULT_BUCKETS
+from tomatopy.scraper import scrape_many
+from tomatopy.reviews import _get_critic_reviews_from_page
+from tomatopy.util import _get, enable_metrics, disable_metrics, get_metrics, add_metrics_hook, remove_metrics_hook, lib_cont
+from tomatopy.tests.fixtures import FakeResponse, fake_get, fake_head, review_page_html, MAIN_PAGE_HTML, RT_MOVIE_URL
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counters_and_histograms(self):
+        metrics = Metrics()
+        metrics.inc('requests', host='a')
+        metrics.inc('requests', 2, host='a')
+        metrics.observe('fetch.total', 0.02, host='a')
+        metrics.observe('fetch.total', 100.0, host='a')
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['counters'], [{'name': 'requests', 'labels': {'host': 'a'}, 'value': 3}])
+        h = snapshot['histograms'][0]
+        self.assertEqual((h['count'], h['sum'], h['max']), (2, 100.02, 100.0))
+        # 0.02 falls in the 0.05 bucket; 100 in the unbounded one
+        self.assertEqual(h['buckets'][DEFAULT_BUCKETS.index(0.05)], 1)
+        self.assertEqual(h['buckets'][-1], 1)
+
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE tomatopy_requests_total counter', text)
+        self.assertIn('tomatopy_requests_total{host="a"} 3', text)
+        self.assertIn('tomatopy_fetch_total_seconds_bucket{host="a",le="+Inf"} 2', text)
+        self.assertIn('tomatopy_fetch_total_seconds_count{host="a"} 2', text)
+
+    def test_merge_and_diff(self):
+        metrics = Metrics()
+        metrics.observe('parse.page', 0.001, page='review')
+        since = metrics.snapshot()
+        other = Metrics()
+        other.observe('parse.page', 0.002, page='review')
+        other.inc('movies', status='ok')
+        metrics.merge(other.snapshot())
+        diff = Metrics.diff(metrics.snapshot(), since)
+        self.assertEqual(diff['histograms'][0]['count'], 1)
+        self.assertAlmostEqual(diff['histograms'][0]['sum'], 0.002)
+        self.assertEqual(diff['counters'][0]['value'], 1)
+        self.assertIn('parse.page review', metrics.summary())
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = enable_metrics()
+        self.events = list()
+        self.hook = lambda kind, name, value, labels: self.events.append((kind, name, labels))
+        add_metrics_hook(self.hook)
+
+    def tearDown(self):
+        remove_metrics_hook(self.hook)
+        disable_metrics()
+        self.assertFalse(lib_cont.instrumented)
+
+    def test_fetch_and_throttle(self):
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(RT_MOVIE_URL, MAIN_PAGE_HTML)
+        with mock.patch.object(lib_cont, 'get_session', return_value=session):
+            _get(RT_MOVIE_URL)
+        names = [name for _, name, _ in self.events]
+        self.assertEqual(names, ['throttle.wait', 'requests', 'fetch.ttfb',
+                                 'fetch.download', 'fetch.total'])
+        self.assertEqual(self.events[1][2], {'host': 'www.rottentomatoes.com',
+                                             'method': 'GET', 'status': '200'})
+
+    def test_parse_fields(self):
+        _get_critic_reviews_from_page(review_page_html(1, 1))
+        fields = {labels['field'] for _, name, labels in self.events if name == 'parse.field'}
+        self.assertEqual(fields, {'review', 'rating', 'fresh', 'critic',
+                                  'top_critic', 'publisher', 'date'})
+        self.assertIn(('timing', 'parse.page', {'page': 'review', 'backend': 'regex'}), self.events)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_batch_summary(self, *_):
+        # parser process metrics are merged into the batch
+        resolve._resolved.clear()
+        list(scrape_many(['X2: X-Men United'], rate=0.001, parse_workers=1))
+        batch = get_metrics().last_batch
+        pages = [h for h in batch['histograms'] if h['name'] == 'parse.page']
+        self.assertEqual(sum(h['count'] for h in pages), 4)
+        self.assertIn({'name': 'movies', 'labels': {'status': 'ok'}, 'value': 1}, batch['counters'])
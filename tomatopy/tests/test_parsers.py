@@ -0,0 +1,34 @@
+import unittest
+
+try:
+    from tomatopy.parsers import _parse_main_page_lxml, _parse_review_page_lxml
+except ImportError:
+    _parse_main_page_lxml = None
+
+from tomatopy.main_info import _parse_main_page
+from tomatopy.reviews import _get_critic_reviews_from_page, _reviews_to_dict
+from tomatopy.util import set_parser_backend, get_parser_backend
+from tomatopy.tests.fixtures import MAIN_PAGE_HTML, MAIN_PAGE_INFO, review_page_html, expected_reviews
+
+@unittest.skipIf(_parse_main_page_lxml is None, 'lxml is not installed')
+class TestLxmlBackend(unittest.TestCase):
+
+    def tearDown(self):
+        set_parser_backend('regex')
+
+    def test_parse_main_page(self):
+        self.assertEqual(_parse_main_page_lxml(MAIN_PAGE_HTML), MAIN_PAGE_INFO)
+
+    def test_parse_review_page(self):
+        reviews = _reviews_to_dict(_parse_review_page_lxml(review_page_html(1, 1)))
+        self.assertEqual(reviews, expected_reviews(1))
+
+    def test_backend_setting(self):
+        # both backends give the same result on the fixtures
+        self.assertEqual(get_parser_backend(), 'regex')
+        regex_reviews = _get_critic_reviews_from_page(review_page_html(1, 1))
+        set_parser_backend('lxml')
+        self.assertEqual(_parse_main_page(MAIN_PAGE_HTML), MAIN_PAGE_INFO)
+        self.assertEqual(_get_critic_reviews_from_page(review_page_html(1, 1)), regex_reviews)
+        with self.assertRaises(Exception):
+            set_parser_backend('html5')
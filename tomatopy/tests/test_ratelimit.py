@@ -0,0 +1,54 @@
+import asyncio
+import time
+import unittest
+
+from tomatopy.ratelimit import RateLimiter, _host
+from tomatopy.util import lib_cont, set_crawl_rate, set_wiki_crawl_rate, get_wiki_crawl_rate
+from tomatopy.gl import RT_HOST, WIKI_HOST, DEFAULT_CRAWL_RATE, DEFAULT_WIKI_CRAWL_RATE
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_host(self):
+        self.assertEqual(_host('https://www.rottentomatoes.com/m/x2_xmen_united/'),
+                         RT_HOST)
+        self.assertEqual(_host('https://en.wikipedia.org/wiki/2008_in_film'),
+                         WIKI_HOST)
+
+    def test_reserve_spaces_starts(self):
+        # first request starts now, later ones are spaced by the interval
+        limiter = RateLimiter(10)
+        self.assertEqual(limiter.reserve('a'), 0)
+        self.assertAlmostEqual(limiter.reserve('a'), 10, places=1)
+        self.assertAlmostEqual(limiter.reserve('a'), 20, places=1)
+        # other hosts have their own budget
+        self.assertEqual(limiter.reserve('b'), 0)
+
+    def test_elapsed_time_is_credited(self):
+        # time spent since the previous start is not waited again
+        limiter = RateLimiter(0.05)
+        limiter.wait('a')
+        time.sleep(0.05)
+        self.assertEqual(limiter.reserve('a'), 0)
+
+    def test_wait_async(self):
+        limiter = RateLimiter(0.02)
+
+        async def run():
+            return await asyncio.gather(*[limiter.wait_async('a') for _ in range(3)])
+
+        start = time.monotonic()
+        delays = asyncio.run(run())
+        self.assertEqual(delays[0], 0)
+        self.assertTrue(time.monotonic() - start >= 0.04)
+
+    def test_library_budgets(self):
+        # crawl rates feed the shared limiter
+        set_crawl_rate(2)
+        set_wiki_crawl_rate(3)
+        self.assertEqual(lib_cont.limiter.get_interval(RT_HOST), 2)
+        self.assertEqual(lib_cont.limiter.get_interval(WIKI_HOST), 3)
+        self.assertEqual(get_wiki_crawl_rate(), 3)
+        set_crawl_rate(DEFAULT_CRAWL_RATE)
+        set_wiki_crawl_rate(DEFAULT_WIKI_CRAWL_RATE)
+        with self.assertRaises(Exception):
+            set_wiki_crawl_rate(0)
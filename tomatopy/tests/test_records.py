@@ -0,0 +1,83 @@
+import datetime
+import json
+import unittest
+from unittest import mock
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from tomatopy.records import ReviewTable, MovieInfo, CriticReview, REVIEW_KEYS
+from tomatopy.reviews import _get_critic_reviews_from_page
+from tomatopy.scraper import scrape_movie_records
+from tomatopy.tests.fixtures import review_page_html, expected_reviews, fake_get, fake_head, MAIN_PAGE_INFO
+
+class TestReviewTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = ReviewTable()
+        for page_num in (1, 2):
+            self.table.extend(_get_critic_reviews_from_page(review_page_html(page_num, 2)))
+
+    def test_dict_view(self):
+        # still behaves as the dict of lists
+        self.assertEqual(list(self.table.keys()), REVIEW_KEYS)
+        self.assertEqual(self.table, expected_reviews(2))
+        self.assertEqual(self.table.num_rows, 40)
+        self.assertEqual(json.loads(json.dumps(self.table)), expected_reviews(2))
+        self.assertIs(self.table.to_dict()['reviews'], self.table['reviews'])
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        arrays = self.table.to_numpy()
+        self.assertEqual(arrays['top_critic'].dtype, np.int8)
+        self.assertEqual(list(arrays['critic']), self.table['critic'])
+
+    @unittest.skipIf(pd is None, 'pandas is not installed')
+    def test_to_pandas(self):
+        frame = self.table.to_pandas()
+        self.assertEqual(list(frame.columns), REVIEW_KEYS)
+        self.assertEqual(len(frame), 40)
+
+class TestTypedRecords(unittest.TestCase):
+
+    def test_movie_info(self):
+        info = MovieInfo.from_dict(MAIN_PAGE_INFO)
+        self.assertEqual(info.runtime, 134)
+        self.assertEqual(info.box_office, 214813155)
+        self.assertEqual(info.theater_date, datetime.date(2003, 5, 2))
+        self.assertEqual(info.dvd_date, datetime.date(2003, 11, 25))
+        self.assertEqual(info.genres, ('Action and Adventure', 'Science Fiction and Fantasy'))
+        self.assertEqual(info.writers, ('Dan Harris', 'Michael Dougherty'))
+        self.assertEqual(info.studios, ('20th Century Fox',))
+        self.assertFalse(hasattr(info, '__dict__'))
+        # missing values
+        info = MovieInfo.from_dict({'synopsis': 'x'})
+        self.assertEqual((info.runtime, info.genres), (None, ()))
+
+    def test_critic_reviews(self):
+        table = ReviewTable(expected_reviews(2))
+        records = table.to_records()
+        self.assertEqual(len(records), 40)
+        for record, row in zip(records, zip(*[table[k] for k in REVIEW_KEYS])):
+            self.assertEqual(record.review, row[0])
+            self.assertEqual(record.fresh, row[2] == 'fresh')
+            self.assertIs(record.top_critic, bool(row[4]))
+            self.assertEqual(record.date, datetime.datetime.strptime(row[6], '%b %d, %Y').date())
+        self.assertEqual(records[0], CriticReview.from_row([table[k][0] for k in REVIEW_KEYS]))
+        self.assertFalse(hasattr(records[0], '__dict__'))
+        # records are values; equal records hash alike
+        self.assertEqual(len(set(records + records)), len(set(records)))
+        self.assertEqual(len({MovieInfo.from_dict(MAIN_PAGE_INFO), MovieInfo.from_dict(MAIN_PAGE_INFO)}), 1)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_scrape_movie_records(self, *_):
+        main_info, reviews = scrape_movie_records('X2: X-Men United')
+        self.assertEqual(main_info, MovieInfo.from_dict(MAIN_PAGE_INFO))
+        self.assertEqual(reviews, ReviewTable(expected_reviews(3)).to_records())
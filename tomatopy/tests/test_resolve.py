@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tomatopy import resolve
+from tomatopy.resolve import _candidate_urls, resolve_movie_url
+from tomatopy.state import SlugStore
+from tomatopy.util import enable_slug_cache, disable_slug_cache, lib_cont
+from tomatopy.tests.fixtures import FakeResponse, fake_get, fake_head, RT_MOVIE_URL, SOFT_404_URL
+
+class TestResolve(unittest.TestCase):
+
+    def setUp(self):
+        resolve._resolved.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'state.sqlite')
+
+    def tearDown(self):
+        disable_slug_cache()
+        resolve._resolved.clear()
+        self.tmp.cleanup()
+
+    def test_candidate_urls(self):
+        base = 'https://www.rottentomatoes.com/m/'
+        self.assertEqual(_candidate_urls('The Dark Knight', 2008),
+                         [base + 'the_dark_knight/', base + 'the-dark-knight/',
+                          base + 'dark_knight/', base + 'dark-knight/',
+                          base + 'the_dark_knight_2008/', base + 'dark_knight_2008/'])
+        # one word names give the same url for both separators
+        self.assertEqual(_candidate_urls('Alien'), [base + 'alien/'])
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_resolve_first_candidate(self, get, head):
+        self.assertEqual(resolve_movie_url('X2: X-Men United'), RT_MOVIE_URL)
+        self.assertEqual(head.call_count, 1)
+        # memoized; no more requests
+        self.assertEqual(resolve_movie_url('x2: x-men united'), RT_MOVIE_URL)
+        self.assertEqual(head.call_count, 1)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_resolve_fallback_candidate(self, get, head):
+        # only the '-' candidate exists
+        url = 'https://www.rottentomatoes.com/m/x2-xmen-united/'
+        with mock.patch('tomatopy.tests.fixtures.RT_MOVIE_URL', url):
+            self.assertEqual(resolve_movie_url('X2: X-Men United'), url)
+        self.assertEqual(head.call_count, 2)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_slug_cache(self, get, head):
+        enable_slug_cache(self.path)
+        self.assertEqual(resolve_movie_url('X2: X-Men United'), RT_MOVIE_URL)
+        self.assertIsNone(resolve_movie_url('Not A Movie'))
+        calls = head.call_count
+
+        # a new process finds both in the store
+        resolve._resolved.clear()
+        self.assertEqual(resolve_movie_url('X2: X-Men United'), RT_MOVIE_URL)
+        self.assertIsNone(resolve_movie_url('Not A Movie'))
+        self.assertEqual(head.call_count, calls)
+
+    def test_negative_ttl(self):
+        store = SlugStore(self.path, negative_ttl=-1)
+        store.put('x2', RT_MOVIE_URL)
+        store.put('not a movie', None)
+        self.assertEqual(store.get('x2'), (True, RT_MOVIE_URL))
+        # not found results expire
+        self.assertEqual(store.get('not a movie'), (False, None))
+        store.close()
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_memory_negative_ttl(self, get, head):
+        self.assertIsNone(resolve_movie_url('Not A Movie'))
+        calls = head.call_count
+        self.assertIsNone(resolve_movie_url('Not A Movie'))
+        self.assertEqual(head.call_count, calls)
+        # not found expires in memory as in the slug store
+        with mock.patch('tomatopy.resolve.NEGATIVE_SLUG_TTL', -1):
+            self.assertIsNone(resolve_movie_url('Not A Movie'))
+        self.assertEqual(head.call_count, 2 * calls)
+
+    @mock.patch('tomatopy.resolve.MAX_RESOLVED', 2)
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_memory_bounded(self, get, head):
+        for name in ('a', 'b', 'X2: X-Men United'):
+            resolve_movie_url(name)
+        self.assertEqual(list(resolve._resolved), ['b', 'x2: x-men united'])
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    def test_error_page_not_accepted(self, _):
+        # an error page without the 404 message is not the movie page
+        busy = lambda url: FakeResponse(url, '<html><body>Try again later</body></html>', 503)
+        with mock.patch('tomatopy.util._get', side_effect=busy):
+            self.assertEqual(resolve._resolve('X2: X-Men United', get_first=True), (None, None, None))
+        self.assertNotIn(RT_MOVIE_URL, [url for url, _ in resolve._resolved.values()])
+        resolve._resolved.clear()
+        with mock.patch('tomatopy.util._get', side_effect=fake_get):
+            self.assertEqual(resolve._resolve('X2: X-Men United', get_first=True)[0], RT_MOVIE_URL)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_fallback_stops_at_first_hit(self, get, head):
+        # the second of six candidates exists; the rest are not probed
+        url = 'https://www.rottentomatoes.com/m/the-dark-knight/'
+        with mock.patch('tomatopy.tests.fixtures.RT_MOVIE_URL', url):
+            self.assertEqual(resolve_movie_url('The Dark Knight', 2008), url)
+        self.assertEqual([call[0][0] for call in head.call_args_list],
+                         _candidate_urls('The Dark Knight', 2008)[:2])
+
+    def test_throttled_not_remembered(self):
+        # throttled or failing candidates are not a miss
+        enable_slug_cache(self.path)
+        for status in (429, 503):
+            busy = lambda url: FakeResponse(url, '', status)
+            with mock.patch('tomatopy.resolve._head', side_effect=busy), \
+                    mock.patch('tomatopy.util._get', side_effect=busy):
+                self.assertIsNone(resolve_movie_url('X2: X-Men United'))
+                self.assertEqual(resolve._resolve('X2: X-Men United', get_first=True), (None, None, None))
+            self.assertEqual(len(resolve._resolved), 0)
+            self.assertEqual(lib_cont.slug_store.get('x2: x-men united'), (False, None))
+        # the movie is found once the site answers again
+        with mock.patch('tomatopy.resolve._head', side_effect=fake_head), \
+                mock.patch('tomatopy.util._get', side_effect=fake_get):
+            self.assertEqual(resolve_movie_url('X2: X-Men United'), RT_MOVIE_URL)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_soft_404_not_accepted(self, get, head):
+        # the HEAD status is 200 but the page is the 404 page
+        self.assertEqual(head(SOFT_404_URL).status_code, 200)
+        self.assertIsNone(resolve_movie_url('Soft 404'))
+        self.assertEqual(resolve._resolved['soft 404'][0], None)
+        # a later candidate is still found
+        resolve._resolved.clear()
+        url = 'https://www.rottentomatoes.com/m/soft-404/'
+        with mock.patch('tomatopy.tests.fixtures.RT_MOVIE_URL', url):
+            self.assertEqual(resolve._resolve('Soft 404')[0], url)
+
+    def test_disable_slug_cache(self):
+        enable_slug_cache(self.path)
+        self.assertIsNotNone(lib_cont.slug_store)
+        disable_slug_cache()
+        self.assertIsNone(lib_cont.slug_store)
+        self.assertTrue(os.path.isfile(self.path))
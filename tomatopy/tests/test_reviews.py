@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tomatopy.reviews import _get_critic_reviews_from_page, _get_num_pages, _reviews_to_dict
+from tomatopy.reviews import _search_date, date_pat, get_critic_reviews, iter_critic_reviews
+from tomatopy.reviews import get_new_critic_reviews
+from tomatopy.records import REVIEW_KEYS
+from tomatopy.state import ReviewStateStore
+from tomatopy.util import _parse_date
+from tomatopy.tests.fixtures import review_page_html, expected_reviews, fake_get, RT_MOVIE_URL
+
+class TestReviews(unittest.TestCase):
+
+    def test_get_critic_reviews_from_page(self):
+        reviews = _reviews_to_dict(_get_critic_reviews_from_page(review_page_html(1, 2)))
+        self.assertEqual(reviews, expected_reviews(1))
+
+    def test_get_num_pages(self):
+        self.assertEqual(_get_num_pages(review_page_html(1, 12)), '12')
+        self.assertIsNone(_get_num_pages('<html></html>'))
+
+    def test_search_date(self):
+        # same first match as date_pat
+        for row in ['<div>May 2, 2003</div>', 'x_May 2, 2003', 'abc 12 May 2, 2003',
+                    'At 5, 6 and June 7, 2008', '2, 2003', 'May\n25, 2003', '']:
+            match = date_pat.search(row)
+            self.assertEqual(_search_date(row), match.group(0) if match else None)
+
+class TestIterCriticReviews(unittest.TestCase):
+
+    def setUp(self):
+        self.patcher = mock.patch('tomatopy.util._get', side_effect=fake_get)
+        self.get = self.patcher.start()
+        self.expected = expected_reviews(3)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_iter_all(self):
+        rows = list(iter_critic_reviews(RT_MOVIE_URL))
+        self.assertEqual(len(rows), 60)
+        self.assertEqual(rows[25], {k: v[25] for k, v in self.expected.items()})
+        self.get.reset_mock()
+        self.assertEqual(get_critic_reviews(RT_MOVIE_URL), self.expected)
+        # one request per page
+        self.assertEqual(self.get.call_count, 3)
+
+    def test_max_reviews(self):
+        # pages after the limit are never requested
+        rows = list(iter_critic_reviews(RT_MOVIE_URL, max_reviews=20))
+        self.assertEqual(len(rows), 20)
+        # page 1 is the page that gave the page count
+        self.assertEqual(self.get.call_count, 1)
+
+        # no reviews, no requests
+        self.get.reset_mock()
+        self.assertEqual(list(iter_critic_reviews(RT_MOVIE_URL, max_reviews=0)), [])
+        self.assertEqual(self.get.call_count, 0)
+        with self.assertRaises(Exception):
+            iter_critic_reviews(RT_MOVIE_URL, max_reviews=-1)
+
+    def test_since_date(self):
+        since = _parse_date(self.expected['date'][29])
+        pages = list(iter_critic_reviews(RT_MOVIE_URL, since_date=since, by_page=True))
+        self.assertEqual([p.num_rows for p in pages], [20, 10])
+        self.assertEqual(pages[1]['date'][-1], self.expected['date'][29])
+
+class TestNewCriticReviews(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = ReviewStateStore(os.path.join(self.dir.name, 'state.sqlite'))
+
+    def tearDown(self):
+        self.store.close()
+        self.dir.cleanup()
+
+    def test_only_new_reviews(self):
+        # first run scrapes everything
+        with mock.patch('tomatopy.util._get', side_effect=fake_get):
+            first = get_new_critic_reviews(RT_MOVIE_URL, self.store)
+        self.assertEqual(first, expected_reviews(3))
+
+        # three new reviews push the known ones down the first page
+        new = {k: v[:3] for k, v in expected_reviews(1).items()}
+        new['date'] = ['Dec 30, 2099', 'Dec 29, 2099', 'Dec 28, 2099']
+        pages = [[new[k] + first[k][:17] for k in REVIEW_KEYS],
+                 [first[k][17:37] for k in REVIEW_KEYS]]
+        with mock.patch('tomatopy.reviews._iter_review_pages', return_value=iter(pages)), \
+             mock.patch('tomatopy.util._get', side_effect=fake_get):
+            second = get_new_critic_reviews(RT_MOVIE_URL, self.store)
+        self.assertEqual(second, new)
+        self.assertEqual(self.store.get(RT_MOVIE_URL)[1], '2099-12-30')
@@ -0,0 +1,102 @@
+import functools
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from tomatopy import resolve
+from tomatopy.scraper import scrape_many, scrape_movie_info
+from tomatopy.util import get_crawl_rate
+from tomatopy.tests.fixtures import fake_get, fake_head, MAIN_PAGE_INFO, expected_reviews
+
+class TestScrapeMany(unittest.TestCase):
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_scrape_many(self, *_):
+        # the batch streams every movie and survives failures
+        rate = get_crawl_rate()
+        results = dict()
+        for name, main_info, reviews in scrape_many(['X2: X-Men United', 'Not A Movie'],
+                                                    workers=2, rate=0.001, parse_workers=1):
+            results[name] = (main_info, reviews)
+
+        self.assertEqual(results['X2: X-Men United'][0], MAIN_PAGE_INFO)
+        self.assertEqual(results['X2: X-Men United'][1], expected_reviews(3))
+        self.assertEqual(results['Not A Movie'], (None, None))
+        # the crawl rate is restored after the batch
+        self.assertEqual(get_crawl_rate(), rate)
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=functools.partial(fake_get, num_pages=6))
+    def test_pages_reassembled_in_order(self, *_):
+        # a queue of one page keeps the fetchers waiting on the parsers
+        results = list(scrape_many(['X2: X-Men United'] * 3, workers=3, rate=0.001,
+                                   parse_workers=2, queue_size=1))
+        self.assertEqual(len(results), 3)
+        for name, main_info, reviews in results:
+            self.assertEqual(main_info, MAIN_PAGE_INFO)
+            self.assertEqual(reviews, expected_reviews(6))
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_close_early(self, *_):
+        # closing the generator stops the fetchers and parsers
+        batch = scrape_many(['X2: X-Men United'] * 4, workers=1, rate=0.001,
+                            parse_workers=1, queue_size=1)
+        name, main_info, reviews = next(batch)
+        batch.close()
+        self.assertEqual(reviews, expected_reviews(3))
+
+    def test_arguments_checked_at_call(self):
+        # bad arguments raise before the first result is asked for
+        rate = get_crawl_rate()
+        for kwargs in ({'workers': 0}, {'rate': 0}, {'parse_workers': 0}, {'queue_size': 0}):
+            with self.assertRaises(Exception):
+                scrape_many(['X2: X-Men United'], **kwargs)
+        # the crawl rate is not changed until the batch runs
+        scrape_many(['X2: X-Men United'], rate=0.001)
+        self.assertEqual(get_crawl_rate(), rate)
+
+    @unittest.skipIf(sys.platform in ('win32', 'darwin'), 'parser processes are spawned')
+    def test_script_without_main_guard(self):
+        # the parser processes do not run the calling script again
+        script = """
+from unittest import mock
+from tomatopy.scraper import scrape_many
+from tomatopy.tests.fixtures import fake_get, fake_head
+print('started')
+with mock.patch('tomatopy.resolve._head', side_effect=fake_head), \\
+        mock.patch('tomatopy.util._get', side_effect=fake_get):
+    for name, main_info, reviews in scrape_many(['X2: X-Men United', 'Not A Movie'],
+                                                rate=0.001, parse_workers=2):
+        print(name)
+"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'script.py')
+            with open(path, 'w') as f:
+                f.write(script)
+            out = subprocess.run([sys.executable, path], cwd=root, capture_output=True, text=True,
+                                 env=dict(os.environ, PYTHONPATH=root), timeout=120)
+        lines = out.stdout.splitlines()
+        self.assertEqual(lines.count('started'), 1, out.stderr)
+        self.assertEqual(sorted(lines[1:]), ['Not A Movie', 'X2: X-Men United'])
+
+class TestScrapeMovieInfo(unittest.TestCase):
+
+    @mock.patch('tomatopy.resolve._head', side_effect=fake_head)
+    @mock.patch('tomatopy.util._get', side_effect=fake_get)
+    def test_requests_once_per_url(self, get, head):
+        resolve._resolved.clear()
+        main_info, reviews = scrape_movie_info('X2: X-Men United')
+        self.assertEqual(main_info, MAIN_PAGE_INFO)
+        self.assertEqual(reviews, expected_reviews(3))
+        # main page and 3 review pages; the url check is the main page
+        # and the page count is review page 1
+        urls = [c[0][0] for c in get.call_args_list]
+        self.assertEqual(len(urls), 4)
+        self.assertEqual(len(set(urls)), 4)
+        self.assertEqual(head.call_count, 0)
@@ -0,0 +1,81 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+from tomatopy.sinks import JsonlSink, ParquetSink, write_results
+from tomatopy.records import ReviewTable
+from tomatopy.tests.fixtures import MAIN_PAGE_INFO, expected_reviews
+
+class TestSinks(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.results = [('X2: X-Men United', MAIN_PAGE_INFO, ReviewTable(expected_reviews(2))),
+                        ('Not A Movie', None, None)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_jsonl(self):
+        reviews_path = os.path.join(self.dir, 'reviews.jsonl')
+        main_path = os.path.join(self.dir, 'main.jsonl')
+        with JsonlSink(reviews_path) as reviews, JsonlSink(main_path, kind='main_info') as main:
+            self.assertEqual(write_results(self.results, reviews, main), 1)
+        self.assertEqual(reviews.num_rows, 40)
+
+        with open(reviews_path) as f:
+            rows = [json.loads(line) for line in f]
+        expected = expected_reviews(2)
+        self.assertEqual(len(rows), 40)
+        self.assertEqual(rows[0]['movie'], 'X2: X-Men United')
+        self.assertEqual(rows[0]['reviews'], expected['reviews'][0])
+        self.assertIs(rows[0]['top_critic'], True)
+        self.assertEqual(rows[0]['date'], datetime.datetime.strptime(expected['date'][0],
+                                                                     '%b %d, %Y').date().isoformat())
+
+        with open(main_path) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['box_office'], 214813155)
+        self.assertEqual(rows[0]['theater_date'], '2003-05-02')
+        self.assertEqual(rows[0]['studio'], '20th Century Fox')
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        path = os.path.join(self.dir, 'reviews.parquet')
+        with ParquetSink(path, row_group_size=15) as sink:
+            write_results(self.results * 2, reviews_sink=sink)
+        # 80 rows in row groups of 15 and a last one of 5
+        meta = pq.ParquetFile(path).metadata
+        self.assertEqual(meta.num_rows, 80)
+        self.assertEqual(meta.num_row_groups, 6)
+
+        table = pq.read_table(path)
+        self.assertEqual(str(table.schema.field('top_critic').type), 'bool')
+        self.assertEqual(str(table.schema.field('date').type), 'date32[day]')
+        self.assertEqual(table.column('critic').to_pylist()[:40], expected_reviews(2)['critic'])
+
+        path = os.path.join(self.dir, 'main.parquet')
+        with ParquetSink(path, kind='main_info') as sink:
+            write_results(self.results, main_info_sink=sink)
+        row = pq.read_table(path).to_pylist()[0]
+        self.assertEqual(row['box_office'], 214813155)
+        self.assertEqual(row['dvd_date'], datetime.date(2003, 11, 25))
+
+    def test_kind(self):
+        with self.assertRaises(Exception):
+            JsonlSink(os.path.join(self.dir, 'x.jsonl'), kind='cast')
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_row_group_size(self):
+        for size in (0, -1):
+            with self.assertRaises(Exception):
+                ParquetSink(os.path.join(self.dir, 'x.parquet'), row_group_size=size)
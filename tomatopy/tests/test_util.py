@@ -1,7 +1,9 @@
 import unittest
 
-from tomatopy.util import _make_soup, _is_page_404, _format_name, _build_url, check_min_delay, get_crawl_rate, set_crawl_rate, get_verbose_setting
-from tomatopy.gl import DEFAULT_CRAWL_RATE
+from bs4 import BeautifulSoup
+
+from tomatopy.util import _make_soup, _is_page_404, _format_name, _build_url, build_urls, check_min_delay, get_crawl_rate, set_crawl_rate, get_verbose_setting, set_session_options, close_session, lib_cont, _decode_entities
+from tomatopy.gl import DEFAULT_CRAWL_RATE, DEFAULT_TIMEOUT, DEFAULT_USER_AGENT
 
 class TestUtil(unittest.TestCase):
     
@@ -19,6 +21,14 @@ class TestUtil(unittest.TestCase):
         # weird name to reformat
         self.assertEqual('x2_xmen_united',
                          _format_name('x2: X-men united'))
+        # accents, ampersands, dots and dashes between words
+        self.assertEqual('amelie', _format_name('Amélie'))
+        self.assertEqual('mr_and_mrs_smith', _format_name('Mr. & Mrs. Smith'))
+        self.assertEqual('star_wars_episode_i_the_phantom_menace',
+                         _format_name('Star Wars: Episode I – The Phantom Menace'))
+        self.assertEqual('airplane', _format_name('Airplane!'))
+        self.assertEqual('whats-eating-gilbert-grape',
+                         _format_name('What’s Eating Gilbert Grape', sep='-'))
 
     def test_build_url(self):
         # build url from a weird name
@@ -28,6 +38,11 @@ class TestUtil(unittest.TestCase):
         self.assertEqual('https://www.rottentomatoes.com/m/the_dark_knight/',
                          _build_url('The Dark Knight'))
 
+    def test_build_urls(self):
+        urls = build_urls(['The Dark Knight', 'Amélie'])
+        self.assertEqual(urls, {'The Dark Knight': 'https://www.rottentomatoes.com/m/the_dark_knight/',
+                                'Amélie': 'https://www.rottentomatoes.com/m/amelie/'})
+
     # currently check that RT does not seem to have a default crawl rate
     def test_check_min_delay(self):
         self.assertEqual(0,
@@ -49,4 +64,32 @@ class TestUtil(unittest.TestCase):
 
     def test_get_verbose_setting(self):
         # test that verbose has correct initial setting
-        self.assertFalse(get_verbose_setting())
\ No newline at end of file
+        self.assertFalse(get_verbose_setting())
+
+    def test_session_reuse(self):
+        # the same pooled session is handed out until it is closed
+        session = lib_cont.get_session()
+        self.assertIs(session, lib_cont.get_session())
+        self.assertEqual(session.headers['User-Agent'], DEFAULT_USER_AGENT)
+        close_session()
+        self.assertIsNot(session, lib_cont.get_session())
+
+    def test_set_session_options(self):
+        # new options rebuild the session
+        set_session_options(pool_size=4, timeout=5, user_agent='test-agent')
+        session = lib_cont.get_session()
+        self.assertEqual(session.headers['User-Agent'], 'test-agent')
+        self.assertEqual(session.get_adapter('https://').max_retries.total, 3)
+        self.assertEqual(lib_cont.get_timeout(), 5)
+        with self.assertRaises(Exception):
+            set_session_options(pool_size=0)
+        set_session_options(pool_size=10, timeout=DEFAULT_TIMEOUT,
+                            user_agent=DEFAULT_USER_AGENT)
+
+    def test_decode_entities(self):
+        # the raw text path sees what str(soup) used to give the parsers
+        html = ('<p title="My Best Friend&#39;s Girl">Action &amp; Adventure &lt;3 '
+                'Fish & Chips &eacute;t&eacute; &#x2014; 5 &gt; 4</p>')
+        self.assertEqual(_decode_entities(html),
+                         str(BeautifulSoup(html, 'html.parser')))
+        self.assertEqual(_decode_entities('no entities'), 'no entities')
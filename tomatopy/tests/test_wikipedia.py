@@ -1,6 +1,14 @@
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
-from tomatopy.wikipedia import _build_wiki_url, scrape_movie_names
+from requests import ConnectionError
+
+from tomatopy.util import get_wiki_crawl_rate, set_wiki_crawl_rate
+from tomatopy.wikipedia import _build_wiki_url, scrape_movie_names, scrape_movie_names_range, TitleIndex
+from tomatopy.tests.fixtures import FakeResponse, PAGE_404_HTML, wiki_page_html
 
 class TestWikiedia(unittest.TestCase):
     def test_build_wiki_url(self):
@@ -30,4 +38,71 @@ class TestWikiedia(unittest.TestCase):
         self.assertTrue('Ice Palace' in movies)
         self.assertTrue("Under Ten Flags" in movies)
         self.assertTrue('The Hole' in movies)
-        self.assertTrue('Macumba Love' in movies)
\ No newline at end of file
+        self.assertTrue('Macumba Love' in movies)
+
+WIKI_TITLES = {
+    2007: ['No Country for Old Men', 'Juno (2007 film)', 'The Mist (film)'],
+    2008: ['The Dark Knight', "My Best Friend's Girl", 'The Mist (film)'],
+}
+
+def fake_wiki_get(url):
+    year = int(url.split('/')[-1].split('_')[0])
+    if year in WIKI_TITLES:
+        return FakeResponse(url, wiki_page_html(WIKI_TITLES[year], year))
+    return FakeResponse(url, PAGE_404_HTML, 404)
+
+class TestWikipediaOffline(unittest.TestCase):
+
+    @mock.patch('tomatopy.util._get', side_effect=fake_wiki_get)
+    def test_scrape_movie_names(self, _):
+        self.assertEqual(scrape_movie_names(2007), ['No Country for Old Men', 'Juno', 'The Mist'])
+        # a page without movies is not an error
+        self.assertEqual(scrape_movie_names(1999), [])
+
+    @mock.patch('tomatopy.util._get', side_effect=fake_wiki_get)
+    def test_scrape_movie_names_range(self, get):
+        rate = get_wiki_crawl_rate()
+        set_wiki_crawl_rate(0.001)
+        try:
+            index = scrape_movie_names_range(2006, 2008)
+            self.assertEqual(index.names(), ['No Country for Old Men', 'Juno', 'The Mist',
+                                             'The Dark Knight', "My Best Friend's Girl"])
+            self.assertEqual(index.get_years('The Mist'), [2007, 2008])
+            self.assertEqual(index.get_slug('Juno'), 'Juno_(2007_film)')
+            self.assertEqual(index.names(2008), ['The Mist', 'The Dark Knight', "My Best Friend's Girl"])
+            # 2006 listed nothing, so it is not marked done
+            self.assertEqual(index.years, {2007, 2008})
+
+            path = os.path.join(tempfile.mkdtemp(), 'titles.json')
+            index.save(path)
+            index = TitleIndex.load(path)
+            self.assertEqual(index.get_years('The Mist'), [2007, 2008])
+
+            # extending fetches only the years the index lacks
+            get.reset_mock()
+            index = scrape_movie_names_range(2007, 2009, index=index)
+            self.assertEqual(sorted(c[0][0] for c in get.call_args_list),
+                             [_build_wiki_url(2009)])
+            self.assertEqual(len(index), 5)
+        finally:
+            set_wiki_crawl_rate(rate)
+            shutil.rmtree(os.path.dirname(path))
+
+    def test_range_failed_year(self):
+        def get(url):
+            if url == _build_wiki_url(2007):
+                raise ConnectionError()
+            return fake_wiki_get(url)
+
+        rate = get_wiki_crawl_rate()
+        set_wiki_crawl_rate(0.001)
+        try:
+            # the other years are kept; the failed one is retried later
+            with mock.patch('tomatopy.util._get', side_effect=get):
+                index = scrape_movie_names_range(2007, 2008)
+            self.assertEqual(index.years, {2008})
+            with mock.patch('tomatopy.util._get', side_effect=fake_wiki_get):
+                index = scrape_movie_names_range(2007, 2008, index=index)
+            self.assertEqual(index.years, {2007, 2008})
+        finally:
+            set_wiki_crawl_rate(rate)
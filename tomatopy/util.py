@@ -9,19 +9,73 @@ environment you are running in.
 This file contains the following functions:
 
     * _make_soup - request webpage and make it readable
+    * _get_response - request webpage; None when redirected too often
+    * _page_text - get the html of a response as text
+    * _get_page - request webpage and get its html as text
+    * _parsed_kind - key of a parsed result in the response cache
+    * _lookup_parsed - get the result parsed from a cached response
+    * _store_parsed - keep the result parsed from a response
+    * _parse_response - parse a response unless it was parsed before
+    * _get_parsed_page - request webpage and parse it unless unchanged
+    * _decode - decode the body of a response to text
+    * _decode_content - decode a response body given its content type
+    * _decode_entities - decode entities like the bs4 serializer
     * _is_page_404 - check if requested page is a 404
     * _format_name - convert input movie name to url format
     * _build_url - builds a url for main page if input
+    * build_urls - builds the main page urls of many movies
+    * _parse_date - parses a date as written on RT, e.g. 'May 2, 2003'
+    * _parse_int - parses an integer with thousands separators
+    * _parse_runtime - parses a runtime in minutes, e.g. '134 minutes'
     * set_crawl_rate - set crawl rate
     * get_crawl_rate - get current crawl_rate
+    * set_wiki_crawl_rate - set crawl rate for wikipedia
+    * get_wiki_crawl_rate - get current crawl rate for wikipedia
     * set_verbose_mode - set verbose mode (Boolean)
     * get_verbose_setting - get verbose setting
     * check_min_delay - requests the min crawl-delay if any
+    * set_session_options - set http connection pool/retry options
+    * close_session - close the shared http session
+    * enable_cache - enable the on-disk response cache
+    * disable_cache - disable the on-disk response cache
+    * clear_cache - remove all responses from the cache
+    * get_cache_info - get the state of the response cache
+    * set_parser_backend - set the backend used to parse pages
+    * get_parser_backend - get the backend used to parse pages
+    * enable_slug_cache - remember resolved movie urls on disk
+    * disable_slug_cache - stop remembering resolved movie urls on disk
+    * enable_parse_memo - remember parsed pages by a hash of their html
+    * disable_parse_memo - stop remembering parsed pages
+    * get_parse_memo_info - get the state of the parsed page memo
+    * enable_archive - append every downloaded page to an archive
+    * disable_archive - stop archiving downloaded pages
+    * enable_metrics - start recording counters and timings
+    * disable_metrics - stop recording counters and timings
+    * get_metrics - get the recorded counters and timings
+    * add_metrics_hook - register a callback for counters and timings
+    * remove_metrics_hook - unregister a metrics callback
+    * _record - record a timing
+    * _count - add to a counter
+    * _field_timer - get a per-field timer when instrumented
+    * _timed - record the time of a block when instrumented
+    * _memo_parse - parse a page unless the parse memo has it
+    * _get - request url through the cache and shared http session
+    * _archive - append a response to the page archive
+    * _head - request only the status and headers of url
+    * _record_fetch - record the timings of one request
+    * _throttle - wait for the next request slot of the url's host
 """
 
 # base
-import requests
+import datetime
+import functools
+from contextlib import contextmanager
+import html
+import logging
+import re
 import time
+import unicodedata
+from typing import Callable, Dict, Iterable
 
 # requirements
 from bs4 import BeautifulSoup
@@ -29,8 +83,29 @@ from requests import TooManyRedirects
 
 # this package
 from .gl import RT_BASE_URL, DEFAULT_CRAWL_RATE, LibGlobalsContainer
+from .cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_BYTES
+from .state import DEFAULT_STATE_PATH
+from .metrics import _FieldTimer, _NullTimer
+from .memo import DEFAULT_MEMO_ENTRIES, PARSER_VERSION
+from .archive import DEFAULT_ARCHIVE_PATH, DEFAULT_SEGMENT_BYTES
+from .ratelimit import _host
+
+logger = logging.getLogger(__name__)
 
 lib_cont = LibGlobalsContainer()
+null_timer = _NullTimer()
+
+# character references and bare ampersands
+entity_pat = re.compile(r'&(?:#[0-9]+;|#[xX][0-9a-fA-F]+;|[A-Za-z][A-Za-z0-9]*;)?')
+charset_pat = re.compile(r'charset=[\'"]?([\w\-]+)', re.IGNORECASE)
+
+# one pass over a lower case movie name turns it into slug words;
+# punctuation is dropped and letters without a decomposition are
+# spelled out
+slug_table = str.maketrans(dict(
+    {c: None for c in '\'\u2018\u2019`"\u201c\u201d-\u2010\u2013\u2014:,.!?;()[]{}#*\u2026\u00a1\u00bf'},
+    **{'&': ' and ', '/': ' ', '\u00a0': ' ', '\u00df': 'ss', '\u00e6': 'ae', '\u0153': 'oe',
+       '\u00f8': 'o', '\u0142': 'l', '\u0111': 'd', '\u00f0': 'd', '\u00fe': 'th'}))
 
 def set_crawl_rate(rate: float) -> None:
     """Set the crawl rate
@@ -71,8 +146,42 @@ def get_crawl_rate() -> float:
     else:
         return DEFAULT_CRAWL_RATE
 
+def set_wiki_crawl_rate(rate: float) -> None:
+    """Set the crawl rate for en.wikipedia.org
+    Wikipedia has its own budget, separate from Rotten Tomatoes.
+
+    Parameters
+    ----------
+    rate : float
+        Time in seconds between secessive requests
+        This should be considered the minimum time
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.set_wiki_crawl_rate(rate)
+
+def get_wiki_crawl_rate() -> float:
+    """Get the rate used to crawl en.wikipedia.org
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    float
+        The current wikipedia crawling rate
+    """
+
+    return lib_cont.get_wiki_crawl_rate()
+
 def set_verbose_mode(verbose: bool = False) -> None:
     """Enable/Disable Verbose Mode
+    Verbose mode writes the debug log of the package to stdout; for
+    other destinations configure the 'tomatopy' logger instead.
 
     Parameters
     ----------
@@ -101,6 +210,889 @@ def get_verbose_setting() -> bool:
 
     return lib_cont.get_verbose_setting()
     
+def set_session_options(pool_size: int = None, retries: int = None,
+                        backoff: float = None, timeout: float = None,
+                        user_agent: str = None) -> None:
+    """Set the options of the shared http session
+    Options left as None are not changed.
+
+    Parameters
+    ----------
+    pool_size : int
+        Max connections kept alive per host
+    retries : int
+        Retries per request on connection errors and 429/5xx
+    backoff : float
+        Backoff factor between retries in seconds
+    timeout : float
+        Connect/read timeout in seconds per request
+    user_agent : str
+        User-Agent header sent with every request
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.set_session_options(pool_size, retries, backoff,
+                                 timeout, user_agent)
+
+def close_session() -> None:
+    """Close the shared http session and its pooled connections
+    A new session is opened on the next request.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.close_session()
+
+def _throttle(url: str) -> float:
+    """Wait until the host of url may be requested again
+    Only the part of the crawl rate that has not already elapsed
+    since the previous request start is waited.
+
+    Parameters
+    ----------
+    url : str
+        The url about to be requested
+
+    Returns
+    -------
+    float
+        Seconds spent waiting
+    """
+
+    host = _host(url)
+    delay = lib_cont.limiter.wait(host)
+    if lib_cont.instrumented:
+        _record('throttle.wait', delay, host=host)
+    return delay
+
+def enable_cache(path: str = DEFAULT_CACHE_PATH,
+                 max_bytes: int = DEFAULT_CACHE_BYTES,
+                 ttls: dict = None) -> None:
+    """Enable the on-disk response cache
+    Fresh responses are served without a request; stale ones are
+    revalidated with their ETag/Last-Modified validators.
+
+    Parameters
+    ----------
+    path : str
+        location of the SQLite database
+    max_bytes : int
+        limit on the total size of the stored bodies
+    ttls : dict
+        seconds a response is fresh keyed by url class:
+        'main', 'reviews', 'wiki', 'other'
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.enable_cache(path, max_bytes, ttls)
+
+def disable_cache() -> None:
+    """Disable the on-disk response cache
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.disable_cache()
+
+def clear_cache() -> None:
+    """Remove all responses from the cache
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.clear_cache()
+
+def get_cache_info() -> dict:
+    """Get the state of the response cache
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    dict
+        dict with keys: path, entries, bytes, max_bytes,
+        hits, misses, revalidated; None when disabled
+    """
+
+    return lib_cont.get_cache_info()
+
+def set_parser_backend(backend: str) -> None:
+    """Set the backend used to parse pages
+    'regex' is the original parser and needs no packages; 'lxml'
+    parses each page once with lxml and reads fields with XPath.
+
+    Parameters
+    ----------
+    backend : str
+        'regex' or 'lxml'
+
+    Returns
+    -------
+    None
+    """
+
+    if backend == 'lxml':
+        try:
+            from . import parsers
+        except ImportError:
+            raise Exception('The `lxml` parser backend requires that `lxml` be installed')
+    lib_cont.set_parser_backend(backend)
+
+def get_parser_backend() -> str:
+    """Get the backend used to parse pages
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    str
+        'regex' or 'lxml'
+    """
+
+    return lib_cont.get_parser_backend()
+
+def enable_slug_cache(path: str = DEFAULT_STATE_PATH) -> None:
+    """Remember resolved movie urls on disk between runs
+    Movies that were not found are remembered for a week.
+
+    Parameters
+    ----------
+    path : str
+        location of the SQLite database
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.enable_slug_cache(path)
+
+def disable_slug_cache() -> None:
+    """Stop remembering resolved movie urls on disk
+    Urls resolved by this process stay memoized in memory.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.disable_slug_cache()
+
+def enable_parse_memo(max_entries: int = DEFAULT_MEMO_ENTRIES, path: str = None) -> None:
+    """Remember parsed pages by a hash of their html, so a page
+    body that was parsed before is not parsed again. Results are
+    kept until PARSER_VERSION changes.
+
+    Parameters
+    ----------
+    max_entries : int
+        parsed pages kept in memory; least recently used go first
+    path : str
+        location of a SQLite database that keeps every parsed page
+        between runs; None to keep them in memory only
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.enable_parse_memo(max_entries, path)
+
+def disable_parse_memo() -> None:
+    """Stop remembering parsed pages
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.disable_parse_memo()
+
+def get_parse_memo_info() -> Dict:
+    """Get the state of the parsed page memo
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    dict
+        dict with keys: path, entries, max_entries, hits, misses;
+        None if the memo is disabled
+    """
+
+    if lib_cont.parse_memo is None:
+        return None
+    return lib_cont.parse_memo.info()
+
+def enable_archive(path: str = DEFAULT_ARCHIVE_PATH,
+                   max_segment_bytes: int = DEFAULT_SEGMENT_BYTES) -> None:
+    """Append every downloaded page to a WARC archive on disk, so
+    the pages can be parsed again offline with `reparse`.
+    Pages served by the response cache are archived once.
+
+    Parameters
+    ----------
+    path : str
+        directory of the archive
+    max_segment_bytes : int
+        size at which a segment file is closed and a new one started
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.enable_archive(path, max_segment_bytes)
+
+def disable_archive() -> None:
+    """Stop archiving downloaded pages
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.disable_archive()
+
+def enable_metrics():
+    """Start recording counters and timings of fetches, throttle
+    waits, cache hits, parsing and per-field extraction
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    Metrics
+        the sink; export with to_json/to_prometheus or
+        report with summary
+    """
+
+    return lib_cont.enable_metrics()
+
+def disable_metrics() -> None:
+    """Stop recording counters and timings; hooks stay registered
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.disable_metrics()
+
+def get_metrics():
+    """Get the recorded counters and timings
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    Metrics
+        the sink; None when disabled
+    """
+
+    return lib_cont.metrics
+
+def add_metrics_hook(hook) -> None:
+    """Register a callback for every counter and timing
+    Hooks run on the thread that records the value; parser processes
+    of scrape_many only report to the metrics sink.
+
+    Parameters
+    ----------
+    hook : callable
+        called as hook(kind, name, value, labels) with kind
+        'counter' or 'timing' and labels a dict
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.add_metrics_hook(hook)
+
+def remove_metrics_hook(hook) -> None:
+    """Unregister a callback added with add_metrics_hook
+
+    Parameters
+    ----------
+    hook : callable
+        the registered callback
+
+    Returns
+    -------
+    None
+    """
+
+    lib_cont.remove_metrics_hook(hook)
+
+def _record(name: str, seconds: float, **labels) -> None:
+    """Record a timing in the metrics sink and hooks
+
+    Parameters
+    ----------
+    name : str
+        timing name, e.g. 'fetch.total'
+    seconds : float
+        the timing
+    labels : str
+        label values of the timing
+
+    Returns
+    -------
+    None
+    """
+
+    metrics = lib_cont.metrics
+    if metrics is not None:
+        metrics.observe(name, seconds, **labels)
+    for hook in lib_cont.metrics_hooks:
+        hook('timing', name, seconds, labels)
+
+def _count(name: str, value: float = 1, **labels) -> None:
+    """Add to a counter in the metrics sink and hooks
+
+    Parameters
+    ----------
+    name : str
+        counter name, e.g. 'requests'
+    value : float
+        amount to add
+    labels : str
+        label values of the counter
+
+    Returns
+    -------
+    None
+    """
+
+    metrics = lib_cont.metrics
+    if metrics is not None:
+        metrics.inc(name, value, **labels)
+    for hook in lib_cont.metrics_hooks:
+        hook('counter', name, value, labels)
+
+def _field_timer():
+    """Get a per-field timer when instrumented
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    _FieldTimer
+        a new timer; a timer that records nothing when nothing is
+        instrumented
+    """
+
+    return _FieldTimer() if lib_cont.instrumented else null_timer
+
+@contextmanager
+def _timed(name: str, **labels):
+    """Record the time of a block when instrumented
+    Nothing is recorded if the block raises.
+
+    Parameters
+    ----------
+    name : str
+        timing name, e.g. 'parse.page'
+    labels : str
+        label values of the timing
+
+    Returns
+    -------
+    contextmanager
+    """
+
+    if not lib_cont.instrumented:
+        yield
+        return
+    start = time.perf_counter()
+    yield
+    _record(name, time.perf_counter() - start, **labels)
+
+def _memo_parse(page: str, backend: str, page_html: str, parse: Callable):
+    """Parse a page unless the parse memo has it
+    The parse is timed as 'parse.page' when instrumented.
+
+    Parameters
+    ----------
+    page : str
+        kind of page, 'main' or 'review'
+    backend : str
+        parser backend of parse
+    page_html : str
+        html content of the page
+    parse : callable
+        parser of the backend, called with page_html
+
+    Returns
+    -------
+    object
+        result of parse
+    """
+
+    memo = lib_cont.parse_memo
+    if memo is not None:
+        # a page parsed before is not parsed again
+        key = memo.key(page, backend, page_html)
+        found, info = memo.get(key)
+        if lib_cont.instrumented:
+            _count('parse.memo', page=page, result='hit' if found else 'miss')
+        if found:
+            return info
+
+    with _timed('parse.page', page=page, backend=backend):
+        info = parse(page_html)
+
+    if memo is not None:
+        memo.put(key, info)
+    return info
+
+def _get(url: str):
+    """Request url through the response cache and shared http session
+    Waits for the rate limiter unless a fresh cached response is used.
+
+    Parameters
+    ----------
+    url : str
+        The url to request
+
+    Returns
+    -------
+    requests.Response or CachedResponse
+        response of the GET request
+    """
+
+    cache = lib_cont.cache
+    cached = None
+    headers = dict()
+    if cache is not None:
+        cached, fresh = cache.lookup(url)
+        if fresh:
+            if lib_cont.instrumented:
+                _count('cache.hits', host=_host(url))
+            return _archive(url, cached)
+        if cached is not None:
+            # revalidate the stale response
+            if 'ETag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['ETag']
+            if 'Last-Modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+    _throttle(url)
+    session = lib_cont.get_session()
+    start = time.perf_counter()
+    r = session.get(url, headers=headers, timeout=lib_cont.get_timeout())
+    if lib_cont.instrumented:
+        _record_fetch(url, 'GET', r, time.perf_counter() - start)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('GET %s', url, extra={'url': url, 'status': r.status_code,
+                                           'elapsed_ms': round((time.perf_counter() - start) * 1000)})
+
+    if cache is not None:
+        if r.status_code == 304 and cached is not None:
+            if lib_cont.instrumented:
+                _count('cache.revalidated', host=_host(url))
+            cache.touch(url)
+            return _archive(url, cached)
+        cache.store(url, r)
+    return _archive(url, r)
+
+def _archive(url: str, r):
+    """Append a response to the page archive when it is enabled
+    A response served by the cache is only appended if the archive
+    has no record of url.
+
+    Parameters
+    ----------
+    url : str
+        The requested url
+    r : requests.Response or CachedResponse
+        response of the GET request
+
+    Returns
+    -------
+    requests.Response or CachedResponse
+        r
+    """
+
+    archive = lib_cont.archive
+    if archive is not None and \
+            (not getattr(r, 'from_cache', False) or url not in archive):
+        archive.append(url, r)
+    return r
+
+def _head(url: str):
+    """Request only the status and headers of url
+    A fresh cached GET response is returned instead when there is one.
+
+    Parameters
+    ----------
+    url : str
+        The url to request
+
+    Returns
+    -------
+    requests.Response or CachedResponse
+        response of the HEAD request, redirects followed
+    """
+
+    cache = lib_cont.cache
+    if cache is not None:
+        cached, fresh = cache.lookup(url)
+        if fresh:
+            return cached
+
+    _throttle(url)
+    session = lib_cont.get_session()
+    start = time.perf_counter()
+    r = session.head(url, allow_redirects=True, timeout=lib_cont.get_timeout())
+    if lib_cont.instrumented:
+        _record_fetch(url, 'HEAD', r, time.perf_counter() - start)
+    return r
+
+def _record_fetch(url: str, method: str, r, seconds: float) -> None:
+    """Record the timings of one request
+    requests reports the time until the response headers were
+    parsed, which includes connecting; the rest is the download.
+
+    Parameters
+    ----------
+    url : str
+        The requested url
+    method : str
+        'GET' or 'HEAD'
+    r : requests.Response
+        response of the request
+    seconds : float
+        wall time of the whole request
+
+    Returns
+    -------
+    None
+    """
+
+    host = _host(url)
+    elapsed = getattr(r, 'elapsed', None)
+    ttfb = min(elapsed.total_seconds(), seconds) if elapsed is not None else seconds
+    _count('requests', host=host, method=method, status=str(r.status_code))
+    _record('fetch.ttfb', ttfb, host=host)
+    _record('fetch.download', seconds - ttfb, host=host)
+    _record('fetch.total', seconds, host=host)
+
+def _decode(r) -> str:
+    """Decode the body of a response to text
+    Uses the charset of the Content-Type header, UTF-8 otherwise.
+
+    Parameters
+    ----------
+    r : requests.Response or CachedResponse
+        response to decode
+
+    Returns
+    -------
+    str
+        body of the response
+    """
+
+    return _decode_content(r.content, r.headers.get('Content-Type', ''))
+
+def _decode_content(content: bytes, content_type: str) -> str:
+    """Decode a response body to text; see _decode
+
+    Parameters
+    ----------
+    content : bytes
+        body of the response
+    content_type : str
+        Content-Type header of the response; '' if missing
+
+    Returns
+    -------
+    str
+        body of the response
+    """
+
+    match = charset_pat.search(content_type or '')
+    charset = match.group(1) if match is not None else 'utf-8'
+    try:
+        return content.decode(charset, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+def _replace_entity(match) -> str:
+    """Replace one match of entity_pat; see _decode_entities
+
+    Parameters
+    ----------
+    match : re.Match
+        match of entity_pat
+
+    Returns
+    -------
+    str
+        replacement text
+    """
+
+    entity = match.group(0)
+    char = html.unescape(entity)
+    if char == entity:
+        # bare or unknown ampersand
+        return '&amp;' + entity[1:]
+    return {'&': '&amp;', '<': '&lt;', '>': '&gt;'}.get(char, char)
+
+def _decode_entities(text: str) -> str:
+    """Decode character references the way the bs4 serializer does
+    Entities become their characters except &, < and >, which stay
+    (or become) &amp;, &lt; and &gt;. This gives the regex parsers the
+    same text that str(BeautifulSoup(...)) gave them without building
+    and re-serializing a tree.
+
+    Parameters
+    ----------
+    text : str
+        html content of a webpage
+
+    Returns
+    -------
+    str
+        html content with entities decoded
+    """
+
+    if '&' not in text:
+        return text
+    return entity_pat.sub(_replace_entity, text)
+
+def _get_response(url: str):
+    """Request url; see _get
+
+    Parameters
+    ----------
+    url : str
+        The url to scrape
+        
+    Returns
+    -------
+    requests.Response or CachedResponse
+        response of the GET request; None when redirected too many
+        times
+    """
+    try:
+        return _get(url)
+    except TooManyRedirects:
+        return None
+
+def _page_text(r) -> str:
+    """Get the html of a response as text for the regex parsers
+
+    Parameters
+    ----------
+    r : requests.Response or CachedResponse
+        response as from _get_response; None if there is none
+        
+    Returns
+    -------
+    str
+        html content of the page; '' when r is None
+    """
+    if r is None:
+        return ''
+    return _decode_entities(_decode(r))
+
+def _get_page(url: str) -> str:
+    """Request url and get the html of the page as text
+    Used by the regex parsers; no html tree is built.
+
+    Parameters
+    ----------
+    url : str
+        The url to scrape
+        
+    Returns
+    -------
+    str
+        html content of the page; '' when redirected too many times
+    """
+    return _page_text(_get_response(url))
+
+def _parsed_kind(kind: str) -> str:
+    """Key of a parsed result in the response cache
+    Results of another backend or parser version are not used.
+
+    Parameters
+    ----------
+    kind : str
+        what was parsed, e.g. 'main' or 'review'
+
+    Returns
+    -------
+    str
+        e.g. 'main/regex/1'
+    """
+
+    return '{}/{}/{}'.format(kind, lib_cont.parser_backend, PARSER_VERSION)
+
+def _lookup_parsed(url: str, r, kind: str):
+    """Get the result parsed from the same body of a response before
+    Only a response from the response cache, fresh or answered 304,
+    can have one; a new body drops the results of the old one.
+
+    Parameters
+    ----------
+    url : str
+        requested url
+    r : requests.Response or CachedResponse
+        response as from _get_response; None if there is none
+    kind : str
+        what was parsed, e.g. 'main' or 'review'
+
+    Returns
+    -------
+    boolean
+        True if a result was found
+    object
+        the result; None if not found
+    """
+
+    cache = lib_cont.cache
+    if cache is None or not getattr(r, 'from_cache', False):
+        return False, None
+    found, result = cache.lookup_parsed(url, _parsed_kind(kind))
+    if found and lib_cont.instrumented:
+        _count('parse.skipped', page=kind)
+    return found, result
+
+def _store_parsed(url: str, r, kind: str, result) -> None:
+    """Keep the result parsed from a response in the response cache
+
+    Parameters
+    ----------
+    url : str
+        requested url
+    r : requests.Response or CachedResponse
+        response the result was parsed from; None if there is none
+    kind : str
+        what was parsed, e.g. 'main' or 'review'
+    result : object
+        result of the parser; must be JSON serializable
+
+    Returns
+    -------
+    None
+    """
+
+    cache = lib_cont.cache
+    if cache is not None and r is not None and r.status_code == 200 and result is not None:
+        cache.store_parsed(url, _parsed_kind(kind), result)
+
+def _parse_response(url: str, r, kind: str, parse: Callable[[str], object],
+                    page_html: str = None):
+    """Parse the html of a response unless it was parsed before
+    With the response cache enabled, a page that is fresh in the cache
+    or answered 304 is not parsed again; the result parsed from the
+    same body before is returned.
+
+    Parameters
+    ----------
+    url : str
+        requested url
+    r : requests.Response or CachedResponse
+        response as from _get_response; None if there is none
+    kind : str
+        what parse extracts, e.g. 'main' or 'review'
+    parse : callable
+        parser called with the html as from _page_text; its result
+        must be JSON serializable to be stored
+    page_html : str
+        html of r when the caller has it already
+
+    Returns
+    -------
+    object
+        result of parse
+    """
+
+    found, result = _lookup_parsed(url, r, kind)
+    if found:
+        return result
+    if page_html is None:
+        page_html = _page_text(r)
+    result = parse(page_html)
+    _store_parsed(url, r, kind, result)
+    return result
+
+def _get_parsed_page(url: str, kind: str, parse: Callable[[str], object]):
+    """Request url and parse the html of the page; see _parse_response
+
+    Parameters
+    ----------
+    url : str
+        The url to scrape
+    kind : str
+        what parse extracts, e.g. 'main' or 'review'
+    parse : callable
+        parser called with the html as from _get_page; its result
+        must be JSON serializable to be stored
+
+    Returns
+    -------
+    object
+        result of parse
+    """
+
+    return _parse_response(url, _get_response(url), kind, parse)
+
 def _make_soup(url: str, crawl_rate: float = DEFAULT_CRAWL_RATE):
     """Request url and get content of page as html soup
 
@@ -109,18 +1101,15 @@ def _make_soup(url: str, crawl_rate: float = DEFAULT_CRAWL_RATE):
     url : str
         The url to scrape from RT
     crawl_rate : float
-        Time in seconds between secessive requests
-        This should be considered the minimum time
+        Unused; the crawl rate is set with `set_crawl_rate`
         
     Returns
     -------
     bs4 object
         html content from bs4 html parser
     """
-    crawl_rate = get_crawl_rate()
-    time.sleep(crawl_rate)
     try:
-        r = requests.get(url)
+        r = _get(url)
         soup = BeautifulSoup(r.content, 'html.parser')
     except TooManyRedirects:
         soup = ''
@@ -143,9 +1132,8 @@ def check_min_delay() -> float:
     user_found = False
     min_delay = 0
     
-    f = requests.get('https://www.rottentomatoes.com/robots.txt')
-    soup = BeautifulSoup(f.content, 'html.parser')
-    lines = str(soup).split('\n')
+    f = _get(RT_BASE_URL + 'robots.txt')
+    lines = _decode(f).split('\n')
     
     for line in lines:
         if 'User-agent: *' in line:
@@ -153,7 +1141,7 @@ def check_min_delay() -> float:
         if user_found and ('crawl-delay' in line):
             min_delay = float(line.split(':')[1].strip())
     if user_found:
-        print('Warning: crawl-delay not listed for "User-agent: *". \nReturning 0.')
+        logger.warning('crawl-delay not listed for "User-agent: *"; returning 0')
     return min_delay
     
 def _is_page_404(soup: str) -> bool:
@@ -178,8 +1166,12 @@ def _is_page_404(soup: str) -> bool:
     else:
         return False
         
+@functools.lru_cache(maxsize=65536)
 def _format_name(m_name: str, sep: str = '_') -> str:
     """Formats name for url
+    Accents are folded to ASCII, '&' becomes 'and', punctuation is
+    dropped and runs of spaces become one separator, all in one
+    translate pass. Results are cached.
 
     Parameters
     ----------
@@ -197,13 +1189,13 @@ def _format_name(m_name: str, sep: str = '_') -> str:
     # enforce lower case
     m_name = m_name.lower()
     
+    # fold accents, e.g. 'amélie' to 'amelie'
+    if not m_name.isascii():
+        m_name = ''.join(c for c in unicodedata.normalize('NFKD', m_name)
+                         if not unicodedata.combining(c))
+    
     # remove any punctuation
-    remove_items = "'-:,"
-    for i in remove_items:
-        if i in m_name:
-            m_name = m_name.replace(i,'')
-    m_name = m_name.strip('"')
-    return m_name.replace(' ', sep)
+    return sep.join(m_name.translate(slug_table).split())
     
 def _build_url(m_name: str, m_type: str = 'Movie', sep: str = '_') -> str:
     """Builds url for main page of movie
@@ -219,8 +1211,8 @@ def _build_url(m_name: str, m_type: str = 'Movie', sep: str = '_') -> str:
 
     Returns
     -------
-    bs4 object
-        hrml content from bs4 html parser
+    str
+        url of the main page
     """
     
     # TODO: add tv show selection
@@ -230,4 +1222,88 @@ def _build_url(m_name: str, m_type: str = 'Movie', sep: str = '_') -> str:
         raise Exception('Argument `m_type` must be `Movie`')
         # TODO raise error
     return url
-            
+
+def build_urls(movie_names: Iterable[str], sep: str = '_') -> Dict[str, str]:
+    """Builds the main page urls of many movies at once, e.g. the
+    titles of a TitleIndex. The slugs stay cached, so resolving
+    these movies later does not format their names again.
+
+    Parameters
+    ----------
+    movie_names : iterable of str
+        movie names
+    sep : str
+        Word seperator to use '-' or '_' typically
+
+    Returns
+    -------
+    dict
+        main page url keyed by movie name
+    """
+
+    return {name: _build_url(name, sep=sep) for name in movie_names}
+
+@functools.lru_cache(maxsize=8192)
+def _parse_date(date: str) -> datetime.date:
+    """Parses a date as written on RT
+    Reviews of a movie share few dates, so results are cached and
+    equal dates are the same object.
+
+    Parameters
+    ----------
+    date : str
+        date such as 'May 2, 2003' or 'November 25, 2003'
+
+    Returns
+    -------
+    datetime.date
+        the parsed date; None if date is None or not understood
+    """
+
+    if date is None:
+        return None
+    for fmt in ('%b %d, %Y', '%B %d, %Y'):
+        try:
+            return datetime.datetime.strptime(date.strip(), fmt).date()
+        except ValueError:
+            pass
+    return None
+
+def _parse_int(number: str) -> int:
+    """Parses an integer with thousands separators
+
+    Parameters
+    ----------
+    number : str
+        number such as '214,813,155'
+
+    Returns
+    -------
+    int
+        the parsed number; None if number is None or not understood
+    """
+
+    if number is None:
+        return None
+    try:
+        return int(number.replace(',', '').strip())
+    except ValueError:
+        return None
+
+def _parse_runtime(runtime: str) -> int:
+    """Parses a runtime in minutes
+
+    Parameters
+    ----------
+    runtime : str
+        runtime such as '134 minutes'
+
+    Returns
+    -------
+    int
+        the number of minutes; None if runtime is None or not understood
+    """
+
+    if runtime is None:
+        return None
+    return _parse_int(runtime.split()[0]) if runtime.strip() != '' else None
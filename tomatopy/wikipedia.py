@@ -1,31 +1,39 @@
-"""util.py
+"""wikipedia.py
 
 This file handles interations with wikipedia
 
-This file requires that `BeautifulSoup` be installed within the Python
-environment you are running in.
+This file requires no packages.
 
 This file contains the following functions:
 
-    * Builds url for wikipedia 'year in film'
+    * _build_wiki_url - builds url for wikipedia 'year in film'
+    * _parse_movie_names - finds movie titles and wiki slugs in a page
+    * _fetch_year - downloads and parses one 'year in film' page
     * scrape_movie_names - scrape movie names from wikipedia'
+    * scrape_movie_names_range - scrape movie names of many years into
+      a title index
 """
 # base
-import time
 import datetime
+import json
+import logging
+import os
 import re
-from typing import List
-
-# requirements
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 
 # this package
-from .util import _make_soup
+from .util import _get_page
+
+logger = logging.getLogger(__name__)
+
+movie_patt = re.compile(r'<i><a href=\"/wiki/([\w\(\)\%.\,\_\:\;\"]+)\stitle=\"([\w\s\(\)\%.\,\_\:\;\'\"\-]+)\"')
+# film disambiguations and category links; removed from titles
+title_patt = re.compile(r'\s\((\d+\s)?([\w\s]+)?film\)|Category\:\d+')
+
+# joins titles for a single substitution pass; no title contains it
+TITLE_SEP = '\x00'
 
-DEFAULT_CRAWL_RATE = 1
-movie_patt = re.compile(r'<i><a href=\"/wiki/[\w\(\)\%.\,\_\:\;\"]+\stitle=\"[\w\s\(\)\%.\,\_\:\;\'\"\-]+\"')
-      
 def _build_wiki_url(year: str) -> str:
     """Builds url for wikipedia 'year in film'
 
@@ -39,16 +47,65 @@ def _build_wiki_url(year: str) -> str:
     str
         formatted url
     """
-    
+
     current_year = datetime.datetime.now().year
     base_url = 'https://en.wikipedia.org/wiki/'
-    
+
     if year >= 1960 and year <= current_year:
         url = base_url + str(year) + '_in_film'
     else:
         raise Exception('Input year must be later than 1960 and not later than the current year (' + str(current_year) + ')')
     return url
-    
+
+def _parse_movie_names(s_html: str) -> List[Tuple[str, str]]:
+    """Finds movie titles and their wiki slugs in a 'year in film' page
+    Titles are cleaned in one substitution over all of them.
+
+    Parameters
+    ----------
+    s_html : str
+        html of the page
+
+    Returns
+    -------
+    list
+        list of (title, wiki slug) in page order; links that are not
+        movies are left out
+    """
+
+    matches = re.findall(movie_patt, s_html)
+    if len(matches) == 0:
+        return list()
+    slugs = [slug.replace('"', '') for slug, _ in matches]
+    titles = TITLE_SEP.join(title.replace('"', '') for _, title in matches)
+    titles = re.sub(title_patt, '', titles).split(TITLE_SEP)
+    return [(title, slug) for title, slug in zip(titles, slugs) if title != '']
+
+def _fetch_year(year: int) -> List[Tuple[str, str]]:
+    """Downloads and parses one 'year in film' page
+
+    Parameters
+    ----------
+    year : int
+        year to scrape movie titles from
+
+    Returns
+    -------
+    list
+        list of (title, wiki slug) as from _parse_movie_names
+    """
+
+    url = _build_wiki_url(year)
+    logger.info('scraping movie names from %s', url, extra={'url': url})
+    movies = _parse_movie_names(_get_page(url))
+
+    if len(movies) == 0:
+        logger.warning('no movie names found on %s', url, extra={'url': url})
+    else:
+        logger.info('found %s movie names on %s', len(movies), url,
+                    extra={'url': url, 'count': len(movies)})
+    return movies
+
 def scrape_movie_names(year: int) -> List[str]:
     """scrape movie names from wikipedia'
 
@@ -62,24 +119,232 @@ def scrape_movie_names(year: int) -> List[str]:
     list
         list of movie titles
     """
-    
-    url = _build_wiki_url(year)
-    print('Scraping from ' + url)
-    soup = _make_soup(url)
 
-    s_html = str(soup)
+    return [title for title, _ in _fetch_year(year)]
 
-    matches = list()
-    matches += re.findall(movie_patt, s_html)
-    for m in range(len(matches)):
-        matches[m] = matches[m].split('title=')[1].replace('"','')
-        matches[m] = re.sub(r'\s\((\d+\s)?([\w\s]+)?film\)','',matches[m])
-        matches[m] = re.sub(r'Category\:\d+','',matches[m])
-    matches.remove('')
+def scrape_movie_names_range(start: int, end: int, index: 'TitleIndex' = None,
+                             workers: int = 4, refresh: bool = False) -> 'TitleIndex':
+    """scrape movie names of many years from wikipedia into a title index
+    Years are downloaded concurrently; the wikipedia crawl rate
+    (`set_wiki_crawl_rate`) still limits how often requests start.
+    A year that fails to download is logged and left out of the
+    index, so a later call retries it.
 
-    if len(matches) == 0:
-        print('-> Scraping failed.')
-    else:
-        print('-> Scraping done.')
-        
-    return matches
\ No newline at end of file
+    Parameters
+    ----------
+    start : int
+        first year to scrape movie titles from
+    end : int
+        last year to scrape movie titles from; inclusive
+    index : TitleIndex
+        index to extend; years it already holds are skipped.
+        A new index when None
+    workers : int
+        number of years downloaded at once
+    refresh : boolean
+        download years the index already holds again
+
+    Returns
+    -------
+    TitleIndex
+        index of every title found
+    """
+
+    if index is None:
+        index = TitleIndex()
+    years = list(range(start, end + 1))
+    for year in years:
+        # fail before any request on a year out of range
+        _build_wiki_url(year)
+    if not refresh:
+        years = [year for year in years if year not in index.years]
+    if len(years) == 0:
+        return index
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(years))) as pool:
+        futures = [pool.submit(_fetch_year, year) for year in years]
+        for year, future in zip(years, futures):
+            # a failed download is left out so the next run retries it
+            try:
+                movies = future.result()
+            except Exception as e:
+                logger.warning('unable to scrape movie names of %s: %s', year, e,
+                               extra={'url': _build_wiki_url(year)})
+                continue
+            if len(movies) > 0:
+                index.add(year, movies)
+    return index
+
+#========
+# classes
+#========
+
+class TitleIndex():
+    """
+    Deduplicated movie titles with the years that list them
+
+    ...
+
+    Attributes
+    ----------
+    years : set
+        years whose titles have been added
+
+    Methods
+    -------
+    add(year, movies)
+        Adds the titles of one year
+    names(year)
+        Gets the titles, optionally of one year
+    get_years(title)
+        Gets the years that list a title
+    get_slug(title)
+        Gets the wiki slug of a title
+    save(path)
+        Writes the index to a JSON file
+    load(path)
+        Reads an index written by save
+
+    """
+
+    def __init__(self) -> None:
+        """Init index; empty
+
+        Parameters
+        ----------
+        self : self
+
+        Returns
+        -------
+        None
+        """
+
+        self.years = set()
+        # title -> [sorted years, wiki slug]
+        self._titles = dict()
+
+    def add(self, year: int, movies: List[Tuple[str, str]]) -> None:
+        """Add the titles of one year
+
+        Parameters
+        ----------
+        year : int
+            year the titles are listed under
+        movies : list
+            list of (title, wiki slug)
+
+        Returns
+        -------
+        None
+        """
+
+        for title, slug in movies:
+            entry = self._titles.get(title)
+            if entry is None:
+                self._titles[title] = [[year], slug]
+            elif year not in entry[0]:
+                entry[0].append(year)
+                entry[0].sort()
+        self.years.add(year)
+
+    def names(self, year: int = None) -> List[str]:
+        """Get the titles, optionally of one year
+
+        Parameters
+        ----------
+        year : int
+            only titles listed under this year; all when None
+
+        Returns
+        -------
+        list
+            titles in the order they were added
+        """
+
+        if year is None:
+            return list(self._titles)
+        return [title for title, entry in self._titles.items() if year in entry[0]]
+
+    def get_years(self, title: str) -> List[int]:
+        """Get the years that list a title
+
+        Parameters
+        ----------
+        title : str
+            movie title
+
+        Returns
+        -------
+        list
+            sorted years; None if the title is unknown
+        """
+
+        entry = self._titles.get(title)
+        return list(entry[0]) if entry is not None else None
+
+    def get_slug(self, title: str) -> str:
+        """Get the wiki slug of a title, e.g. 'The_Dark_Knight_(film)'
+
+        Parameters
+        ----------
+        title : str
+            movie title
+
+        Returns
+        -------
+        str
+            slug of the first link found; None if the title is unknown
+        """
+
+        entry = self._titles.get(title)
+        return entry[1] if entry is not None else None
+
+    def save(self, path: str) -> None:
+        """Write the index to a JSON file; replaces it atomically
+
+        Parameters
+        ----------
+        path : str
+            file to write
+
+        Returns
+        -------
+        None
+        """
+
+        doc = {'years': sorted(self.years),
+               'titles': {title: {'years': entry[0], 'slug': entry[1]}
+                          for title, entry in self._titles.items()}}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(doc, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'TitleIndex':
+        """Read an index written by save
+
+        Parameters
+        ----------
+        path : str
+            file to read
+
+        Returns
+        -------
+        TitleIndex
+            the index
+        """
+
+        with open(path, encoding='utf-8') as f:
+            doc = json.load(f)
+        index = cls()
+        index.years = set(doc['years'])
+        for title, entry in doc['titles'].items():
+            index._titles[title] = [entry['years'], entry['slug']]
+        return index
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._titles